@@ -1,18 +1,112 @@
+import argparse
+import bisect
+import collections
+import concurrent.futures
 import contextlib
+import ctypes
+import datetime
+import functools
+import gc
 import hashlib
+import heapq
+import io
+import itertools
 import json
 import math
+import mmap
+import multiprocessing
 import os
+import queue
 import random
+import select
+import statistics
+import struct
+import subprocess
+import threading
 import time
 import tkinter as tk
 import tkinter.font as tk_font
-from ctypes import windll
-
+import tkinter.messagebox as tk_messagebox
+import wave
+import weakref
+import zipfile
+try:
+    from ctypes import windll
+except ImportError:  # Not on Windows, e.g. the UI benchmark under a virtual display
+    windll = None
+
+# Third party imports are timed for --profile-startup
+IMPORT_TIMES = {}
+import_start_time = time.perf_counter()
 import pygame
+IMPORT_TIMES['pygame'] = time.perf_counter() - import_start_time
 # Install from requirements.txt using command: pip install -r requirements.txt
-import pyglet  # pip install pyglet
+import_start_time = time.perf_counter()
 from PIL import Image, ImageTk, ImageDraw, ImageOps  # pip install pillow
+IMPORT_TIMES['pillow'] = time.perf_counter() - import_start_time
+
+
+# Records spans of hot paths into a ring buffer and exports them as Chrome trace events (chrome://tracing or Perfetto)
+class Tracer:
+    def __init__(self, capacity: int = 100000):
+        self.enabled = False  # Traced functions only check this when disabled
+        self.spans = collections.deque(maxlen=capacity)  # (name, start ns, end ns, thread id), oldest are dropped
+        self.export_file = "trace.json"
+
+    def enable(self, export_file: str = "trace.json"):
+        self.enabled = True
+        self.export_file = export_file
+
+    # Decorator recording a span for each call, named by the function if no name is given
+    def trace(self, name: str = None):
+        def decorator(function):
+            span_name = name or function.__qualname__
+
+            @functools.wraps(function)
+            def traced(*args, **kwargs):
+                if not self.enabled:
+                    return function(*args, **kwargs)
+                start = time.perf_counter_ns()
+                try:
+                    return function(*args, **kwargs)
+                finally:
+                    self.spans.append((span_name, start, time.perf_counter_ns(), threading.get_ident()))
+            return traced
+        return decorator
+
+    # Context manager recording a span around a block
+    @contextlib.contextmanager
+    def span(self, name: str):
+        if not self.enabled:
+            yield
+            return
+        start = time.perf_counter_ns()
+        try:
+            yield
+        finally:
+            self.spans.append((name, start, time.perf_counter_ns(), threading.get_ident()))
+
+    # Writes the recorded spans as complete ("X") trace events, times are in microseconds
+    def export(self, path: str = None):
+        path = path or self.export_file
+        spans = list(self.spans)
+        thread_names = {thread.ident: thread.name for thread in threading.enumerate()}
+        events = [
+            {"name": name, "cat": name.split(".")[0], "ph": "X", "ts": start / 1000, "dur": (end - start) / 1000, "pid": os.getpid(), "tid": thread_id}
+            for name, start, end, thread_id in spans
+        ]
+        events.extend(
+            {"name": "thread_name", "ph": "M", "pid": os.getpid(), "tid": thread_id, "args": {"name": thread_names.get(thread_id, str(thread_id))}}
+            for thread_id in {span[3] for span in spans}
+        )
+        with open(f"{path}.tmp", "w") as trace_file:
+            json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, trace_file)
+        os.replace(f"{path}.tmp", path)
+        print(f"Exported {len(spans)} trace spans to {path}")
+
+
+# Used by the decorators below, enabled with --trace
+tracer = Tracer()
 
 
 # https://www.no-copyright-music.com/
@@ -21,7 +115,19 @@ from PIL import Image, ImageTk, ImageDraw, ImageOps  # pip install pillow
 
 # Main app that runs including screen management, data handling, etc.
 class RecollectApp:
-    def __init__(self, root: tk.Tk):
+    # Account score changes use the score relative to "easy mode", and curves of the difference for loss and gain
+    DIFFICULTY_SCORE_DIVISORS = {"easy": 1, "normal": 2, "hard": 4}  # Hard should be 4 times harder than easy
+    SCORE_LOSS_CURVE = 0.25  # Use curve y=0.25x for loss
+    SCORE_GAIN_CURVE = 0.5  # Use curve y=0.5x for gain
+    FONT_FILES = ("assets/fonts/Poppins-Bold.ttf", "assets/fonts/Poppins-Regular.ttf")
+    # Matching Tiles board size (rows, columns) for each difficulty, up to TileBoard.MAX_SIZE
+    BOARD_SIZES = {
+        "easy": (4, 4),
+        "normal": (4, 5),
+        "hard": (5, 6)
+    }
+
+    def __init__(self, root: tk.Tk, data_file: str = "data.json", profile=None):
         # Set up root window
         self.root = root
         self.root.title("Recollect")
@@ -29,14 +135,24 @@ class RecollectApp:
         self.root.minsize(750, 563)
         self.username = None
 
-        pygame.init()
-        pygame.mixer.init()
-        self.MUSIC_END_EVENT = pygame.USEREVENT + 1
-        pygame.mixer.music.set_endevent(self.MUSIC_END_EVENT)
-        self.music_playing = None
-        self.hidden_music = []
+        self.music_playing = None  # Updated by the audio service when the music changes
+        self.music_listeners: dict = {}  # Screen -> function called when the music changes
+        self.hidden_music = []  # Kept in the order tracks were hidden, the library has them as a set
+        self.assets = AssetManifest()  # Assets are looked up in the manifest instead of listing directories
+        self.music_library = MusicLibrary(self.assets)
+        self.tiles = TileLibrary(self.assets)
 
-        self.data_file = "data.json"
+        self.data_file = data_file
+        self.data = None  # Contents of the data file, loaded once
+
+        # Runs slow work in small slices between events
+        self.scheduler = TaskScheduler(self.root)
+        self.root.protocol("WM_DELETE_WINDOW", self.on_close)
+        self.root.bind("<KeyPress-F12>", self.on_export_trace, add="+")
+        self.root.bind("<KeyPress-F11>", lambda e: self.resources.report(), add="+")
+
+        # Tracks the images kept by each screen, released when the screen is destroyed
+        self.resources = ResourceRegistry(self.root)
 
         # Themes
         self.themes = {
@@ -74,17 +190,33 @@ class RecollectApp:
         self.games = {
             "Matching Tiles": Games.MatchingTiles
         }
-
         # Options
 
         # Volume
         self.volume = tk.IntVar(value=50)
         self.last_volume = 50
 
+        # Sound effects and music are played by their own thread, started when audio is first used
+        self.audio = AudioService(self.root, self.music_library, self.volume.get(), self.on_music_change)
+        self.volume.trace_add("write", self.on_volume_change)  # Volume changes are sent to the audio thread from here only
+
+        # Tiles and music added or removed by content authors are picked up while the app runs, a bundle never changes
+        self.asset_listeners: dict = {}  # Owner -> function called with the changed folder and paths
+        self.asset_watcher = None
+        if self.assets.bundle is None:
+            self.asset_watcher = AssetWatcher(self.root, self.assets, self.on_assets_changed)
+            self.asset_watcher.start()
+
         # Current theme
         self.theme = list(self.themes.keys())[0]
         self.theme_data = self.themes[self.theme]
 
+        # Builds the next screen's images and decks while the current screen is idle
+        self.prefetcher = ScreenPrefetcher(self)
+        self.last_difficulty = None  # Decks for the last played difficulty are prefetched first
+        self.deal_seed = None  # Every game deals the board of this seed if set, e.g. to reproduce a game from its history
+        self.recording_directory = None  # Input of each game is recorded into this directory if set
+
         """
         user_data_template = {
             "password": None,
@@ -99,21 +231,26 @@ class RecollectApp:
         self.defaultFont = tk_font.nametofont("TkDefaultFont")
         self.defaultFont.configure(family="Calibri")
 
+        # Keyboard shortcuts, installed once on the root window
+        self.input = InputDispatcher(self.root)
+
+        if profile is not None:
+            profile.mark("app state")
+
         # Screen management
         self.current_screen = None
         # Show homepage
         self.show_screen(Screens.Homepage(self.root, self).get())
-
-        # Main window loop
-        self.root.mainloop()
+        if profile is not None:
+            profile.mark("homepage built")
 
     # Get background image
     def get_background(self) -> Image:
-        return Image.open(f"assets/{self.theme_data['img_bg']}")
+        return self.prefetcher.get_image(f"assets/{self.theme_data['img_bg']}")
 
     # Get blob image and resize and rotate
     def get_blob(self, width, height, angle) -> (ImageTk.PhotoImage, Image):
-        blob = Image.open(f"assets/{self.theme_data['img_blob']}").rotate(angle, Image.NEAREST, expand=True).resize((width, height), 1)
+        blob = self.prefetcher.get_image(f"assets/{self.theme_data['img_blob']}").rotate(angle, Image.NEAREST, expand=True).resize((width, height), 1)
         return ImageTk.PhotoImage(blob)
 
     # Get coordinates relative to the root window
@@ -138,23 +275,27 @@ class RecollectApp:
     def check_if_data_file_exists(self):
         # Check if data file exists
         if not os.path.exists(self.data_file):
-            with open("data.json", "w+") as data_file:
+            with open(self.data_file, "w+") as data_file:
                 json.dump({"users": {}}, data_file)
 
+    # Loads the data file into memory once, later reads and writes use the loaded data
+    def load_data(self):
+        if self.data is None:
+            self.check_if_data_file_exists()
+            with open(self.data_file, "r") as data_file:
+                self.data = json.load(data_file)
+        return self.data
+
     # Gets user data from username
+    @tracer.trace()
     def get_user_data(self, username):
-        self.check_if_data_file_exists()
-
         try:
-            with open("data.json", "r+") as data_file:
-                data = json.load(data_file)
-                return data['users'][username]
+            return self.load_data()['users'][username]
         except KeyError:
             return None
 
     # Add new user data on account creation
     def add_new_user_data(self, username, password):
-        self.check_if_data_file_exists()
         user_data = {
             "password": self.encrypt_password(password),
             "options": {
@@ -165,16 +306,120 @@ class RecollectApp:
         self.rewrite_user_data(username, user_data)
         return user_data
 
-    # Delete and rewrite the user data
+    # Delete and rewrite the user data, the file is written later by the scheduler
+    @tracer.trace()
     def rewrite_user_data(self, username, user_data):
-        self.check_if_data_file_exists()
+        self.load_data()['users'][username] = user_data
+        self.scheduler.add(self.write_data_task(), TaskScheduler.PERSISTENCE, key="write_data")  # Replaces a write that has not started
 
-        with open("data.json", "r+") as data_file:
-            data = json.load(data_file)
-            data['users'][username] = user_data
-            data_file.seek(0)
-            data_file.truncate()
-            json.dump(data, data_file, indent=2)
+    # Writes the loaded data to the data file, tries once more before showing the error
+    def write_data_task(self):
+        yield  # Runs after more important work waiting in the scheduler
+        try:
+            self.write_data()
+        except (OSError, ValueError, TypeError) as error:
+            print(f"Could not save data, trying again: {error}")
+            yield
+            try:
+                self.write_data()
+            except (OSError, ValueError, TypeError) as error:
+                tk_messagebox.showerror("Recollect", f"Your data could not be saved to {self.data_file}:\n{error}")
+                raise
+
+    def write_data(self):
+        data = json.dumps(self.data, indent=2)
+        try:
+            with open(f"{self.data_file}.tmp", "w") as data_file:
+                data_file.write(data)
+            os.replace(f"{self.data_file}.tmp", self.data_file)  # Data file is never left half written
+        except OSError:
+            with contextlib.suppress(OSError):
+                os.remove(f"{self.data_file}.tmp")
+            raise
+
+    # Exports the recorded trace on F12
+    def on_export_trace(self, _=None):
+        if tracer.enabled:
+            tracer.export()
+        else:
+            print("Tracing is disabled, start with --trace to record spans")
+
+    # Finishes writing data before closing the window
+    def on_close(self):
+        try:
+            self.scheduler.finish(TaskScheduler.PERSISTENCE)
+        except (OSError, ValueError, TypeError):  # The error was shown, the window still closes
+            pass
+        if tracer.enabled:
+            tracer.export()
+        if self.asset_watcher is not None:
+            self.asset_watcher.stop()
+        self.audio.shutdown()
+        self.root.destroy()
+
+    # Applies a folder changed on disk, only the caches of the changed files are dropped
+    def on_assets_changed(self, folder: str, entries, changed_names):
+        changed = self.assets.update_folder(folder, entries, changed_names)
+        if not changed:
+            return
+        print(f"Assets changed in \"{folder}\": {len(changed)} files")
+        if folder.startswith(f"{self.assets.directory}/matching_tiles"):
+            self.tiles.refresh(folder, changed)
+            self.prefetcher.forget(changed)
+        elif folder.startswith(f"{self.assets.directory}/music"):
+            self.audio.update_tracks(self.assets.tracks())
+            self.audio.check_audio_cache(changed)
+        for listener in list(self.asset_listeners.values()):
+            listener(folder, changed)
+
+    # Adds support for custom fonts, through GDI on Windows which is much faster than importing pyglet
+    @classmethod
+    def register_fonts(cls):
+        for path in cls.FONT_FILES:
+            if windll is not None and windll.gdi32.AddFontResourceExW(os.path.abspath(path), 0x10, 0):  # 0x10 is FR_PRIVATE, only for this process
+                continue
+            import pyglet  # pip install pyglet, only imported when GDI cannot be used
+            pyglet.options["win32_gdi_font"] = True
+            pyglet.font.add_file(path)
+
+    # Waits for the fonts registered in the background, then redraws the text already shown in fallback fonts
+    def watch_fonts(self, font_thread: threading.Thread, profile=None):
+        if font_thread.is_alive():
+            self.root.after(20, lambda: self.watch_fonts(font_thread, profile))
+            return
+        if profile is not None:
+            profile.mark_background("fonts registered")
+        # Tk keeps a resolved font while any widget uses it, so every font is swapped out before it is set again
+        fonts = []
+        self.swap_fonts(self.root, fonts)
+        for set_font, font in fonts:
+            set_font(font)
+        for font_name in tk_font.names(self.root):
+            font = tk_font.nametofont(font_name)
+            font.configure(family=font.cget("family"))
+
+    def swap_fonts(self, widget, fonts: list):
+        with contextlib.suppress(tk.TclError):
+            if "font" in widget.keys():
+                fonts.append((lambda font, widget=widget: widget.configure(font=font), widget.cget("font")))
+                widget.configure(font="TkDefaultFont")
+            if isinstance(widget, tk.Canvas):
+                for item in widget.find_withtag("all"):
+                    if widget.type(item) == "text":
+                        fonts.append((lambda font, widget=widget, item=item: widget.itemconfigure(item, font=font), widget.itemcget(item, "font")))
+                        widget.itemconfigure(item, font="TkDefaultFont")
+        for child in widget.winfo_children():
+            self.swap_fonts(child, fonts)
+
+    # Called by the audio service when the music changes, None when it stops
+    def on_music_change(self, track):
+        self.music_playing = track
+        for callback in list(self.music_listeners.values()):
+            callback()
+
+    def on_volume_change(self, *_):
+        with contextlib.suppress(tk.TclError):  # Volume can be empty while it is being changed
+            self.audio.set_volume(self.volume.get())
 
     # Apply changes on sign in for a user
     def apply_user_options(self, user_data):
@@ -190,6 +435,7 @@ class RecollectApp:
             print("User has no theme data, continuing with existing options")
         try:
             self.hidden_music = user_data['options']['hidden_music']
+            self.audio.set_hidden_music(self.hidden_music)
         except KeyError:
             print("User has no music data, continuing with existing options")
 
@@ -208,7 +454,7 @@ class RecollectApp:
         return user_data['game_data'][game]
 
     # Change the overall score for a user after a game
-    def change_game_user_data(self, username, game, game_data, difficulty, score):
+    def change_game_user_data(self, username, game, game_data, difficulty, score, result: dict = None):
         user_data = self.get_user_data(username)
         if user_data is None:
             return  # Cannot save score as not logged in, should not happen
@@ -217,19 +463,9 @@ class RecollectApp:
         if "overall_score" not in list(user_data.keys()):
             user_data['overall_score'] = 0
         original_overall_score = user_data['overall_score']
-        # Get score relative to "easy mode", since user may be penalised for playing easy mode after hard.
-        relative_score = score
-        if difficulty == "hard":
-            relative_score = score / 4  # Hard should be 4 times harder than easy
-        elif difficulty == "normal":
-            relative_score = score / 2  # Normal should be 2 times harder than easy
-        # Change overall score based on 2 curves
-        difference = relative_score - original_overall_score
-        print(f"Difference in scores: {difference}")
-        if difference < 0:  # If score is worse
-            overall_change = round(0.25 * difference, 1)  # Use curve y=0.25x for loss
-        else:  # If score is better
-            overall_change = round(0.5 * difference, 1)  # Use curve y=0.5x for gain
+        if "rating_start" not in user_data:  # Ratings are replayed from here, games before the history was kept are not stored
+            user_data['rating_start'] = original_overall_score
+        overall_change = self.overall_score_change(original_overall_score, score, difficulty)
         print(f"Change of {overall_change} score")
         user_data['overall_score'] = round(user_data['overall_score'] + overall_change, 1)
 
@@ -241,10 +477,28 @@ class RecollectApp:
         # Write game data
         user_data['game_data'][game] = game_data
 
+        # Statistics are updated with each result, existing accounts are counted from their history once
+        if "statistics" not in user_data:
+            GameStatistics.rebuild(user_data)
+        else:
+            GameStatistics.add_result(user_data, game, result or {"time": round(time.time()), "difficulty": difficulty, "score": score})
+
         self.rewrite_user_data(username, user_data)
 
         return overall_change, original_overall_score, user_data['overall_score']
 
+    # Calculates the change of the overall score after a game, also used by the simulation
+    # The divisors and curves can be changed, e.g. to recompute ratings from the game history with other constants
+    @classmethod
+    def overall_score_change(cls, overall_score, score, difficulty, divisors: dict = None, loss_curve: float = None, gain_curve: float = None) -> float:
+        # Get score relative to "easy mode", since user may be penalised for playing easy mode after hard.
+        relative_score = score / (divisors or cls.DIFFICULTY_SCORE_DIVISORS)[difficulty]
+        # Change overall score based on 2 curves
+        difference = relative_score - overall_score
+        if difference < 0:  # If score is worse
+            return round((cls.SCORE_LOSS_CURVE if loss_curve is None else loss_curve) * difference, 1)
+        return round((cls.SCORE_GAIN_CURVE if gain_curve is None else gain_curve) * difference, 1)
+
     # Destroy the old screen and show the new screen
     def show_screen(self, screen: tk.Canvas):
         if self.current_screen is not None:
@@ -284,6 +538,373 @@ class RecollectApp:
         return image
 
 
+# Routes key releases from the root window through a stack of keymaps, one for each screen being shown
+class InputDispatcher:
+    def __init__(self, root: tk.Tk, debounce_ms: int = 150):
+        self.root = root
+        self.debounce = debounce_ms / 1000  # Releases of the same key closer than this are ignored
+        self.stack: list = []  # [owner, keymap, modal] for each shown screen, last is the top screen
+        self.last_handled: dict = {}  # Key -> time it was last handled
+        self.pending_release = None  # (key, event time, after id) of a release waiting to be handled
+
+        self.root.bind("<KeyPress>", self.on_key_press, add="+")
+        self.root.bind("<KeyRelease>", self.on_key_release, add="+")
+
+    # Puts a keymap at the top of the stack, a modal keymap stops keys reaching the keymaps below
+    def push(self, owner, keymap: dict, modal: bool = True):
+        self.remove(owner)
+        self.stack.append([owner, keymap, modal])
+
+    # Replaces the keymap of an owner if it is in the stack
+    def set_keymap(self, owner, keymap: dict):
+        for entry in self.stack:
+            if entry[0] is owner:
+                entry[1] = keymap
+
+    # Removes the keymap of an owner
+    def remove(self, owner):
+        self.stack = [entry for entry in self.stack if entry[0] is not owner]
+
+    def on_key_press(self, event):
+        key = event.keysym.lower()
+        # Auto-repeat on X11 sends a release and press at the same time, so the release is ignored
+        if self.pending_release is not None and self.pending_release[0] == key and self.pending_release[1] == event.time:
+            self.root.after_cancel(self.pending_release[2])
+            self.pending_release = None
+
+    # Waits until idle before handling the release, so an auto-repeat press can cancel it
+    def on_key_release(self, event):
+        if self.pending_release is not None:  # Another key is waiting, handle it first
+            key, _, after_id = self.pending_release
+            self.root.after_cancel(after_id)
+            self.on_pending_release(key)
+        key = event.keysym.lower()
+        self.pending_release = (key, event.time, self.root.after_idle(lambda: self.on_pending_release(key)))
+
+    def on_pending_release(self, key):
+        self.pending_release = None
+        self.dispatch(key)
+
+    # Calls the callback for a key from the top keymap that has it
+    @tracer.trace()
+    def dispatch(self, key):
+        now = time.perf_counter()
+        if now - self.last_handled.get(key, -self.debounce) < self.debounce:  # Debounce
+            return
+        for owner, keymap, modal in reversed(self.stack):
+            callback = keymap.get(key)
+            if callback is not None:
+                self.last_handled[key] = now
+                callback()
+                return
+            if modal:
+                return
+
+
+# A generator task in the scheduler, each next() should be a small piece of work
+class ScheduledTask:
+    def __init__(self, generator, priority: int, owner=None, key=None):
+        self.generator = generator
+        self.priority = priority
+        self.owner = owner  # Task is cancelled when the owner screen is hidden
+        self.key = key  # Adding a task with the same key replaces this task
+        self.name = getattr(generator, "__qualname__", "task")  # Name of the task's trace spans
+        self.cancelled = False
+        self.finished = False
+
+
+# Runs generator tasks in slices of a per-frame time budget, higher priority tasks first
+class TaskScheduler:
+    # Priorities, lower runs first
+    INPUT_FEEDBACK = 0
+    VISIBLE_REDRAW = 1
+    PREFETCH = 2
+    PERSISTENCE = 3
+
+    def __init__(self, root: tk.Tk, frame_budget_ms: int = 8):
+        self.root = root
+        self.frame_budget = frame_budget_ms / 1000
+        self.queue: list = []  # Heap of (priority, order added, task)
+        self.order = itertools.count()
+        self.keys: dict = {}  # Key -> task waiting with that key
+        self.run_id = None
+
+    # Adds a generator task, returns the task so it can be cancelled
+    def add(self, generator, priority: int, owner=None, key=None) -> ScheduledTask:
+        if key is not None and key in self.keys:
+            self.keys[key].cancelled = True
+        task = ScheduledTask(generator, priority, owner, key)
+        if key is not None:
+            self.keys[key] = task
+        heapq.heappush(self.queue, (priority, next(self.order), task))
+        if self.run_id is None:
+            self.run_id = self.root.after_idle(self.run)
+        return task
+
+    # Checks if a task with the key is waiting
+    def is_pending(self, key) -> bool:
+        return key in self.keys
+
+    # Checks if no task of a priority (or higher priorities) is waiting
+    def is_idle(self, priority: int = PERSISTENCE) -> bool:
+        return not any(task.priority <= priority and not task.cancelled for _, _, task in self.queue)
+
+    # Cancels all tasks of an owner (or a single task)
+    def cancel(self, owner=None, task: ScheduledTask = None):
+        for _, _, queued_task in self.queue:
+            if (owner is not None and queued_task.owner is owner) or queued_task is task:
+                queued_task.cancelled = True
+                self.forget_key(queued_task)
+
+    def forget_key(self, task: ScheduledTask):
+        if task.key is not None and self.keys.get(task.key) is task:
+            del self.keys[task.key]
+
+    # Runs one step of a task, returns False if the task is done
+    def step(self, task: ScheduledTask) -> bool:
+        try:
+            if tracer.enabled:
+                with tracer.span(task.name):
+                    next(task.generator)
+            else:
+                next(task.generator)
+            return True
+        except StopIteration:
+            task.finished = True
+        except (tk.TclError, OSError, ValueError) as error:  # A widget was destroyed or a file could not be used, drop the task
+            if task.priority >= self.PERSISTENCE:  # A failed save is never dropped silently
+                task.cancelled = True
+                self.forget_key(task)
+                raise
+            print(f"Scheduled task failed: {error}")
+        self.forget_key(task)
+        return False
+
+    # Runs tasks until the frame budget is used, then lets Tk handle events and draw before the next slice
+    def run(self):
+        self.run_id = None
+        deadline = time.perf_counter() + self.frame_budget
+        try:
+            while self.queue and time.perf_counter() < deadline:
+                task = self.queue[0][2]
+                if task.cancelled or not self.step(task):
+                    heapq.heappop(self.queue)
+        finally:  # The other tasks still run after a failed save
+            if self.queue:
+                self.run_id = self.root.after(1, self.run)
+
+    # Runs every task of a priority (and higher priorities) straight away, e.g. to save data before closing
+    def finish(self, priority: int = PERSISTENCE):
+        remaining = []
+        for entry in sorted(self.queue):
+            task = entry[2]
+            if task.priority > priority:
+                remaining.append(entry)
+                continue
+            while not task.cancelled and self.step(task):
+                pass
+        self.queue = remaining
+        heapq.heapify(self.queue)
+
+
+# Tracks the Tk and PIL images kept alive by each owner (screen or cache) with estimated sizes
+# Images of a screen are released when it is destroyed, objects still referenced afterwards are reported as leaks
+class ResourceRegistry:
+    BYTES_PER_PIXEL = {"1": 1, "L": 1, "P": 1, "I;16": 2}  # PIL modes not stored as 4 bytes per pixel
+
+    def __init__(self, root: tk.Tk):
+        self.root = root
+        self.owners: dict = {}  # id(owner) -> {"name", "owner" (weak reference), "images": {(kind, key): (weak reference, bytes)}}
+        self.released: list = []  # (owner name, kind, weak reference) of released owners and images, alive ones are leaks
+
+    # Estimated memory used by the pixels of a Tk or PIL image
+    @classmethod
+    def image_bytes(cls, image) -> int:
+        if isinstance(image, ImageTk.PhotoImage):
+            return image.width() * image.height() * 4  # Tk photos are stored as RGBA
+        return image.width * image.height * cls.BYTES_PER_PIXEL.get(image.mode, 4)
+
+    # Gets the record of an owner, made on first use
+    def record(self, owner) -> dict:
+        key = id(owner)
+        if key not in self.owners:
+            self.owners[key] = {"name": type(owner).__qualname__, "owner": weakref.ref(owner), "images": {}}
+        return self.owners[key]
+
+    # Records an image kept by an owner, an image with the same kind and key replaces the previous one
+    def track(self, owner, image, kind: str, key=None):
+        self.record(owner)["images"][(kind, key)] = (weakref.ref(image), self.image_bytes(image))
+        return image
+
+    # Stops recording an image, e.g. when a cache evicts it
+    def untrack(self, owner, kind: str, key=None):
+        record = self.owners.get(id(owner))
+        if record is not None:
+            record["images"].pop((kind, key), None)
+
+    # Frees the images of an owner straight away instead of when the garbage collector finds them
+    def release(self, owner):
+        record = self.owners.pop(id(owner), None)
+        if record is None:
+            return
+        self.released = [entry for entry in self.released if entry[2]() is not None]  # Forgets objects that were freed
+        self.released.append((record["name"], "screen", record["owner"]))
+        for (kind, _), (reference, _) in record["images"].items():
+            image = reference()
+            if image is None:
+                continue
+            if isinstance(image, ImageTk.PhotoImage):
+                with contextlib.suppress(tk.TclError):
+                    self.root.tk.call("image", "delete", str(image))
+            else:
+                image.close()
+            self.released.append((record["name"], kind, reference))
+
+    # Prints the images and estimated memory of each owner, and the released objects that are still referenced
+    def report(self):
+        gc.collect()  # Only objects kept by references count as leaks
+        print("Images by owner:")
+        total = 0
+        for record in self.owners.values():
+            images = [(kind, size) for (kind, _), (reference, size) in record["images"].items() if reference() is not None]
+            owner_bytes = sum(size for _, size in images)
+            total += owner_bytes
+            print(f"  {record['name']:<32} {len(images):>5} images {owner_bytes / 1024:>10.1f} KB")
+            for kind, count in collections.Counter(kind for kind, _ in images).items():
+                print(f"    {kind:<30} {count:>5}")
+        print(f"  {'Total':<32} {'':>12} {total / 1024:>10.1f} KB")
+
+        leaks = collections.Counter((name, kind) for name, kind, reference in self.released if reference() is not None)
+        if leaks:
+            print("Outlived their screen:")
+            for (name, kind), count in leaks.items():
+                print(f"  {name:<32} {kind:<24} {count:>5}")
+        else:
+            print("No objects outlived their screen")
+
+
+# Builds the expensive parts of the next likely screen (decoded images, tile decks) in idle time of the current screen
+class ScreenPrefetcher:
+    MAX_CACHED_IMAGES = 256
+    QUEUED_DECKS = 2  # Decks dealt ahead for each difficulty
+
+    def __init__(self, app: RecollectApp):
+        self.app = app
+        # Least recently used caches, keyed by (path, size, contain, radius)
+        self.images = collections.OrderedDict()  # Decoded PIL images
+        self.photo_images = collections.OrderedDict()  # Tk images made from the decoded images
+        self.decks: dict = {}  # (difficulty, rows, columns) -> queue of dealt (seed, list of photos), used by the next games
+
+    # Adds an item to a cache, removing the least recently used item if full
+    def cache(self, cache: collections.OrderedDict, kind: str, key, value):
+        cache[key] = value
+        self.app.resources.track(self, value, kind, key)
+        if len(cache) > self.MAX_CACHED_IMAGES:
+            evicted_key, _ = cache.popitem(last=False)
+            self.app.resources.untrack(self, kind, evicted_key)  # May still be used by a screen, so it is not released
+        return value
+
+    # Gets a decoded RGBA image, resized (or contained to fit in size) and with rounded corners if given
+    def get_image(self, path: str, size: tuple = None, contain: bool = False, radius: int = None) -> Image:
+        key = (path, size, contain, radius)
+        if key in self.images:
+            self.images.move_to_end(key)
+            return self.images[key]
+
+        image = Image.open(self.app.tiles.open(self.app.assets.open(path))).convert("RGBA")
+        if size is not None:
+            image = ImageOps.contain(image, size) if contain else image.resize(size)
+        if radius is not None:
+            image = self.app.add_corners(image, radius)
+        return self.cache(self.images, "cached image", key, image)
+
+    # Gets a Tk image of a decoded image, images must not be changed since they are shared between screens
+    def get_photo_image(self, path: str, size: tuple = None, contain: bool = False, radius: int = None) -> ImageTk.PhotoImage:
+        key = (path, size, contain, radius)
+        if key in self.photo_images:
+            self.photo_images.move_to_end(key)
+            return self.photo_images[key]
+        return self.cache(self.photo_images, "cached photo", key, ImageTk.PhotoImage(self.get_image(path, size, contain, radius)))
+
+    # Adds a job (generator) that runs in the scheduler after input and redraw work
+    def prefetch(self, job):
+        self.app.scheduler.add(job, TaskScheduler.PREFETCH)
+
+    # Job to make Tk images, each spec is (path, size, contain, radius)
+    def photo_images_job(self, specs: list):
+        for spec in specs:
+            self.get_photo_image(*spec)
+            yield
+
+    # Job to deal decks for a difficulty until its queue is full
+    # Tile images are only decoded once the game starts, so browsing never reads image data of large tile packs
+    def deck_job(self, difficulty: str):
+        rows, columns = self.app.BOARD_SIZES[difficulty]
+        decks = self.decks.setdefault((difficulty, rows, columns), collections.deque())
+        while len(decks) < self.QUEUED_DECKS:
+            decks.append(Games.MatchingTiles.deal_deck(self.app.tiles.categories(), difficulty, rows, columns))
+            yield
+
+    # Drops cached images and queued decks of changed files, a changed zip pack changes all of its tiles
+    def forget(self, paths: set):
+        # A changed zip file or pack index changes every tile of its pack, the tiles of an indexed folder are not listed
+        packs = {f"{path}/" for path in paths if path.lower().endswith(".zip")}
+        packs.update(f"{os.path.dirname(path)}/" for path in paths if os.path.basename(path) == TilePack.INDEX_FILE)
+        packs = tuple(packs)
+
+        def changed(path):
+            return path in paths or (bool(packs) and path.startswith(packs))
+
+        for cache, kind in ((self.images, "cached image"), (self.photo_images, "cached photo")):
+            for key in [key for key in cache if changed(key[0])]:
+                del cache[key]
+                self.app.resources.untrack(self, kind, key)
+        for decks in self.decks.values():
+            for deck in [deck for deck in decks if any(changed(path) for path in deck[1])]:
+                decks.remove(deck)
+
+    # Gets (and removes) the next prefetched (seed, deck) for a board, None if not prefetched, then deals another
+    def take_deck(self, difficulty: str, rows: int, columns: int):
+        decks = self.decks.get((difficulty, rows, columns))
+        if not decks:
+            return None
+        deck = decks.popleft()
+        self.prefetch_deck(difficulty)
+        return deck
+
+    # Job to decode PIL images, each spec is (path, size, contain, radius)
+    def images_job(self, specs: list):
+        for spec in specs:
+            self.get_image(*spec)
+            yield
+
+    # Prefetches the images used by the game selection screen
+    def prefetch_game_selection(self):
+        self.prefetch(self.images_job([("assets/logo_slash.png", (230, 90), False, None)]))
+        self.prefetch(self.photo_images_job([
+            ("assets/icons/settings.png", (35, 35), False, None),
+            ("assets/matching_tiles/icon.png", (130, 130), False, 9),
+            (f"assets/{self.app.theme_data['img_bg']}", (130, 130), False, 9)
+        ]))
+
+    # Prefetches the images used by the pause menu
+    def prefetch_pause_menu(self):
+        self.prefetch(self.photo_images_job([
+            (f"assets/icons/{icon}.png", (25, 25), False, None)
+            for icon in ["skip", "hide", "mute", "unmute"]
+        ]))
+
+    # Prefetches the decks for every difficulty, starting with the last played difficulty
+    def prefetch_decks(self):
+        difficulties = sorted(self.app.BOARD_SIZES, key=lambda difficulty: difficulty != self.app.last_difficulty)
+        for difficulty in difficulties:
+            self.prefetch_deck(difficulty)
+
+    def prefetch_deck(self, difficulty: str):
+        if not self.app.scheduler.is_pending(("deck", difficulty)):  # The running job deals until the queue is full
+            self.app.scheduler.add(self.deck_job(difficulty), TaskScheduler.PREFETCH, key=("deck", difficulty))
+
+
 # Creates a base screen with background and blobs which can be implemented in screens
 class BaseScreen:
     def __init__(self, root: tk.Tk, app: RecollectApp, has_background: bool = True, has_blobs: bool = True):
@@ -305,49 +926,88 @@ class BaseScreen:
 
         self.transparent_images = []
         self.widgets = []
+        self.keymap: dict = {}  # Key (lowercase keysym) -> callback, handled by the app's input dispatcher
 
     # Should be called after initialisation is finished
     def finish_init(self):
         self.setup_keypress_listener()  # Sets up listener for key releases
-        self.canvas.update_idletasks()  # Updates canvas coordinates size
+        self.prefetch_next_screen()  # Runs once the screen is idle
+        # Tasks of a hidden screen are not needed anymore
+        self.redraw_when_shown = False
+        self.canvas.bind("<Unmap>", self.on_hidden, add="+")
+        self.canvas.bind("<Map>", self.on_shown, add="+")
+        self.canvas.bind("<Destroy>", lambda e: self.app.scheduler.cancel(self), add="+")
 
         if self.has_background:
-            self.update_transparent_images()
-            self.update_widgets_background()
-
-            self.canvas.bind("<Configure>", self.update_background, add="+")
-            self.canvas.bind("<Configure>", self.update_transparent_images, add="+")
-            self.canvas.bind("<Configure>", self.update_widgets_background, add="+")
-        if self.has_blobs:
-            self.canvas.bind("<Configure>", self.update_blobs, add="+")
+            self.schedule_redraw(resized=False)
+        if self.has_background or self.has_blobs:
+            self.canvas.bind("<Configure>", self.schedule_redraw, add="+")
+
+    # Cancels the screen's tasks, a cancelled redraw is done again when the screen is shown
+    def on_hidden(self, _=None):
+        self.redraw_when_shown = self.redraw_when_shown or self.app.scheduler.is_pending((self, "redraw"))
+        self.app.scheduler.cancel(self)
+
+    def on_shown(self, _=None):
+        if self.redraw_when_shown:
+            self.redraw_when_shown = False
+            self.schedule_redraw()
+
+    # Redraws the background, blobs and transparent widgets in the scheduler, many resize events only redraw once
+    def schedule_redraw(self, _=None, resized=True):
+        self.app.scheduler.add(self.redraw_task(resized), TaskScheduler.VISIBLE_REDRAW, owner=self, key=(self, "redraw"))
+
+    def redraw_task(self, resized=True):
+        yield  # Waits for the resize events that are still queued
+        if resized and self.has_background:
+            self.update_background()
+            yield
+        if resized and self.has_blobs:
+            self.update_blobs()
+            yield
+        if self.has_background:
+            yield from self.transparent_images_task()
+            yield from self.widgets_background_task()
 
     # Returns the screen
     def get(self):
         return self.canvas
 
+    # Routes key releases to the keymap while the screen is shown, the keymap is dropped when hidden or destroyed
     def setup_keypress_listener(self):
-        self.root.bind("<KeyRelease>", lambda e: self.on_keyboard_press(e.keysym.lower()))
-
-    def on_keyboard_press(self, key):
+        self.canvas.bind("<Map>", lambda e: self.app.input.push(self, self.keymap), add="+")
+        self.canvas.bind("<Unmap>", lambda e: self.app.input.remove(self), add="+")
+        self.canvas.bind("<Destroy>", lambda e: self.app.input.remove(self), add="+")
+        self.canvas.bind("<Destroy>", lambda e: self.app.resources.release(self), add="+")
+
+    # Changes the keymap, e.g. when part of the screen changes
+    def set_keymap(self, keymap: dict):
+        self.keymap = keymap
+        self.app.input.set_keymap(self, keymap)
+
+    # Prefetches the parts of the screen most likely to be shown next
+    def prefetch_next_screen(self):
         pass
 
     # Updates the background
+    @tracer.trace()
     def update_background(self, _=None):
         self.canvas.delete("background")
         # Adjust background stretching etc.
         width, height = self.root.winfo_width(), self.root.winfo_height()
         del self.current_background
-        self.current_background = self.app.get_background().resize((width, height), 1)
-        self.canvas.bg_image = ImageTk.PhotoImage(self.current_background)  # Must be in class scope
+        self.current_background = self.app.resources.track(self, self.app.get_background().resize((width, height), 1), "background")
+        self.canvas.bg_image = self.app.resources.track(self, ImageTk.PhotoImage(self.current_background), "background photo")  # Must be in class scope
         self.canvas.create_image(0, 0, image=self.canvas.bg_image, anchor="nw", tags="background")  # Don't make one-liner
 
     # Places blob at coordinates
     def place_blob(self, size: int, angle: int | float, x: int | float, y: int | float, anchor):
-        blob_tk = self.app.get_blob(size, size, angle)
+        blob_tk = self.app.resources.track(self, self.app.get_blob(size, size, angle), "blob", len(self._blobs_tk))
         self._blobs_tk.append(blob_tk)  # Must be in class scope
         self.canvas.create_image(x, y, image=self._blobs_tk[-1], anchor=anchor, tags="blob")  # Don't make one-liner
 
     # Update location/size of blobs
+    @tracer.trace()
     def update_blobs(self, _=None):
         self.canvas.delete("blob")
         # Clears previous blobs from memory
@@ -361,31 +1021,43 @@ class BaseScreen:
 
     # Updates the background of all transparent images
     def update_transparent_images(self, _=None):
+        for _ in self.transparent_images_task():
+            pass
+
+    # Updates the background of the transparent images, one image each step
+    def transparent_images_task(self):
         if self.has_background is False or self.current_background is None:  # No background or current background not showing
             return
 
         for transparent_image_data in self.transparent_images:
-            image_label = transparent_image_data['label']
-            image = transparent_image_data['raw_image']
-
-            transparent_image_data['updated_image'] = ImageTk.PhotoImage(image)  # Don't make one-liner
-            image_label.config(image=transparent_image_data['updated_image'])  # Used to remeasure image coordinates
-
-            # Adjust label background
-            self.canvas.update_idletasks()  # Updates coordinates
-            x1, y1 = image_label.winfo_x(), image_label.winfo_y()
-            x2, y2 = x1 + image_label.winfo_width(), y1 + image_label.winfo_height()
-
-            background_at_bbox = self.current_background.crop((x1, y1, x2, y2))
-            # Merge background (RGB) and image (RGBA)
-            image_with_background = Image.new("RGBA", background_at_bbox.size)
-            image_with_background.paste(background_at_bbox, (0, 0))
-            image_with_background.paste(image, (0, 0), image)
-            transparent_image_data['updated_image'] = ImageTk.PhotoImage(image_with_background)
-            image_label.config(image=transparent_image_data['updated_image'])
+            with tracer.span("BaseScreen.update_transparent_images"):  # One span for each image, the task yields between them
+                image_label = transparent_image_data['label']
+                image = transparent_image_data['raw_image']
+
+                transparent_image_data['updated_image'] = ImageTk.PhotoImage(image)  # Don't make one-liner
+                image_label.config(image=transparent_image_data['updated_image'])  # Used to remeasure image coordinates
+
+                # Adjust label background
+                self.canvas.update_idletasks()  # Updates coordinates
+                x1, y1 = image_label.winfo_x(), image_label.winfo_y()
+                x2, y2 = x1 + image_label.winfo_width(), y1 + image_label.winfo_height()
+
+                background_at_bbox = self.current_background.crop((x1, y1, x2, y2))
+                # Merge background (RGB) and image (RGBA)
+                image_with_background = Image.new("RGBA", background_at_bbox.size)
+                image_with_background.paste(background_at_bbox, (0, 0))
+                image_with_background.paste(image, (0, 0), image)
+                transparent_image_data['updated_image'] = self.app.resources.track(self, ImageTk.PhotoImage(image_with_background), "transparent image", id(image_label))
+                image_label.config(image=transparent_image_data['updated_image'])
+            yield
 
     # Updates the background of all widgets that have some transparency
     def update_widgets_background(self, _=None, specific_widget=None):
+        for _ in self.widgets_background_task(specific_widget):
+            pass
+
+    # Updates the background of widgets, one widget each step
+    def widgets_background_task(self, specific_widget=None):
         if self.has_background is False or self.current_background is None:  # No background or current background not showing
             return
 
@@ -394,23 +1066,28 @@ class BaseScreen:
 
         update_widgets = self.widgets if specific_widget is None else [specific_widget]
         for widget in update_widgets:
-            x1, y1 = self.app.get_coordinates_relative_window(widget)
-            x2, y2 = x1 + widget.winfo_width(), y1 + widget.winfo_height()
+            if not widget.winfo_exists():  # May be destroyed between steps
+                continue
+            with tracer.span("BaseScreen.update_widgets_background"):  # One span for each widget
+                x1, y1 = self.app.get_coordinates_relative_window(widget)
+                x2, y2 = x1 + widget.winfo_width(), y1 + widget.winfo_height()
 
-            background_at_bbox = self.current_background.crop((x1, y1, x2, y2))
+                background_at_bbox = self.current_background.crop((x1, y1, x2, y2))
 
-            widget.bg_image = ImageTk.PhotoImage(background_at_bbox)
+                widget.bg_image = self.app.resources.track(self, ImageTk.PhotoImage(background_at_bbox), "widget background", id(widget))
 
-            if widget.__class__.__name__ in ["RoundedButton", "Canvas"]:
-                widget.create_image(0, 0, image=widget.bg_image, anchor="nw")
-            elif widget.__class__.__name__ == "Label":
-                widget.config(image=widget.bg_image, compound=tk.CENTER, bd=0, borderwidth=0, highlightthickness=0, relief="flat", padx=0, pady=0)
-            if widget.__class__.__name__ == "RoundedButton":
-                widget.generate_button()  # Remakes polygon and text
+                if widget.__class__.__name__ in ["RoundedButton", "Canvas"]:
+                    widget.create_image(0, 0, image=widget.bg_image, anchor="nw")
+                elif widget.__class__.__name__ == "Label":
+                    widget.config(image=widget.bg_image, compound=tk.CENTER, bd=0, borderwidth=0, highlightthickness=0, relief="flat", padx=0, pady=0)
+                if widget.__class__.__name__ == "RoundedButton":
+                    widget.generate_button()  # Remakes polygon and text
+            yield
 
     # Destroys the screen
     def destroy(self):
         self.canvas.unbind("<Configure>")
+        self.app.scheduler.cancel(self)
         del self
 
 
@@ -427,7 +1104,7 @@ class Screens:
             accessibility_info_label.pack(anchor="n", side=tk.RIGHT)
             self.widgets.append(accessibility_info_label)
 
-            logo_image = Image.open("assets/logo.png").convert("RGBA").resize((370, 121))  # Must be multiple of 935 x 306
+            logo_image = self.app.prefetcher.get_image("assets/logo.png", (370, 121))  # Must be multiple of 935 x 306
             logo_label = tk.Label(self.canvas, borderwidth=0, highlightthickness=0)
             image_data = {
                 "label": logo_label,
@@ -474,20 +1151,20 @@ class Screens:
                 button_hover_background=self.app.theme_data['btn_warn_hvr'], button_hover_foreground="#000000",
                 button_press_background=self.app.theme_data['btn_warn_prs'], button_press_foreground="#000000",
                 outline_colour=self.app.theme_data['outline'], outline_width=1,
-                command=lambda: root.destroy()
+                command=self.app.on_close
             )
             quit_button.pack(anchor=tk.CENTER, pady=(20, 20))
             self.widgets.append(quit_button)
 
+            self.keymap = {
+                "s": self.on_start_button,
+                "o": self.on_options_button
+            }
+
             self.finish_init()
 
-        def on_keyboard_press(self, key):
-            if key == "s":
-                self.root.unbind("<KeyRelease>")
-                self.on_start_button()
-            elif key == "o":
-                self.root.unbind("<KeyRelease>")
-                self.on_options_button()
+        def prefetch_next_screen(self):
+            self.app.prefetcher.prefetch_game_selection()  # Login uses the same logo as game selection
 
         def on_start_button(self):
             self.destroy()
@@ -519,7 +1196,7 @@ class Screens:
             logo_canvas.pack(pady=(0, 0), padx=(10, 0), anchor="nw")
             self.widgets.append(logo_canvas)
 
-            logo_image = Image.open("assets/logo_slash.png").convert("RGBA").resize((230, 90))  # Must be multiple of 935 x 306
+            logo_image = self.app.prefetcher.get_image("assets/logo_slash.png", (230, 90))  # Must be multiple of 935 x 306
             logo_label = tk.Label(logo_canvas, borderwidth=0, highlightthickness=0)
             image_data = {
                 "label": logo_label,
@@ -580,12 +1257,14 @@ class Screens:
             self.next_button.pack(anchor=tk.CENTER, pady=(5, 5))
             self.widgets.append(self.next_button)
 
+            self.keymap = {
+                "escape": self.on_back_button
+            }
+
             self.finish_init()
 
-        def on_keyboard_press(self, key):
-            if key == "escape":
-                self.root.unbind("<KeyRelease>")
-                self.on_back_button()
+        def prefetch_next_screen(self):
+            self.app.prefetcher.prefetch_game_selection()
 
         def on_back_button(self):
             self.destroy()
@@ -747,11 +1426,15 @@ class Screens:
 
             self.selected_game = None
 
+            # Decks dropped because their tiles changed on disk are dealt again
+            self.app.asset_listeners[self] = self.on_assets_changed
+            self.canvas.bind("<Destroy>", lambda e: self.app.asset_listeners.pop(self, None), add="+")
+
             accessibility_info_canvas = tk.Canvas(self.canvas, borderwidth=0, highlightthickness=0)
             accessibility_info_canvas.pack(padx=(0, 3), anchor="nw", fill="x")
             self.widgets.append(accessibility_info_canvas)
 
-            accessibility_info_label = tk.Label(accessibility_info_canvas, text="Accessibility: Press the corresponding number for quick navigation, press O for options", font=("Poppins Regular", 7))
+            accessibility_info_label = tk.Label(accessibility_info_canvas, text="Accessibility: Press the corresponding number for quick navigation, press O for options, S for statistics", font=("Poppins Regular", 7))
             accessibility_info_label.pack(anchor="n", side=tk.RIGHT)
             self.widgets.append(accessibility_info_label)
 
@@ -759,7 +1442,7 @@ class Screens:
             logo_canvas.pack(pady=(0, 0), padx=(10, 0), anchor="nw", fill="x")
             self.widgets.append(logo_canvas)
 
-            logo_image = Image.open("assets/logo_slash.png").convert("RGBA").resize((230, 90))  # Must be multiple of 935 x 306
+            logo_image = self.app.prefetcher.get_image("assets/logo_slash.png", (230, 90))  # Must be multiple of 935 x 306
             logo_label = tk.Label(logo_canvas, borderwidth=0, highlightthickness=0)
             image_data = {
                 "label": logo_label,
@@ -778,7 +1461,7 @@ class Screens:
             settings_button = RoundedButton(
                 logo_canvas, font=("", 0, ""),
                 width=50, height=50, radius=0, text_padding=0,
-                image=ImageTk.PhotoImage(Image.open("assets/icons/settings.png").convert("RGBA").resize((35, 35))),
+                image=self.app.prefetcher.get_photo_image("assets/icons/settings.png", (35, 35)),
                 button_background=self.app.theme_data['btn_bg'], button_foreground="#000000",
                 button_hover_background=self.app.theme_data['btn_hvr'], button_hover_foreground="#000000",
                 button_press_background=self.app.theme_data['btn_prs'], button_press_foreground="#000000",
@@ -788,74 +1471,37 @@ class Screens:
             settings_button.pack(anchor="ne", pady=(12, 0), side=tk.RIGHT)
             self.widgets.append(settings_button)
 
-            self.game_outer_frame = tk.Frame(self.canvas, bd=0, borderwidth=0, highlightthickness=0, bg=self.app.theme_data['accent'])
-            self.game_outer_frame.pack(fill=tk.BOTH, expand=True)
-
-            self.game_inner_canvas = tk.Canvas(self.game_outer_frame, bg=self.app.theme_data['accent'], bd=0, borderwidth=0, highlightthickness=0)
-            self.game_inner_canvas.pack(anchor=tk.CENTER, side=tk.LEFT, fill=tk.Y, expand=True)
-
-            scrollbar = tk.Scrollbar(self.game_outer_frame, orient=tk.VERTICAL, command=self.game_inner_canvas.yview)
-            scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
-
-            self.game_inner_canvas.configure(yscrollcommand=scrollbar.set)
-            self.root.update()
-            self.game_inner_canvas.bind("<Configure>", lambda e: self.game_inner_canvas.configure(scrollregion=self.game_inner_canvas.bbox("all")))
-
-            self.game_button_canvas = tk.Canvas(self.game_inner_canvas, bg=self.app.theme_data['accent'], bd=0, borderwidth=0, highlightthickness=0)
-
-            game_button = RoundedButton(
-                self.game_button_canvas, font=("", 0, ""),
-                width=600, height=150, radius=29, text_padding=0,
-                bg=self.app.theme_data['accent'],
+            statistics_button = RoundedButton(
+                logo_canvas, text="STATS", font=("Poppins Bold", 15, "bold"),
+                width=110, height=50, radius=29, text_padding=0, underline_index=0,
                 button_background=self.app.theme_data['btn_bg'], button_foreground="#000000",
                 button_hover_background=self.app.theme_data['btn_hvr'], button_hover_foreground="#000000",
                 button_press_background=self.app.theme_data['btn_prs'], button_press_foreground="#000000",
                 outline_colour=self.app.theme_data['outline'], outline_width=1,
-                command=lambda: self.on_game_select("Matching Tiles")
+                command=self.on_statistics_click
             )
-            game_button.on_regen = lambda: self.after_game_button(game_button, Image.open("assets/matching_tiles/icon.png"), "MATCHING TILES (1)", "Flip over and memorise pairs of cards, trying to find matching images.\nEnhances concentration and memory skills.")
-            game_button.pack(anchor=tk.CENTER, padx=(10, 10), pady=(10, 10))
-            game_button.on_regen()
-
-            game_button = RoundedButton(
-                self.game_button_canvas, font=("", 0, ""),
-                width=600, height=150, radius=29, text_padding=0,
-                bg=self.app.theme_data['accent'],
-                button_background=self.app.theme_data['btn_bg'], button_foreground="#000000",
-                button_hover_background=self.app.theme_data['btn_hvr'], button_hover_foreground="#000000",
-                button_press_background=self.app.theme_data['btn_prs'], button_press_foreground="#000000",
-                outline_colour=self.app.theme_data['outline'], outline_width=1,
-                command=None
-            )
-            game_button.on_regen = lambda: self.after_game_button(game_button, self.app.get_background(), "Coming soon...", "")
-            game_button.pack(anchor=tk.CENTER, padx=(10, 10), pady=(10, 10))
-            game_button.on_regen()
+            statistics_button.pack(anchor="ne", pady=(12, 0), padx=(0, 10), side=tk.RIGHT)
+            self.widgets.append(statistics_button)
+
+            # Game cards shown in the game list, cards without a game are placeholders
+            self.game_cards = [
+                {
+                    "game": "Matching Tiles",
+                    "title": "MATCHING TILES (1)",
+                    "description": "Flip over and memorise pairs of cards, trying to find matching images.\nEnhances concentration and memory skills.",
+                    "image": "assets/matching_tiles/icon.png"
+                },
+                {"game": None, "title": "Coming soon...", "description": "", "image": None},
+                {"game": None, "title": "Coming soon...", "description": "", "image": None},
+            ]
 
-            game_button = RoundedButton(
-                self.game_button_canvas, font=("", 0, ""),
-                width=600, height=150, radius=29, text_padding=0,
-                bg=self.app.theme_data['accent'],
-                button_background=self.app.theme_data['btn_bg'], button_foreground="#000000",
-                button_hover_background=self.app.theme_data['btn_hvr'], button_hover_foreground="#000000",
-                button_press_background=self.app.theme_data['btn_prs'], button_press_foreground="#000000",
-                outline_colour=self.app.theme_data['outline'], outline_width=1,
-                command=None
+            # Only the game cards in view are created, rows are recycled when scrolling
+            self.game_list = VirtualList(
+                self.canvas, row_height=170, row_width=620,
+                create_row=self.create_game_button, update_row=self.update_game_button,
+                items=self.game_cards, bg=self.app.theme_data['accent']
             )
-            game_button.on_regen = lambda: self.after_game_button(game_button, self.app.get_background(), "Coming soon...", "")
-            game_button.pack(anchor=tk.CENTER, padx=(10, 10), pady=(10, 10))
-            game_button.on_regen()
-
-            self.game_inner_canvas.create_window((0, 0), window=self.game_button_canvas, anchor="nw")
-
-            self.game_inner_canvas.bind("<MouseWheel>", self.on_mouse_wheel)
-            self.game_button_canvas.bind("<MouseWheel>", self.on_mouse_wheel)
-            for child in self.game_button_canvas.children.values():
-                child.bind("<MouseWheel>", self.on_mouse_wheel)
-
-            # Fixes game button canvas getting cut off
-            self.root.update()
-            x1, y1, x2, y2 = self.game_inner_canvas.bbox("all")
-            self.game_inner_canvas.config(width=x2 - x1, height=y2 - y1)
+            self.game_list.pack(fill=tk.BOTH, expand=True)
 
             # Create difficulty canvas, but don't pack until game is selected
             self.difficulty_canvas = tk.Canvas(self.canvas, bd=0, borderwidth=0, highlightthickness=0, bg=self.app.theme_data['accent'])
@@ -916,31 +1562,63 @@ class Screens:
             difficulty_button.pack(anchor=tk.CENTER, padx=(10, 10), pady=(10, 10))
             difficulty_button.on_regen()
 
+            # Keymap changes when the difficulty buttons are shown
+            self.game_list_keymap = {
+                "o": self.on_settings_click,
+                "s": self.on_statistics_click,
+                "1": lambda: self.on_game_select("Matching Tiles")
+            }
+            self.difficulty_keymap = {
+                "o": self.on_settings_click,
+                "s": self.on_statistics_click,
+                "escape": self.on_difficulty_back,
+                "b": self.on_difficulty_back,
+                "e": lambda: self.on_difficulty_select("easy"),
+                "1": lambda: self.on_difficulty_select("easy"),
+                "n": lambda: self.on_difficulty_select("normal"),
+                "2": lambda: self.on_difficulty_select("normal"),
+                "h": lambda: self.on_difficulty_select("hard"),
+                "3": lambda: self.on_difficulty_select("hard")
+            }
+            self.keymap = self.game_list_keymap
+
             self.finish_init()
 
-        def on_keyboard_press(self, key):
-            if key == "o":
-                self.root.unbind("<KeyRelease>")
-                self.on_settings_click()
-            elif self.game_button_canvas.winfo_ismapped():
-                if key == "1":
-                    self.on_game_select("Matching Tiles")
-            elif self.difficulty_canvas.winfo_ismapped():  # If difficulty screen is showing
-                if key in ["escape", "b"]:
-                    self.on_difficulty_back()
-                elif key in ["e", "1"]:
-                    self.on_difficulty_select("easy")
-                elif key in ["n", "2"]:
-                    self.on_difficulty_select("normal")
-                elif key in ["h", "3"]:
-                    self.on_difficulty_select("hard")
+        # A difficulty is chosen next, so the decks for the game are dealt
+        def prefetch_next_screen(self):
+            self.app.prefetcher.prefetch_decks()
+            self.app.prefetcher.prefetch(self.app.prefetcher.photo_images_job([("assets/icons/pause.png", (35, 35), False, None)]))
+
+        def on_assets_changed(self, folder: str, _changed: set):
+            if folder.startswith(f"{self.app.assets.directory}/matching_tiles"):
+                self.app.prefetcher.prefetch_decks()
+
+        # Creates an empty game button for the game list, the card is shown by update_game_button
+        def create_game_button(self, parent):
+            return RoundedButton(
+                parent, font=("", 0, ""),
+                width=600, height=150, radius=29, text_padding=0,
+                bg=self.app.theme_data['accent'],
+                button_background=self.app.theme_data['btn_bg'], button_foreground="#000000",
+                button_hover_background=self.app.theme_data['btn_hvr'], button_hover_foreground="#000000",
+                button_press_background=self.app.theme_data['btn_prs'], button_press_foreground="#000000",
+                outline_colour=self.app.theme_data['outline'], outline_width=1,
+                command=None
+            )
+
+        # Shows a game card on a (possibly recycled) game button
+        def update_game_button(self, button, card: dict, _index: int):
+            button.command = (lambda: self.on_game_select(card['game'])) if card['game'] is not None else None
+            button.on_regen = lambda: self.after_game_button(button, card)
+            button.generate_button()
 
         # Generates the game button
-        def after_game_button(self, button, image: Image, name: str, description: str):
-            button.game_image = ImageTk.PhotoImage(self.app.add_corners(image.convert("RGBA").resize((130, 130)), 9))
+        def after_game_button(self, button, card: dict):
+            path = card['image'] if card['image'] is not None else f"assets/{self.app.theme_data['img_bg']}"  # Placeholder cards use the background
+            button.game_image = self.app.prefetcher.get_photo_image(path, (130, 130), radius=9)
             button.create_image(10, 10, image=button.game_image, anchor="nw", tag="button")
-            button.create_text(150, 10, text=name, fill=self.app.theme_data['text'], font=("Poppins Bold", 15, "bold"), anchor="nw", tag="button")
-            button.create_text(150, 50, text=description, fill=self.app.theme_data['text'], font=("Poppins Regular", 10), width=button.width - 160, anchor="nw", tag="button")
+            button.create_text(150, 10, text=card['title'], fill=self.app.theme_data['text'], font=("Poppins Bold", 15, "bold"), anchor="nw", tag="button")
+            button.create_text(150, 50, text=card['description'], fill=self.app.theme_data['text'], font=("Poppins Regular", 10), width=button.width - 160, anchor="nw", tag="button")
 
         # Generates the difficulty button
         def after_difficulty_button(self, button, title: str, text: str):
@@ -948,14 +1626,13 @@ class Screens:
             button.create_text(10, 33, text=text, fill=self.app.theme_data['text'], font=("Poppins Regular", 9), width=button.width - 10, anchor="nw", tag="button")
             button.create_line(10, 30, 25, 30, width=3, tags="button")
 
-        # Scrolls the game canvas
-        def on_mouse_wheel(self, event):
-            self.game_inner_canvas.yview_scroll(int(-1 * (event.delta / 120)), "units")
-
         # Shows options menu
         def on_settings_click(self):
             self.app.show_overlaying_screen(Screens.SettingsMenu(self.root, self.app, self).get())
 
+        def on_statistics_click(self):
+            self.app.show_overlaying_screen(Screens.Statistics(self.root, self.app, self).get())
+
         # Goes back from difficulty screen to game selection
         def on_difficulty_back(self):
             self.selected_game = None
@@ -966,7 +1643,8 @@ class Screens:
 
             # Remove difficulty buttons and show game buttons
             self.difficulty_canvas.pack_forget()
-            self.game_outer_frame.pack(fill=tk.BOTH, expand=True)
+            self.game_list.pack(fill=tk.BOTH, expand=True)
+            self.set_keymap(self.game_list_keymap)
 
         # Goes to difficulty screen
         def on_game_select(self, game_name: str):
@@ -977,8 +1655,9 @@ class Screens:
             self.update_widgets_background(self.logo_title)  # Updates the background for title
 
             # Remove game buttons and show difficulty buttons
-            self.game_outer_frame.pack_forget()
+            self.game_list.pack_forget()
             self.difficulty_canvas.pack(fill=tk.BOTH, expand=True)
+            self.set_keymap(self.difficulty_keymap)
 
         # Passes the difficulty to the game and shows the game screen
         def on_difficulty_select(self, difficulty: str):
@@ -1003,7 +1682,7 @@ class Screens:
             logo_canvas.pack(pady=(0, 0), padx=(10, 0), anchor="nw", fill="x")
             self.widgets.append(logo_canvas)
 
-            logo_image = Image.open("assets/logo_slash.png").convert("RGBA").resize((230, 90))  # Must be multiple of 935 x 306
+            logo_image = self.app.prefetcher.get_image("assets/logo_slash.png", (230, 90))  # Must be multiple of 935 x 306
             logo_label = tk.Label(logo_canvas, borderwidth=0, highlightthickness=0)
             image_data = {
                 "label": logo_label,
@@ -1120,17 +1799,17 @@ class Screens:
             music_credit_label.pack(anchor="nw")
             self.widgets.append(music_credit_label)
 
-            self.finish_init()
+            self.keymap = {
+                "m": self.on_mute_button,
+                "t": self.on_change_theme,
+                "l": self.on_leave_options,
+                "o": self.on_leave_options,
+                "escape": self.on_leave_options
+            }
+            if self.app.username is not None and self.caller.__class__.__name__ != "PauseMenu":  # Only when the sign out button is shown
+                self.keymap["s"] = self.on_sign_out
 
-        def on_keyboard_press(self, key):
-            if key == "m":
-                self.on_mute_button()
-            elif key == "t":
-                self.on_change_theme()
-            elif key in ["l", "o", "escape"]:
-                self.on_leave_options()
-            elif key == "s":
-                self.on_sign_out()
+            self.finish_init()
 
         # Generates volume button
         def gen_volume_button(self, button):
@@ -1226,7 +1905,6 @@ class Screens:
             if self.caller.__class__.__name__ == "PauseMenu":
                 self.get().destroy()  # Can't use finish_overlaying_screen since it will pack current screen
                 self.caller.canvas.pack(side="top", fill=tk.BOTH, expand=True)  # Packs pause menu
-                self.caller.setup_keypress_listener()
                 del self
                 return
 
@@ -1234,12 +1912,10 @@ class Screens:
             if self.original_theme != self.app.theme:
                 # Only update theme if not in game
                 self.app.finish_overlaying_screen(self.get(), screen=self.caller.__class__(self.root, self.app).get())  # Recreates class so the themes are updated
-                # Keypress does not need to be re-setup since a new screen will be created
                 del self
                 return
 
             self.app.finish_overlaying_screen(self.get())  # Screen not specified so screen will not regenerate (saves resources)
-            self.caller.setup_keypress_listener()
             del self
 
         # Sign out the user and go back to home screen
@@ -1268,7 +1944,7 @@ class Screens:
             logo_canvas.pack(pady=(0, 0), padx=(10, 0), anchor="nw", fill="x")
             self.widgets.append(logo_canvas)
 
-            logo_image = Image.open("assets/logo_slash.png").convert("RGBA").resize((230, 90))  # Must be multiple of 935 x 306
+            logo_image = self.app.prefetcher.get_image("assets/logo_slash.png", (230, 90))  # Must be multiple of 935 x 306
             logo_label = tk.Label(logo_canvas, borderwidth=0, highlightthickness=0)
             image_data = {
                 "label": logo_label,
@@ -1299,72 +1975,75 @@ class Screens:
             self.list_outer_frame = tk.Frame(self.canvas, bd=0, borderwidth=0, highlightthickness=0, bg=self.app.theme_data['accent'])
             self.list_outer_frame.pack(fill=tk.BOTH, expand=True)
 
-            self.list_inner_canvas = tk.Canvas(self.list_outer_frame, bg=self.app.theme_data['accent'], bd=0, borderwidth=0, highlightthickness=0)
-            self.list_inner_canvas.pack(anchor=tk.CENTER, side=tk.LEFT, fill=tk.Y, expand=True)
+            self.list_message = tk.Label(self.list_outer_frame, text="", bg=self.app.theme_data['accent'], font=("Poppins Regular", 15))
+            self.list_message.pack(anchor=tk.CENTER)
 
-            scrollbar = tk.Scrollbar(self.list_outer_frame, orient=tk.VERTICAL, command=self.list_inner_canvas.yview)
-            scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
-
-            self.list_inner_canvas.configure(yscrollcommand=scrollbar.set)
-            self.root.update()
-            self.list_inner_canvas.bind("<Configure>", lambda e: self.list_inner_canvas.configure(scrollregion=self.list_inner_canvas.bbox("all")))
-
-            self.list_canvas = tk.Canvas(self.list_inner_canvas, bg=self.app.theme_data['accent'], bd=0, borderwidth=0, highlightthickness=0)
-
-            self.update_hidden_music_list()
+            while None in self.app.hidden_music:
+                self.app.hidden_music.remove(None)
 
-            self.list_inner_canvas.create_window((0, 0), window=self.list_canvas, anchor="nw")
+            # Hidden music removed from or put back into the music folders is shown as it changes
+            self.app.asset_listeners[self] = self.on_assets_changed
+            self.canvas.bind("<Destroy>", lambda e: self.app.asset_listeners.pop(self, None), add="+")
 
-            self.list_inner_canvas.bind("<MouseWheel>", self.on_mouse_wheel)
-            self.list_canvas.bind("<MouseWheel>", self.on_mouse_wheel)
-            for child in self.list_canvas.children.values():
-                child.bind("<MouseWheel>", self.on_mouse_wheel)
+            # Only the rows in view are created, rows are recycled when scrolling
+            self.music_list = VirtualList(
+                self.list_outer_frame, row_height=70, row_width=460,
+                create_row=self.create_music_button, update_row=self.update_music_button,
+                items=self.app.hidden_music, bg=self.app.theme_data['accent']
+            )
+            self.music_list.pack(fill=tk.BOTH, expand=True)
+            self.update_list_message()
 
-            # Fixes game button canvas getting cut off
-            self.root.update()
-            x1, y1, x2, y2 = self.list_inner_canvas.bbox("all")
-            self.list_inner_canvas.config(width=x2 - x1, height=y2 - y1)
+            self.keymap = {
+                "b": self.on_back
+            }
 
             self.finish_init()
 
-        def on_keyboard_press(self, key):
-            if key == "b":
-                self.root.unbind("<KeyRelease>")
-                self.on_back()
-
-        # Scrolls the game canvas
-        def on_mouse_wheel(self, event):
-            self.list_inner_canvas.yview_scroll(int(-1 * (event.delta / 120)), "units")
-
-        def update_hidden_music_list(self):
-            for widget in self.list_canvas.winfo_children():
-                widget.destroy()
-
-            while None in self.app.hidden_music:
-                self.app.hidden_music.remove(None)
-
-            if not self.app.hidden_music:
-                tk.Label(self.list_canvas, text="No Hidden Songs.", bg=self.app.theme_data['accent'], font=("Poppins Regular", 15)).pack(anchor=tk.CENTER, pady=(100, 0))
+        # Changes the message above the list depending on if there is hidden music
+        def update_list_message(self):
+            if not self.music_list.items:
+                self.list_message.config(text="No Hidden Songs.")
+                self.list_message.pack_configure(pady=(100, 0))
             else:
-                tk.Label(self.list_canvas, text="Click on a music to un-hide it.", bg=self.app.theme_data['accent'], font=("Poppins Regular", 15)).pack(anchor=tk.CENTER, pady=(10, 0))
+                self.list_message.config(text="Click on a music to un-hide it.")
+                self.list_message.pack_configure(pady=(10, 0))
+
+        # Creates an empty music button for the list, the music is shown by update_music_button
+        def create_music_button(self, parent):
+            return RoundedButton(
+                parent, text="", font=("Poppins Regular", 15),
+                width=450, height=50, radius=29, text_padding=0,
+                bg=self.app.theme_data['accent'],
+                button_background=self.app.theme_data['btn_bg'], button_foreground="#000000",
+                button_hover_background=self.app.theme_data['btn_hvr'], button_hover_foreground="#000000",
+                button_press_background=self.app.theme_data['btn_prs'], button_press_foreground="#000000",
+                outline_colour=self.app.theme_data['outline'], outline_width=1,
+                command=None
+            )
 
-            for hidden_item in self.app.hidden_music:
-                item_button = RoundedButton(
-                    self.list_canvas, text=os.path.splitext(os.path.basename(hidden_item))[0], font=("Poppins Regular", 15),
-                    width=450, height=50, radius=29, text_padding=0,
-                    bg=self.app.theme_data['accent'],
-                    button_background=self.app.theme_data['btn_bg'], button_foreground="#000000",
-                    button_hover_background=self.app.theme_data['btn_hvr'], button_hover_foreground="#000000",
-                    button_press_background=self.app.theme_data['btn_prs'], button_press_foreground="#000000",
-                    outline_colour=self.app.theme_data['outline'], outline_width=1,
-                    command=lambda item=hidden_item: self.remove_hidden_music(item)
-                )
-                item_button.pack(anchor=tk.CENTER, padx=(5, 5), pady=(10, 10))
+        # Shows a hidden music on a (possibly recycled) music button
+        def update_music_button(self, button, hidden_item: str, _index: int):
+            button.text = os.path.splitext(os.path.basename(hidden_item))[0]
+            if self.app.assets.file(hidden_item) is None:
+                button.text += " (missing)"
+            button.command = lambda: self.remove_hidden_music(hidden_item)
+            button.generate_button()
+
+        def on_assets_changed(self, folder: str, _changed: set):
+            if folder.startswith(f"{self.app.assets.directory}/music"):
+                self.music_list.set_items(self.app.hidden_music)
 
         def remove_hidden_music(self, hidden_item):
             if hidden_item in self.app.hidden_music:
                 self.app.hidden_music.remove(hidden_item)
                 print(f"Removed {hidden_item} from list of hidden items")
+            self.app.audio.unhide_music(hidden_item)
+
+            # Only the removed row changes, the rows below are moved up
+            if hidden_item in self.music_list.items:
+                self.music_list.remove(self.music_list.items.index(hidden_item))
+            self.update_list_message()
 
             # Save the options to the user data file
 
@@ -1387,12 +2066,117 @@ class Screens:
 
             self.app.rewrite_user_data(self.app.username, current_user_data)
 
-            self.update_hidden_music_list()
-
         def on_back(self, _=None):
             self.get().destroy()  # Can't use finish_overlaying_screen since it will pack current screen
             self.caller.canvas.pack(side="top", fill=tk.BOTH, expand=True)  # Packs pause menu
-            self.caller.setup_keypress_listener()
+            del self
+
+    class Statistics(BaseScreen):
+        def __init__(self, root: tk.Tk, app: RecollectApp, caller):
+            super().__init__(root, app, True, False)  # Implements all variables and function from base class "BaseScreen"
+            self.caller = caller
+
+            accessibility_info_canvas = tk.Canvas(self.canvas, borderwidth=0, highlightthickness=0)
+            accessibility_info_canvas.pack(padx=(0, 3), anchor="nw", fill="x")
+            self.widgets.append(accessibility_info_canvas)
+
+            accessibility_info_label = tk.Label(accessibility_info_canvas, text="Accessibility: Press B to go back", font=("Poppins Regular", 7))
+            accessibility_info_label.pack(anchor="n", side=tk.RIGHT)
+            self.widgets.append(accessibility_info_label)
+
+            logo_canvas = tk.Canvas(self.canvas, borderwidth=0, highlightthickness=0)
+            logo_canvas.pack(pady=(0, 0), padx=(10, 0), anchor="nw", fill="x")
+            self.widgets.append(logo_canvas)
+
+            logo_image = self.app.prefetcher.get_image("assets/logo_slash.png", (230, 90))  # Must be multiple of 935 x 306
+            logo_label = tk.Label(logo_canvas, borderwidth=0, highlightthickness=0)
+            image_data = {
+                "label": logo_label,
+                "raw_image": logo_image,
+                "updated_image": ImageTk.PhotoImage(logo_image)  # Used to save only
+            }
+            logo_label.config(image=image_data['updated_image'])
+            logo_label.pack(anchor="nw", padx=(5, 0), pady=(0, 3), side=tk.LEFT)
+            self.transparent_images.append(image_data)
+            del logo_image
+
+            logo_title = tk.Label(logo_canvas, text="Statistics", font=("Poppins Regular", 15))
+            logo_title.pack(anchor="nw", pady=(19, 0), side=tk.LEFT)
+            self.widgets.append(logo_title)
+
+            back_button = RoundedButton(
+                self.canvas, text="BACK", font=("Poppins Bold", 15, "bold"),
+                width=210, height=50, radius=29, text_padding=0, underline_index=0,
+                button_background=self.app.theme_data['btn_bg'], button_foreground="#000000",
+                button_hover_background=self.app.theme_data['btn_hvr'], button_hover_foreground="#000000",
+                button_press_background=self.app.theme_data['btn_prs'], button_press_foreground="#000000",
+                outline_colour=self.app.theme_data['outline'], outline_width=1,
+                command=self.on_back
+            )
+            back_button.pack(pady=(5, 0), padx=(10, 0), anchor="nw")
+            self.widgets.append(back_button)
+
+            statistics_frame = tk.Frame(self.canvas, bd=0, borderwidth=0, highlightthickness=0, bg=self.app.theme_data['accent'])
+            statistics_frame.pack(fill=tk.BOTH, expand=True, pady=(10, 0))
+
+            # Only the stored aggregates are read, however many games were played
+            user_data = self.app.get_user_data(self.app.username) if self.app.username is not None else None
+            statistics = user_data.get("statistics", {}) if user_data is not None else {}
+            if not statistics:
+                message = "Sign in to keep statistics." if user_data is None else "No games played yet."
+                tk.Label(statistics_frame, text=message, bg=self.app.theme_data['accent'], font=("Poppins Regular", 15)).pack(anchor=tk.CENTER, pady=(100, 0))
+
+            for game, difficulties in statistics.items():
+                tk.Label(statistics_frame, text=game, bg=self.app.theme_data['accent'], font=("Poppins Bold", 15, "bold")).pack(anchor=tk.CENTER, pady=(10, 0))
+                row = tk.Frame(statistics_frame, bd=0, borderwidth=0, highlightthickness=0, bg=self.app.theme_data['accent'])
+                row.pack(anchor=tk.CENTER)
+                for difficulty in self.app.BOARD_SIZES:
+                    if difficulty in difficulties:
+                        self.create_difficulty_column(row, difficulty, difficulties[difficulty])
+
+            self.keymap = {
+                "b": self.on_back,
+                "escape": self.on_back
+            }
+
+            self.finish_init()
+
+        # Shows the statistics of a difficulty with a histogram of its scores
+        def create_difficulty_column(self, parent, difficulty: str, statistics: dict):
+            column = tk.Frame(parent, bd=0, borderwidth=0, highlightthickness=0, bg=self.app.theme_data['accent'])
+            column.pack(side=tk.LEFT, anchor="n", padx=(15, 15))
+
+            score, seconds, mistakes = statistics['score'], statistics['seconds'], statistics['mistakes']
+            lines = [f"{statistics['games']} game{'s' if statistics['games'] != 1 else ''}"]
+            if score['count']:
+                lines.append(f"Score: {score['mean']:.1f} average (\u00b1{GameStatistics.stdev(score):.1f}), best {score['max']}")
+            if seconds['count']:
+                lines.append(f"Time: best {seconds['min']}s, average {seconds['mean']:.0f}s")
+            if mistakes['count']:
+                lines.append(f"Mistakes: {mistakes['mean']:.1f} per game")
+            day_streak = statistics['day_streak'] if statistics['last_day'] is not None and statistics['last_day'] >= datetime.date.today().toordinal() - 1 else 0  # Broken once a day is missed
+            lines.append(f"Days in a row: {day_streak} (best {statistics['best_day_streak']})")
+            lines.append(f"Perfect games in a row: {statistics['perfect_streak']} (best {statistics['best_perfect_streak']})")
+
+            tk.Label(column, text=difficulty.capitalize(), bg=self.app.theme_data['accent'], font=("Poppins Bold", 13, "bold")).pack(anchor=tk.CENTER)
+            tk.Label(column, text="\n".join(lines), bg=self.app.theme_data['accent'], font=("Poppins Regular", 9), justify=tk.LEFT).pack(anchor=tk.CENTER)
+
+            # Bars of the scores relative to easy mode, from 0 on the left to 50 on the right
+            width, height = 200, 60
+            histogram = tk.Canvas(column, width=width, height=height, bd=0, highlightthickness=0, bg=self.app.theme_data['accent'])
+            histogram.pack(anchor=tk.CENTER, pady=(5, 0))
+            tallest = max(max(statistics['histogram']), 1)
+            bar_width = width / len(statistics['histogram'])
+            for index, count in enumerate(statistics['histogram']):
+                bar_height = round(count / tallest * (height - 2))
+                if bar_height:
+                    histogram.create_rectangle(
+                        index * bar_width + 2, height - bar_height, (index + 1) * bar_width - 2, height,
+                        fill=self.app.theme_data['btn_bg'], outline=self.app.theme_data['outline']
+                    )
+
+        def on_back(self, _=None):
+            self.app.finish_overlaying_screen(self.get())  # Screen not specified so screen will not regenerate (saves resources)
             del self
 
     class PauseMenu(BaseScreen):
@@ -1412,7 +2196,7 @@ class Screens:
             logo_canvas.pack(pady=(0, 0), padx=(10, 0), anchor="nw", fill="x")
             self.widgets.append(logo_canvas)
 
-            logo_image = Image.open("assets/logo_slash.png").convert("RGBA").resize((230, 90))  # Must be multiple of 935 x 306
+            logo_image = self.app.prefetcher.get_image("assets/logo_slash.png", (230, 90))  # Must be multiple of 935 x 306
             logo_label = tk.Label(logo_canvas, borderwidth=0, highlightthickness=0)
             image_data = {
                 "label": logo_label,
@@ -1482,7 +2266,7 @@ class Screens:
             skip_button = RoundedButton(
                 self.music_info_row3_canvas, font=("", 0, ""),
                 width=42, height=42, radius=0, text_padding=0,
-                image=ImageTk.PhotoImage(Image.open("assets/icons/skip.png").convert("RGBA").resize((25, 25))),
+                image=self.app.prefetcher.get_photo_image("assets/icons/skip.png", (25, 25)),
                 button_background="#737373", button_foreground="#000000",
                 button_hover_background="#8c8c8c", button_hover_foreground="#000000",
                 button_press_background="#3f3f3f", button_press_foreground="#000000",
@@ -1503,7 +2287,7 @@ class Screens:
             hide_button = RoundedButton(
                 music_info_row2_canvas, font=("", 0, ""),
                 width=42, height=42, radius=0, text_padding=0,
-                image=ImageTk.PhotoImage(Image.open("assets/icons/hide.png").convert("RGBA").resize((25, 25))),
+                image=self.app.prefetcher.get_photo_image("assets/icons/hide.png", (25, 25)),
                 button_background="#765b5b", button_foreground="#000000",
                 button_hover_background=self.app.theme_data['btn_warn_hvr'], button_hover_foreground="#000000",
                 button_press_background=self.app.theme_data['btn_warn_prs'], button_press_foreground="#000000",
@@ -1524,7 +2308,7 @@ class Screens:
             self.mute_button = RoundedButton(
                 music_info_row1_canvas, font=("", 0, ""),
                 width=42, height=42, radius=0, text_padding=0,
-                image=ImageTk.PhotoImage(Image.open("assets/icons/mute.png").convert("RGBA").resize((25, 25))),
+                image=self.app.prefetcher.get_photo_image("assets/icons/mute.png", (25, 25)),
                 button_background="#737373", button_foreground="#000000",
                 button_hover_background="#8c8c8c", button_hover_foreground="#000000",
                 button_press_background="#3f3f3f", button_press_foreground="#000000",
@@ -1538,6 +2322,17 @@ class Screens:
             self.mute_label.pack(anchor="center", side=tk.RIGHT, padx=(0, 5))
             self.widgets.append(self.mute_label)
 
+            self.keymap = {
+                "escape": self.on_unpause_button,
+                "p": self.on_unpause_button,
+                "o": self.on_options_button,
+                "l": self.on_leave_game_button
+            }
+
+            # The music label follows changes made by the audio service
+            self.app.music_listeners[self] = self.update_music_label
+            self.canvas.bind("<Destroy>", lambda e: self.app.music_listeners.pop(self, None), add="+")
+
             self.finish_init()
 
         def on_mute_button(self):
@@ -1545,13 +2340,13 @@ class Screens:
                 self.app.last_volume = self.app.volume.get()
                 self.app.volume.set(0)
                 self.mute_label.config(text="Unmute", underline=2)
-                self.mute_button.image = ImageTk.PhotoImage(Image.open("assets/icons/unmute.png").convert("RGBA").resize((25, 25)))
+                self.mute_button.image = self.app.prefetcher.get_photo_image("assets/icons/unmute.png", (25, 25))
             else:  # Unmutes to last volume
                 if self.app.last_volume == 0:
                     self.app.last_volume = 50
                 self.app.volume.set(self.app.last_volume)
                 self.mute_label.config(text="Mute", underline=0)
-                self.mute_button.image = ImageTk.PhotoImage(Image.open("assets/icons/mute.png").convert("RGBA").resize((25, 25)))
+                self.mute_button.image = self.app.prefetcher.get_photo_image("assets/icons/mute.png", (25, 25))
             self.update_widgets_background(specific_widget=self.mute_label)  # Update label (UNMUTE/MUTE)
             self.mute_button.generate_button()  # Regenerates mute button to update image
 
@@ -1559,15 +2354,20 @@ class Screens:
             # Caller should always be the game
             if hasattr(self.caller, "play_music"):  # Check if caller has play_music option
                 self.caller.play_music()
-                self.music_label.config(text=os.path.splitext(os.path.basename(self.app.music_playing))[0] if self.app.music_playing is not None else "No music playing")
-                self.update_widgets_background(specific_widget=self.skip_label)
-                self.update_widgets_background(specific_widget=self.music_info_row3_canvas)
-                self.update_widgets_background(specific_widget=self.music_info_canvas)
-                pygame.mixer.music.pause()
+                self.app.audio.pause_music()  # The label is updated when the audio service has changed the music
+
+        # Shows the music playing, called when the audio service changes the music
+        def update_music_label(self):
+            self.music_label.config(text=os.path.splitext(os.path.basename(self.app.music_playing))[0] if self.app.music_playing is not None else "No music playing")
+            self.update_widgets_background(specific_widget=self.skip_label)
+            self.update_widgets_background(specific_widget=self.music_info_row3_canvas)
+            self.update_widgets_background(specific_widget=self.music_info_canvas)
 
         def on_hide_button(self):
             print(f"Hiding music: {self.app.music_playing}")
-            self.app.hidden_music.append(self.app.music_playing) if self.app.music_playing not in self.app.hidden_music else self.app.hidden_music
+            if self.app.music_playing is not None and self.app.music_playing not in self.app.hidden_music:
+                self.app.hidden_music.append(self.app.music_playing)
+                self.app.audio.hide_music(self.app.music_playing)
             print(f"New hidden list of music: {self.app.hidden_music}")
 
             self.on_skip_button()
@@ -1593,21 +2393,9 @@ class Screens:
 
             self.app.rewrite_user_data(self.app.username, current_user_data)
 
-        def on_keyboard_press(self, key):
-            if key in ["escape", "p"]:
-                self.root.unbind("<KeyRelease>")
-                self.on_unpause_button()
-            elif key == "o":
-                self.root.unbind("<KeyRelease>")
-                self.on_options_button()
-            elif key == "l":
-                self.root.unbind("<KeyRelease>")
-                self.on_leave_game_button()
-
         # Finish the overlaying screen and unpause
         def on_unpause_button(self):
             self.app.finish_overlaying_screen(self.get())
-            self.caller.setup_keypress_listener()
             self.caller.on_unpause()
             del self
 
@@ -1619,11 +2407,2131 @@ class Screens:
 
         # Leave the game and go to game selection page
         def on_leave_game_button(self):
+            self.app.audio.stop_music()
             self.app.finish_overlaying_screen(self.get())
             self.app.show_screen(Screens.GameSelection(self.root, self.app).get())
             del self
 
 
+# Read-only file over a memoryview for PIL and pygame, reads only copy the bytes asked for
+class MemoryFile(io.RawIOBase):
+    def __init__(self, view: memoryview):
+        self.view = view
+        self.position = 0
+
+    def readable(self) -> bool:
+        return True
+
+    def seekable(self) -> bool:
+        return True
+
+    def readinto(self, buffer) -> int:
+        size = max(min(len(buffer), len(self.view) - self.position), 0)
+        buffer[:size] = self.view[self.position:self.position + size]
+        self.position += size
+        return size
+
+    def seek(self, offset: int, whence: int = io.SEEK_SET) -> int:
+        start = {io.SEEK_SET: 0, io.SEEK_CUR: self.position, io.SEEK_END: len(self.view)}[whence]
+        self.position = max(start + offset, 0)
+        return self.position
+
+    def tell(self) -> int:
+        return self.position
+
+
+# Assets packed into one uncompressed file built with --build-bundle, opened once and memory-mapped
+# Layout: magic, the files one after another, a JSON index of {path: [offset, size]} and the manifest, then the trailer
+class AssetBundle:
+    MAGIC = b"RCLBND01"
+    TRAILER = struct.Struct("<QQ8s")  # Index offset, index size, magic
+    EXCLUDED_DIRECTORIES = ("fonts",)  # Fonts are registered with the system from their files
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(path, "rb") as bundle_file:
+            self.map = mmap.mmap(bundle_file.fileno(), 0, access=mmap.ACCESS_READ)  # The mapping stays open without the file
+        if len(self.map) < len(self.MAGIC) + self.TRAILER.size or self.map[:len(self.MAGIC)] != self.MAGIC:
+            raise ValueError("not an asset bundle")
+        index_offset, index_size, magic = self.TRAILER.unpack_from(self.map, len(self.map) - self.TRAILER.size)
+        if magic != self.MAGIC:
+            raise ValueError("the bundle is incomplete")
+        index = json.loads(self.map[index_offset:index_offset + index_size])
+        self.files: dict = index['files']
+        self.manifest: dict = index['manifest']
+        self.view = memoryview(self.map)
+
+    # Opens the bundle, None if there is none or it cannot be used
+    @classmethod
+    def load(cls, path: str):
+        try:
+            bundle = cls(path)
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError, KeyError) as error:
+            print(f"Ignoring the asset bundle, it could not be read: {error}")
+            return None
+        print(f"Loaded asset bundle with {len(bundle.files)} files")
+        return bundle
+
+    # Gets the bytes of a file without copying them, None if the file is not bundled
+    def read(self, path: str):
+        entry = self.files.get(path)
+        if entry is None:
+            return None
+        return self.view[entry[0]:entry[0] + entry[1]]
+
+    # File of a bundled asset for PIL or pygame, or the path itself if it is not bundled
+    def open(self, path: str):
+        view = self.read(path)
+        return path if view is None else io.BufferedReader(MemoryFile(view))
+
+    # Writes the files of a manifest into a bundle, tile packs and fonts are left as files
+    @classmethod
+    def build(cls, path: str, assets):
+        start_time = time.perf_counter()
+        manifest = assets.scan()
+        excluded = {f"{assets.directory}/{directory}/" for directory in cls.EXCLUDED_DIRECTORIES}
+        excluded.update(f"{pack_path}/" for pack_path in manifest['tile_packs'].values() if not pack_path.lower().endswith(".zip"))
+        packs = set(manifest['tile_packs'].values())
+        files = {}
+        with open(f"{path}.tmp", "wb") as bundle_file:
+            bundle_file.write(cls.MAGIC)
+            for source in manifest['files']:
+                if source in packs or any(source.startswith(prefix) for prefix in excluded):
+                    continue
+                with open(source, "rb") as source_file:
+                    data = source_file.read()
+                files[source] = [bundle_file.tell(), len(data)]
+                bundle_file.write(data)
+            index = json.dumps({"files": files, "manifest": manifest}).encode()
+            index_offset = bundle_file.tell()
+            bundle_file.write(index)
+            bundle_file.write(cls.TRAILER.pack(index_offset, len(index), cls.MAGIC))
+            bundle_size = bundle_file.tell()
+        os.replace(f"{path}.tmp", path)
+        print(f"Wrote {path} in {time.perf_counter() - start_time:.2f}s: {len(files)} files, {bundle_size / 1024 / 1024:.1f} MB")
+
+
+# Every asset with its size, image dimensions and content hash, grouped into tile categories, tracks, sound effects, icons and images
+# Built by --build-manifest and loaded at startup, the assets are only rescanned if a directory changed since
+class AssetManifest:
+    IMAGE_EXTENSIONS = (".png", ".jpg", ".jpeg", ".gif")
+    AUDIO_EXTENSIONS = (".mp3", ".wav", ".ogg")  # Preferred first when a sound has several files
+
+    def __init__(self, directory: str = "assets", manifest_file: str = "asset_manifest.json", bundle_file: str = "assets.bundle"):
+        self.directory = directory
+        self.manifest_file = manifest_file
+        self.manifest: dict = {"directories": {}, "files": {}}
+        self.validated = False  # Directories are checked when an asset is first looked up, not at startup
+        self.lock = threading.Lock()  # Music is looked up from the audio thread
+
+        # A bundle has the manifest of the assets it was built from, the assets directory is only used for what it does not have
+        self.bundle = AssetBundle.load(bundle_file) if bundle_file is not None else None
+        if self.bundle is not None:
+            self.manifest = self.bundle.manifest
+            self.validated = True
+            return
+        try:
+            with open(self.manifest_file, "r") as manifest_file:
+                self.manifest = json.load(manifest_file)
+        except FileNotFoundError:
+            print("No asset manifest, assets will be scanned (build one with --build-manifest)")
+        except (OSError, ValueError) as error:
+            print(f"Ignoring the asset manifest, it could not be read: {error}")
+
+    @staticmethod
+    def file_hash(path: str) -> str:
+        sha256 = hashlib.sha256()
+        with open(path, "rb") as file:
+            for chunk in iter(lambda: file.read(1 << 20), b""):
+                sha256.update(chunk)
+        return sha256.hexdigest()
+
+    # Lists every asset, entries of files that have not changed are kept (with their hash) instead of read again
+    def scan(self, hashes: bool = False) -> dict:
+        previous = self.manifest.get("files", {})
+        directories = {}
+        files = {}
+        for folder, folder_names, filenames in os.walk(self.directory):
+            folder = folder.replace(os.sep, "/")
+            folder_names.sort()
+            directories[folder] = os.stat(folder).st_mtime_ns
+            if TilePack.INDEX_FILE in filenames and os.path.dirname(folder) == f"{self.directory}/matching_tiles":
+                filenames = [TilePack.INDEX_FILE]  # Tiles of an indexed pack are listed by its index, not one by one
+                folder_names.clear()
+            for filename in sorted(filenames):
+                path = f"{folder}/{filename}"
+                stat = os.stat(path)
+                entry = previous.get(path)
+                if entry is None or entry['size'] != stat.st_size or entry['mtime_ns'] != stat.st_mtime_ns:
+                    entry = {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+                    if os.path.splitext(filename)[1].lower() in self.IMAGE_EXTENSIONS:
+                        try:
+                            with Image.open(path) as image:  # Only reads the header
+                                entry['width'], entry['height'] = image.size
+                        except OSError as error:
+                            print(f"Could not read image \"{path}\": {error}")
+                if hashes and "sha256" not in entry:
+                    entry = {**entry, "sha256": self.file_hash(path)}
+                files[path] = entry
+        return {"directories": directories, "files": files, **self.group(files)}
+
+    # Groups the asset paths by what they are used for
+    def group(self, files: dict) -> dict:
+        groups = {"categories": {}, "tile_packs": {}, "tracks": {}, "sound_effects": {}, "icons": {}, "images": {}}
+        for path in files:
+            parts = path[len(self.directory) + 1:].split("/")
+            name, extension = os.path.splitext(parts[-1])
+            extension = extension.lower()
+            if len(parts) == 3 and parts[0] == "matching_tiles" and parts[2] == TilePack.INDEX_FILE:
+                groups['tile_packs'][parts[1]] = os.path.dirname(path)
+            elif len(parts) == 2 and parts[0] == "matching_tiles" and extension == ".zip":
+                groups['tile_packs'][name] = path
+            elif len(parts) == 3 and parts[0] == "matching_tiles" and extension == ".png":
+                groups['categories'].setdefault(parts[1], []).append(path)
+            elif len(parts) == 3 and parts[0] == "music" and extension in self.AUDIO_EXTENSIONS:
+                groups['tracks'].setdefault(parts[1], []).append(path)
+            elif len(parts) == 2 and parts[0] == "sound_effects" and extension in self.AUDIO_EXTENSIONS:
+                current = groups['sound_effects'].get(name)
+                if current is None or self.AUDIO_EXTENSIONS.index(extension) < self.AUDIO_EXTENSIONS.index(os.path.splitext(current)[1].lower()):
+                    groups['sound_effects'][name] = path
+            elif len(parts) == 2 and parts[0] == "icons" and extension in self.IMAGE_EXTENSIONS:
+                groups['icons'][name] = path
+            elif len(parts) == 1 and extension in self.IMAGE_EXTENSIONS:
+                groups['images'][name] = path
+        return groups
+
+    # Rescans the assets if a directory was changed, added or removed since the manifest was made, only once
+    def validate(self):
+        with self.lock:
+            if self.validated:
+                return
+            self.validated = True
+            for folder, mtime_ns in self.manifest['directories'].items():
+                try:
+                    if os.stat(folder).st_mtime_ns == mtime_ns:
+                        continue
+                except OSError:
+                    pass
+                print(f"Assets changed in \"{folder}\", rescanning")
+                break
+            else:
+                if self.manifest['directories']:
+                    return
+            self.manifest = self.scan()
+
+    # Replaces the files of a folder after the watcher listed it (None if removed), returns the paths added, removed or changed
+    def update_folder(self, folder: str, entries, changed_names=()) -> set:
+        with self.lock:
+            files = self.manifest['files']
+            prefix = f"{folder}/"
+            old = {path for path in files if path.startswith(prefix) and "/" not in path[len(prefix):]}
+            new = {}
+            if entries is not None:
+                indexed = TilePack.INDEX_FILE in entries and os.path.dirname(folder) == f"{self.directory}/matching_tiles"
+                for name in sorted(entries):
+                    if indexed and name != TilePack.INDEX_FILE:
+                        continue
+                    size, mtime_ns = entries[name]
+                    entry = files.get(f"{prefix}{name}")
+                    if entry is None or entry['size'] != size or entry['mtime_ns'] != mtime_ns:
+                        entry = {"size": size, "mtime_ns": mtime_ns}
+                    new[f"{prefix}{name}"] = entry
+            changed = (old ^ new.keys()) | {path for path in old & new.keys() if files[path] is not new[path]}
+            changed.update(f"{prefix}{name}" for name in changed_names if f"{prefix}{name}" in new)  # Rewritten with the same size and time
+            if not changed:
+                return changed
+
+            for path in old:
+                del files[path]
+            files.update(new)
+            if entries is None:
+                self.manifest['directories'].pop(folder, None)
+            else:
+                with contextlib.suppress(OSError):
+                    self.manifest['directories'][folder] = os.stat(folder).st_mtime_ns
+
+            # Regroups only the files of the folder
+            groups = self.group(new)
+            for group, assets in groups.items():
+                mapping = self.manifest.setdefault(group, {})
+                for key, value in list(mapping.items()):
+                    first = value[0] if isinstance(value, list) else value
+                    if first == folder or first in old:  # An indexed tile pack is its folder
+                        del mapping[key]
+                mapping.update(assets)
+            return changed
+
+    # Path or file of an asset for PIL or pygame, from the bundle if it has the asset
+    def open(self, path: str):
+        return path if self.bundle is None else self.bundle.open(path)
+
+    # Path or file of an audio asset, preferring its transcoded version in the audio cache
+    def open_audio(self, path: str, audio_cache=None):
+        if audio_cache is not None:
+            cached = audio_cache.resolve(path)
+            if cached != path:
+                return cached
+        return self.open(path)
+
+    # Looked up assets are from the manifest, without using the file system after validation
+    def categories(self) -> dict:
+        self.validate()
+        return self.manifest['categories']
+
+    def tile_packs(self) -> dict:
+        self.validate()
+        return self.manifest['tile_packs']
+
+    def tracks(self) -> dict:
+        self.validate()
+        return self.manifest['tracks']
+
+    def sound_effects(self) -> dict:
+        self.validate()
+        return self.manifest['sound_effects']
+
+    def icon(self, name: str) -> str:
+        self.validate()
+        return self.manifest['icons'][name]
+
+    def file(self, path: str) -> dict:
+        self.validate()
+        return self.manifest['files'].get(path)
+
+    # Scans every asset with content hashes and writes the manifest like the data file
+    def build(self):
+        start_time = time.perf_counter()
+        self.manifest = self.scan(hashes=True)
+        self.validated = True
+        with open(f"{self.manifest_file}.tmp", "w") as manifest_file:
+            json.dump(self.manifest, manifest_file, indent=2)
+        os.replace(f"{self.manifest_file}.tmp", self.manifest_file)
+        print(
+            f"Wrote {self.manifest_file} in {time.perf_counter() - start_time:.2f}s: {len(self.manifest['files'])} files, "
+            f"{sum(len(tiles) for tiles in self.manifest['categories'].values())} tiles in {len(self.manifest['categories'])} categories, "
+            f"{len(self.manifest['tile_packs'])} tile packs, "
+            f"{sum(len(tracks) for tracks in self.manifest['tracks'].values())} tracks, {len(self.manifest['sound_effects'])} sound effects, "
+            f"{len(self.manifest['icons'])} icons, {len(self.manifest['images'])} images"
+        )
+
+
+# A category of tiles in a directory or zip file, with an index.json of its metadata and tile names
+# Tiles are only read when dealt, packs without an index are streamed through instead of listed
+class TilePack:
+    INDEX_FILE = "index.json"
+
+    def __init__(self, path: str, names: list = None):
+        self.path = path
+        self.is_zip = path.lower().endswith(".zip")
+        self.archive = None  # Opened zip file, kept open for reading tiles
+        self.metadata: dict = None  # Name, description etc. from the index, read when first needed
+        self.names = names  # Tile names relative to the pack, None if the pack has no index
+        self.count = None if names is None else len(names)
+        if names is not None:
+            self.metadata = {}
+
+    @property
+    def category(self) -> str:
+        return os.path.splitext(os.path.basename(self.path))[0]
+
+    def open_archive(self) -> zipfile.ZipFile:
+        if self.archive is None:
+            self.archive = zipfile.ZipFile(self.path)
+        return self.archive
+
+    # Reads the index once, a missing index leaves the tiles to be streamed
+    def load_index(self):
+        if self.metadata is not None:
+            return
+        self.metadata = {}
+        try:
+            if self.is_zip:
+                index = json.loads(self.open_archive().read(self.INDEX_FILE))
+            else:
+                with open(f"{self.path}/{self.INDEX_FILE}", "r") as index_file:
+                    index = json.load(index_file)
+        except (KeyError, FileNotFoundError):
+            return
+        except (OSError, ValueError, zipfile.BadZipFile) as error:
+            print(f"Ignoring the index of tile pack \"{self.path}\": {error}")
+            return
+        self.names = index.pop("tiles")
+        self.count = len(self.names)
+        self.metadata = index
+
+    def get_metadata(self) -> dict:
+        self.load_index()
+        return {"name": self.category.replace("_", " ").title(), **self.metadata}
+
+    # Names of the tiles in the pack, read from the directory or zip file without the index
+    def stream_names(self):
+        if self.is_zip:
+            for info in self.open_archive().infolist():
+                if not info.is_dir() and os.path.splitext(info.filename)[1].lower() in AssetManifest.IMAGE_EXTENSIONS:
+                    yield info.filename
+        else:
+            with os.scandir(self.path) as entries:
+                for entry in entries:
+                    if entry.is_file() and os.path.splitext(entry.name)[1].lower() in AssetManifest.IMAGE_EXTENSIONS:
+                        yield entry.name
+
+    def __len__(self) -> int:
+        self.load_index()
+        if self.count is None:
+            self.count = sum(1 for _ in self.stream_names())
+        return self.count
+
+    # Gets the paths of the tiles at positions, a pack without an index is read through once
+    def tiles_at(self, positions: list) -> list:
+        self.load_index()
+        if self.names is not None:
+            return [f"{self.path}/{self.names[position]}" for position in positions]
+        wanted = {position: index for index, position in enumerate(positions)}
+        tiles = [None] * len(positions)
+        for position, name in enumerate(self.stream_names()):
+            if position in wanted:
+                tiles[wanted[position]] = f"{self.path}/{name}"
+        return tiles
+
+    # Path or file of a tile to open with PIL
+    def open(self, path: str):
+        if not self.is_zip:
+            return path
+        return io.BytesIO(self.open_archive().read(path[len(self.path) + 1:]))
+
+    # Writes the index of a pack, keeping the metadata of an existing index
+    @classmethod
+    def build_index(cls, path: str):
+        pack = cls(path.rstrip("/\\"))
+        metadata = pack.get_metadata()
+        names = sorted(name for name in pack.stream_names())
+        data = json.dumps({**metadata, "tiles": names}, indent=2)
+        if not pack.is_zip:
+            with open(f"{pack.path}/{cls.INDEX_FILE}.tmp", "w") as index_file:
+                index_file.write(data)
+            os.replace(f"{pack.path}/{cls.INDEX_FILE}.tmp", f"{pack.path}/{cls.INDEX_FILE}")
+        elif cls.INDEX_FILE not in pack.open_archive().namelist():
+            pack.archive.close()
+            with zipfile.ZipFile(pack.path, "a") as archive:
+                archive.writestr(cls.INDEX_FILE, data, zipfile.ZIP_DEFLATED)
+        else:  # Zip files cannot replace a member, so the tiles are copied into a new zip file
+            with zipfile.ZipFile(f"{pack.path}.tmp", "w") as archive:
+                for info in pack.archive.infolist():
+                    if info.filename != cls.INDEX_FILE:
+                        archive.writestr(info, pack.archive.read(info))
+                archive.writestr(cls.INDEX_FILE, data, zipfile.ZIP_DEFLATED)
+            pack.archive.close()
+            os.replace(f"{pack.path}.tmp", pack.path)
+        print(f"Indexed {len(names)} tiles of \"{metadata['name']}\" in {pack.path}")
+
+
+# The tile categories of the asset manifest, loose directories and tile packs are used the same way
+class TileLibrary:
+    def __init__(self, assets: AssetManifest):
+        self.assets = assets
+        self.packs: dict = None  # Category -> TilePack, made when a deck is first dealt
+
+    def categories(self) -> dict:
+        if self.packs is None:
+            self.packs = {
+                category: TilePack(f"{self.assets.directory}/matching_tiles/{category}", [os.path.basename(path) for path in paths])
+                for category, paths in self.assets.categories().items()
+            }
+            self.packs.update({category: TilePack(path) for category, path in self.assets.tile_packs().items()})
+        return self.packs
+
+    # Remakes the packs of a changed folder, other packs keep their loaded index
+    def refresh(self, folder: str, changed: set):
+        if self.packs is None:
+            return
+        if folder == f"{self.assets.directory}/matching_tiles":
+            categories = {os.path.splitext(os.path.basename(path))[0] for path in changed}  # Zip packs
+        else:
+            categories = {os.path.basename(folder)}
+        loose = self.assets.categories()
+        tile_packs = self.assets.tile_packs()
+        for category in categories:
+            pack = self.packs.pop(category, None)
+            if pack is not None and pack.archive is not None:
+                pack.archive.close()
+            if category in tile_packs:
+                self.packs[category] = TilePack(tile_packs[category])
+            elif category in loose:
+                self.packs[category] = TilePack(f"{self.assets.directory}/matching_tiles/{category}", [os.path.basename(path) for path in loose[category]])
+
+    # Path or file of a tile to open with PIL, tiles in zip files are read from the zip
+    def open(self, path):
+        if isinstance(path, str) and ".zip/" in path.lower():
+            pack_path = path[:path.lower().index(".zip/") + 4]
+            for pack in self.categories().values():
+                if pack.path == pack_path:
+                    return pack.open(path)
+        return path
+
+
+# Watches the tile and music folders (and their subfolders) for files added, removed or rewritten
+# Uses inotify on Linux and polls folder mtimes otherwise, changed folders are listed on this thread and posted to Tk
+class AssetWatcher(threading.Thread):
+    WATCHED_FOLDERS = ("matching_tiles", "music")
+    POLL_SECONDS = 2.0  # Polling only sees files added, removed or renamed since folder mtimes do not change otherwise
+    DEBOUNCE_SECONDS = 0.25  # Events are gathered for this long, copying many files is handled as one change
+    # inotify flags, see inotify(7)
+    IN_CLOSE_WRITE, IN_MOVED_FROM, IN_MOVED_TO, IN_CREATE, IN_DELETE, IN_DELETE_SELF, IN_MOVE_SELF, IN_IGNORED = 0x8, 0x40, 0x80, 0x100, 0x200, 0x400, 0x800, 0x8000
+    IN_CLOEXEC = 0o2000000
+    EVENT = struct.Struct("iIII")  # Watch descriptor, mask, cookie, name length
+
+    def __init__(self, root: tk.Tk, assets: AssetManifest, on_change):
+        super(AssetWatcher, self).__init__(name="asset_watcher", daemon=True)
+        self.root = root
+        self.on_change = on_change  # Called on the Tk thread with the folder, its files (None if removed) and the names of rewritten files
+        self.roots = [f"{assets.directory}/{folder}" for folder in self.WATCHED_FOLDERS]
+        self.folders: dict = {}  # Folder -> mtime ns when last listed
+        self.stopped = threading.Event()
+        self.libc = None
+        self.inotify_fd = -1
+        self.watches: dict = {}  # inotify watch descriptor -> folder
+
+    def stop(self):
+        self.stopped.set()
+
+    def run(self):
+        for folder in self.roots:
+            self.list_folder(folder, notify=False)
+        try:
+            self.libc = ctypes.CDLL(None, use_errno=True)
+            self.libc.inotify_add_watch.argtypes = [ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32]
+            self.inotify_fd = self.libc.inotify_init1(self.IN_CLOEXEC)
+        except (OSError, TypeError, AttributeError):  # Not Linux
+            self.inotify_fd = -1
+        if self.inotify_fd < 0:
+            print("Watching assets by polling")
+            self.poll()
+            return
+        for folder in list(self.folders):
+            self.add_watch(folder)
+        self.watch()
+
+    def add_watch(self, folder: str):
+        if self.inotify_fd < 0:
+            return
+        mask = self.IN_CLOSE_WRITE | self.IN_MOVED_FROM | self.IN_MOVED_TO | self.IN_CREATE | self.IN_DELETE | self.IN_DELETE_SELF | self.IN_MOVE_SELF
+        watch_descriptor = self.libc.inotify_add_watch(self.inotify_fd, os.fsencode(folder), mask)
+        if watch_descriptor >= 0:
+            self.watches[watch_descriptor] = folder
+
+    # Lists the files of a folder and posts them, new and removed subfolders of the watched folders are listed too
+    def list_folder(self, folder: str, changed_names=(), notify: bool = True):
+        entries = {}
+        subfolders = set()
+        try:
+            mtime_ns = os.stat(folder).st_mtime_ns
+            with os.scandir(folder) as folder_entries:
+                for entry in folder_entries:
+                    if entry.is_dir():
+                        subfolders.add(f"{folder}/{entry.name}")
+                    elif entry.is_file():
+                        stat = entry.stat()
+                        entries[entry.name] = (stat.st_size, stat.st_mtime_ns)
+        except OSError:  # Removed
+            self.folders.pop(folder, None)
+            entries = None
+        else:
+            self.folders[folder] = mtime_ns
+
+        if folder in self.roots:
+            known = {known_folder for known_folder in self.folders if os.path.dirname(known_folder) == folder}
+            for subfolder in sorted(subfolders - known):
+                self.list_folder(subfolder, notify=notify)
+                self.add_watch(subfolder)
+            for subfolder in sorted(known - subfolders):
+                self.list_folder(subfolder, notify=notify)
+        if notify:
+            try:
+                self.root.after(0, self.on_change, folder, entries, tuple(changed_names))
+            except (RuntimeError, tk.TclError):  # Tk is not running or the window is destroyed
+                self.stop()
+
+    def poll(self):
+        while not self.stopped.wait(self.POLL_SECONDS):
+            for folder, mtime_ns in list(self.folders.items()):
+                try:
+                    changed = os.stat(folder).st_mtime_ns != mtime_ns
+                except OSError:
+                    changed = True
+                if changed and folder in self.folders:  # May be removed with its watched folder
+                    self.list_folder(folder)
+
+    # Reads the folders and file names of waiting inotify events
+    def read_events(self, changes: dict):
+        data = os.read(self.inotify_fd, 65536)
+        offset = 0
+        while offset + self.EVENT.size <= len(data):
+            watch_descriptor, mask, _, length = self.EVENT.unpack_from(data, offset)
+            name = os.fsdecode(data[offset + self.EVENT.size:offset + self.EVENT.size + length].rstrip(b"\0"))
+            offset += self.EVENT.size + length
+            folder = self.watches.get(watch_descriptor)
+            if mask & self.IN_IGNORED:  # The folder was removed
+                self.watches.pop(watch_descriptor, None)
+            if folder is not None:
+                changes[folder].add(name)
+
+    def watch(self):
+        while not self.stopped.is_set():
+            if not select.select([self.inotify_fd], [], [], 1.0)[0]:
+                continue
+            changes = collections.defaultdict(set)
+            self.read_events(changes)
+            while select.select([self.inotify_fd], [], [], self.DEBOUNCE_SECONDS)[0]:
+                self.read_events(changes)
+            for folder, names in changes.items():
+                if folder in self.folders or folder in self.roots:
+                    self.list_folder(folder, names - {""})
+        os.close(self.inotify_fd)
+
+
+# Music of each difficulty indexed once, tracks are picked from a shuffle bag so none repeats until the bag is empty
+class MusicLibrary:
+    EXTENSIONS = (".mp3", ".wav")
+    # Bitrates (kbps) of MP3 frame headers by bitrate index, for MPEG-1 and MPEG-2/2.5 layer III
+    MP3_BITRATES = {
+        1: (0, 32, 40, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320),
+        2: (0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160)
+    }
+    MP3_SAMPLE_RATES = {1: (44100, 48000, 32000), 2: (22050, 24000, 16000), 2.5: (11025, 12000, 8000)}
+
+    def __init__(self, assets: AssetManifest):
+        self.assets = assets
+        self.tracks: dict = {}  # Difficulty -> sorted track paths
+        self.difficulties: dict = {}  # Track path -> difficulty
+        self.hidden: set = set()
+        self.durations: dict = {}  # Track path -> seconds, measured when first needed
+        self.bags: dict = {}  # Difficulty -> tracks left in the current bag, the next track is last
+        self.rng = random.Random()
+        self.indexed = False  # Tracks are listed when music is first needed, not at startup
+
+    # Lists the tracks of each difficulty, only once
+    def index(self):
+        if self.indexed:
+            return
+        self.indexed = True
+        for difficulty, tracks in self.assets.tracks().items():
+            self.tracks[difficulty] = sorted(track for track in tracks if os.path.splitext(track)[1].lower() in self.EXTENSIONS)
+            for track in self.tracks[difficulty]:
+                self.difficulties[track] = difficulty
+        print(f"Indexed music: { {difficulty: len(tracks) for difficulty, tracks in self.tracks.items()} }")
+
+    def visible_tracks(self, difficulty: str) -> list:
+        self.index()
+        return [track for track in self.tracks.get(difficulty, []) if track not in self.hidden]
+
+    # Replaces the hidden tracks, e.g. when account options are applied
+    def set_hidden(self, tracks):
+        self.hidden = {track for track in tracks if track is not None}
+        self.bags.clear()
+
+    def hide(self, track):
+        self.index()
+        self.hidden.add(track)
+        bag = self.bags.get(self.difficulties.get(track))
+        if bag is not None and track in bag:
+            bag.remove(track)
+
+    # Shown tracks are put back into the current bag so they can play before the bag is empty
+    def unhide(self, track):
+        self.index()
+        self.hidden.discard(track)
+        bag = self.bags.get(self.difficulties.get(track))
+        if bag is not None and track not in bag:
+            bag.insert(self.rng.randint(0, len(bag)), track)
+
+    # Replaces the tracks of the difficulties that changed on disk, runs on the audio thread
+    def update_tracks(self, tracks: dict):
+        if not self.indexed:
+            return  # Indexed from the updated manifest when music is first needed
+        for difficulty in set(self.tracks) | set(tracks):
+            updated = sorted(track for track in tracks.get(difficulty, []) if os.path.splitext(track)[1].lower() in self.EXTENSIONS)
+            if updated == self.tracks.get(difficulty, []):
+                continue
+            for track in set(self.tracks.get(difficulty, [])) - set(updated):
+                self.difficulties.pop(track, None)
+                self.durations.pop(track, None)
+            for track in updated:
+                self.difficulties[track] = difficulty
+            self.tracks[difficulty] = updated
+            self.bags.pop(difficulty, None)  # The next bag has the new tracks
+        print(f"Updated music: { {difficulty: len(tracks) for difficulty, tracks in self.tracks.items()} }")
+
+    # Takes the next track of a difficulty from its bag, a new bag is shuffled when it is empty
+    def next_track(self, difficulty: str, current=None):
+        bag = self.bags.get(difficulty)
+        if not bag:
+            bag = self.visible_tracks(difficulty)
+            self.rng.shuffle(bag)
+            if len(bag) > 1 and bag[-1] == current:  # The first track of a new bag should not repeat the last one
+                bag[0], bag[-1] = bag[-1], bag[0]
+            self.bags[difficulty] = bag
+        if not bag:
+            return None
+        return bag.pop()
+
+    # Gets the length of a track in seconds, None if it cannot be measured
+    def duration(self, track):
+        if track not in self.durations:
+            try:
+                self.durations[track] = self.measure_duration(track)
+            except (OSError, EOFError, ValueError, wave.Error) as error:
+                print(f"Could not measure the length of \"{track}\": {error}")
+                self.durations[track] = None
+        return self.durations[track]
+
+    # Reads the length from the file headers instead of decoding the track
+    def measure_duration(self, track) -> float:
+        source = self.assets.open(track)
+        if track.lower().endswith(".wav"):
+            with wave.open(source) as wav_file:
+                return wav_file.getnframes() / wav_file.getframerate()
+
+        with open(source, "rb") if isinstance(source, str) else source as mp3_file:
+            header = mp3_file.read(10)
+            offset = 0
+            if header[:3] == b"ID3":  # Skips the ID3v2 tag, its size is stored in 7 bits of each byte
+                offset = 10 + (header[6] << 21 | header[7] << 14 | header[8] << 7 | header[9])
+            mp3_file.seek(offset)
+            data = mp3_file.read(4096)
+            file_size = mp3_file.seek(0, os.SEEK_END)
+
+        # First frame header
+        for position in range(len(data) - 4):
+            if data[position] == 0xFF and data[position + 1] & 0xE0 == 0xE0:
+                break
+        else:
+            raise ValueError("no MP3 frame found")
+        version_bits = (data[position + 1] >> 3) & 0x03
+        version = {0: 2.5, 2: 2, 3: 1}.get(version_bits)
+        bitrate_index = data[position + 2] >> 4
+        sample_rate_index = (data[position + 2] >> 2) & 0x03
+        if version is None or not 0 < bitrate_index < 15 or sample_rate_index == 3:
+            raise ValueError("invalid MP3 frame header")
+        sample_rate = self.MP3_SAMPLE_RATES[version][sample_rate_index]
+        samples_per_frame = 1152 if version == 1 else 576
+
+        # A Xing or Info header has the number of frames of variable bitrate files
+        for tag in (b"Xing", b"Info"):
+            tag_position = data.find(tag, position, position + 64)
+            if tag_position != -1 and data[tag_position + 7] & 0x01:
+                frames = int.from_bytes(data[tag_position + 8:tag_position + 12], "big")
+                return frames * samples_per_frame / sample_rate
+
+        bitrate = self.MP3_BITRATES[1 if version == 1 else 2][bitrate_index] * 1000
+        return (file_size - offset - position) * 8 / bitrate
+
+
+# Audio transcoded into a faster loading format, stored by content hash and built with --build-audio-cache
+class AudioCache:
+    FORMATS = ("wav", "ogg")
+    SOURCE_DIRECTORIES = ("assets/music", "assets/sound_effects")
+    SOURCE_EXTENSIONS = (".mp3", ".wav", ".ogg")
+
+    def __init__(self, directory: str = "cache/audio"):
+        self.directory = directory
+        self.index_file = f"{directory}/index.json"
+        self.files: dict = {}  # Source path -> {"size", "mtime_ns", "hash", "cached"}
+        self.resolved: dict = {}  # Source path -> cached path, only for cached files checked against their source
+        self.load()
+
+    def load(self):
+        try:
+            with open(self.index_file) as index_file:
+                self.files = json.load(index_file)['files']
+        except FileNotFoundError:
+            self.files = {}
+        except (OSError, ValueError, KeyError) as error:
+            print(f"Ignoring the audio cache, the index could not be read: {error}")
+            self.files = {}
+        self.resolved = {}
+        self.check(self.files)
+
+    # Checks the cached files of sources against the sources once, so resolving them does not touch the disk
+    def check(self, sources):
+        for source in sources:
+            self.resolved.pop(source, None)
+            entry = self.files.get(source)
+            if entry is None:
+                continue
+            try:
+                stat = os.stat(source)
+            except OSError:
+                continue
+            if stat.st_size == entry['size'] and stat.st_mtime_ns == entry['mtime_ns'] and os.path.exists(entry['cached']):
+                self.resolved[source] = entry['cached']
+
+    # Gets the cached version of a source file, or the source if it is not cached or had changed when checked
+    def resolve(self, source: str) -> str:
+        return self.resolved.get(source, source)
+
+    @classmethod
+    def find_sources(cls) -> list:
+        sources = []
+        for directory in cls.SOURCE_DIRECTORIES:
+            for folder, _, filenames in os.walk(directory):
+                sources.extend(
+                    f"{folder}/{filename}".replace(os.sep, "/")
+                    for filename in filenames
+                    if os.path.splitext(filename)[1].lower() in cls.SOURCE_EXTENSIONS
+                )
+        return sorted(sources)
+
+    # Transcodes one file in a worker process, returns the index entry
+    @staticmethod
+    def transcode_job(job) -> tuple:
+        source, directory, audio_format = job
+        start_time = time.perf_counter()
+        content_hash = AssetManifest.file_hash(source)
+        cached = f"{directory}/{content_hash}.{audio_format}"
+
+        if not os.path.exists(cached):  # Files with the same content are only transcoded once
+            temporary = f"{cached}.{os.getpid()}.tmp"
+            if audio_format == "wav":
+                # Decoded into the mixer's own sample format, so loading it is only a copy
+                os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+                if not pygame.mixer.get_init():
+                    pygame.mixer.init(frequency=44100, size=-16, channels=2)
+                frequency, size, channels = pygame.mixer.get_init()
+                raw = pygame.mixer.Sound(source).get_raw()
+                with wave.open(temporary, "wb") as wav_file:
+                    wav_file.setnchannels(channels)
+                    wav_file.setsampwidth(abs(size) // 8)
+                    wav_file.setframerate(frequency)
+                    wav_file.writeframes(raw)
+            else:
+                subprocess.run(
+                    ["ffmpeg", "-y", "-loglevel", "error", "-i", source, "-c:a", "libvorbis", "-q:a", "5", "-f", "ogg", temporary],
+                    check=True
+                )
+            os.replace(temporary, cached)
+
+        stat = os.stat(source)
+        entry = {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns, "hash": content_hash, "cached": cached}
+        return source, entry, time.perf_counter() - start_time
+
+    # Transcodes every changed source file with a process pool and writes the index
+    def build(self, audio_format: str = "wav", processes=None):
+        os.makedirs(self.directory, exist_ok=True)
+        sources = self.find_sources()
+        jobs = [
+            (source, self.directory, audio_format)
+            for source in sources
+            if self.resolve(source) == source or not self.files[source]['cached'].endswith(f".{audio_format}")
+        ]
+        print(f"Transcoding {len(jobs)} of {len(sources)} audio files to {audio_format}")
+
+        if jobs:
+            start_time = time.perf_counter()
+            # Workers are spawned, a forked copy of a process that has started the mixer can deadlock in SDL
+            with multiprocessing.get_context("spawn").Pool(processes) as pool:
+                for source, entry, seconds in pool.imap_unordered(self.transcode_job, jobs):
+                    self.files[source] = entry
+                    print(f"  {source} ({seconds:.2f}s)")
+            print(f"Transcoded in {time.perf_counter() - start_time:.2f}s")
+
+        # Forgets files that no longer exist, then writes the index like the data file
+        self.files = {source: entry for source, entry in self.files.items() if source in sources}
+        with open(f"{self.index_file}.tmp", "w") as index_file:
+            json.dump({"files": self.files}, index_file, indent=2)
+        os.replace(f"{self.index_file}.tmp", self.index_file)
+        self.load()
+
+        # Removes cached files no longer in the index
+        in_use = {os.path.basename(entry['cached']) for entry in self.files.values()}
+        for filename in os.listdir(self.directory):
+            if filename != os.path.basename(self.index_file) and filename not in in_use and not filename.endswith(".tmp"):
+                os.remove(f"{self.directory}/{filename}")
+
+        self.report(sources)
+
+    # Times loading each file from its source and from the cache
+    def report(self, sources: list):
+        os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+        if not pygame.mixer.get_init():
+            pygame.mixer.init(frequency=44100, size=-16, channels=2)
+        total_source = total_cached = 0
+        print(f"\n{'Load time (ms)':<60} {'source':>8} {'cached':>8}")
+        for source in sources:
+            cached = self.resolve(source)
+            load_times = []
+            for path in (source, cached):
+                start_time = time.perf_counter()
+                pygame.mixer.Sound(path)
+                load_times.append(time.perf_counter() - start_time)
+            total_source += load_times[0]
+            total_cached += load_times[1]
+            print(f"{source:<60} {load_times[0] * 1000:>8.1f} {load_times[1] * 1000:>8.1f}")
+        print(f"{'Total':<60} {total_source * 1000:>8.1f} {total_cached * 1000:>8.1f}")
+
+
+# Sound effects decoded once and played on a pool of mixer channels reserved for them
+class SoundBank:
+    # What to do when every channel is playing
+    STEAL_OLDEST = "oldest"  # Stop the sound that started first
+    STEAL_SAME = "same"  # Restart the same sound if it is playing, otherwise stop the oldest
+    STEAL_NONE = "none"  # Do not play the new sound
+
+    def __init__(self, assets: AssetManifest, channels=range(4), steal_policy: str = STEAL_SAME, audio_cache: AudioCache = None):
+        self.volume = 50
+        self.assets = assets
+        self.paths = assets.sound_effects()  # Name -> file
+        self.audio_cache = audio_cache  # Transcoded files are loaded instead of the sources if they are cached
+        self.steal_policy = steal_policy
+        self.sounds: dict = {}  # Name -> decoded pygame.mixer.Sound, None if it could not be loaded
+
+        # The channels should be reserved by the app so other sounds never take them
+        self.channels = [pygame.mixer.Channel(channel) for channel in channels]
+        self.playing = [None] * len(self.channels)  # Name of the last sound played on each channel
+        self.started_at = [0.0] * len(self.channels)
+
+    def set_volume(self, volume: int):
+        self.volume = volume
+
+    # Decodes a sound once, sounds are named by their file name without the extension
+    @tracer.trace()
+    def load(self, name: str):
+        if name in self.sounds:
+            return self.sounds[name]
+        sound = None
+        path = self.paths.get(name)
+        if path is None:
+            print(f"No sound effect named \"{name}\"")
+        else:
+            try:
+                sound = pygame.mixer.Sound(self.assets.open_audio(path, self.audio_cache))
+            except pygame.error as error:
+                print(f"Could not load sound \"{path}\": {error}")
+        self.sounds[name] = sound
+        return sound
+
+    # Decodes every sound in the directory, one each step
+    def preload_task(self):
+        for name in sorted(self.paths):
+            self.load(name)
+            yield
+
+    # Plays a sound at the app's volume, returns the channel or None if it was not played
+    def play(self, name: str):
+        sound = self.load(name)
+        if sound is None:
+            return None
+
+        index = self.find_channel(name)
+        if index is None:
+            return None
+        channel = self.channels[index]
+        channel.play(sound)
+        channel.set_volume(min((self.volume / 100) * 2, 1.0))  # Make volume percentage doubled
+        self.playing[index] = name
+        self.started_at[index] = time.perf_counter()
+        return channel
+
+    # Gets a free channel, or one to steal by the steal policy
+    def find_channel(self, name: str):
+        busy = [channel.get_busy() for channel in self.channels]
+        if not all(busy):
+            return busy.index(False)
+        if self.steal_policy == self.STEAL_NONE:
+            return None
+        if self.steal_policy == self.STEAL_SAME and name in self.playing:
+            return self.playing.index(name)
+        return min(range(len(self.channels)), key=self.started_at.__getitem__)
+
+
+# Plays music on two reserved channels, the next track is decoded ahead in a worker thread and crossfaded in
+class MusicPlayer:
+    CROSSFADE_MS = 3000
+    SKIP_FADE_MS = 300
+
+    def __init__(self, timers, channels=(4, 5), on_track_change=None, audio_cache: AudioCache = None, assets: AssetManifest = None):
+        self.timers = timers  # Has after() and after_cancel() like Tk, the audio service runs them on its thread
+        self.audio_cache = audio_cache  # Transcoded tracks are loaded instead of the sources if they are cached
+        self.assets = assets  # Tracks are loaded from the asset bundle if there is one
+        self.volume = 50
+        self.channels = [pygame.mixer.Channel(channel) for channel in channels]
+        self.active = 0  # Index of the channel playing the current track, the other one fades out
+        self.on_track_change = on_track_change  # Called with the track that will play next, None when stopped
+
+        self.decoder = concurrent.futures.ThreadPoolExecutor(max_workers=1, thread_name_prefix="music_decoder")
+        self.decoded: dict = {}  # Track -> future of its decoded Sound, only the current and next track are kept
+        self.next_track = None  # Function giving the track after the current one, None when music is stopped
+        self.current = None
+        self.upcoming = None  # Track decoded ahead to play after the current one
+        self.pending = None  # (track, fade ms) waiting for its decode to finish
+        self.clock = GameClock()  # Time the current track has played
+        self.length = 0
+        self.paused = False
+        self.end_id = None
+        self.poll_id = None
+
+    def music_volume(self) -> float:
+        return ((self.volume / 100) * 2) / 20  # Double percentage then divide by 20 since it is too loud
+
+    def set_volume(self, volume: int):
+        self.volume = volume
+        self.channels[self.active].set_volume(self.music_volume())
+
+    # Decodes a track, runs in the worker thread
+    @staticmethod
+    @tracer.trace("MusicPlayer.load_sound")
+    def load_sound(path):
+        return pygame.mixer.Sound(path)
+
+    # Starts decoding a track in the worker thread, if it is not already
+    def decode(self, track) -> concurrent.futures.Future:
+        future = self.decoded.get(track)
+        if future is None:
+            if self.assets is not None:
+                source = self.assets.open_audio(track, self.audio_cache)
+            else:
+                source = self.audio_cache.resolve(track) if self.audio_cache is not None else track
+            future = self.decoder.submit(self.load_sound, source)
+            self.decoded[track] = future
+        return future
+
+    # Starts playing the tracks given by next_track, fading in the first one
+    def start(self, next_track):
+        self.next_track = next_track
+        self.paused = False
+        self.skip(self.CROSSFADE_MS)
+
+    # Crossfades to the next track, instant when it has been decoded ahead
+    def skip(self, fade_ms: int = SKIP_FADE_MS):
+        if self.next_track is None:
+            return None
+        track = self.upcoming if self.upcoming is not None else self.next_track()
+        self.upcoming = None
+        if self.on_track_change is not None:
+            self.on_track_change(track)
+        if track is None:
+            print("No music to play, the list is empty or all hidden")
+            return None
+        self.cancel_timers()
+        self.pending = (track, fade_ms)
+        self.play_pending()
+        return track
+
+    # Plays the pending track once it is decoded, checking again shortly if it is not
+    def play_pending(self):
+        self.poll_id = None
+        track, fade_ms = self.pending
+        future = self.decode(track)
+        if not future.done():
+            self.poll_id = self.timers.after(20, self.play_pending)
+            return
+        self.pending = None
+        try:
+            sound = future.result()
+        except (pygame.error, OSError) as error:
+            print(f"Could not decode music \"{track}\": {error}")
+            self.decoded.pop(track, None)
+            return
+
+        old_channel = self.channels[self.active]
+        self.active = 1 - self.active
+        new_channel = self.channels[self.active]
+        old_channel.fadeout(fade_ms)
+        new_channel.play(sound, fade_ms=fade_ms)
+        new_channel.set_volume(self.music_volume())
+        print(f"Playing music \"{track}\" with volume: {new_channel.get_volume()}")
+
+        self.current = track
+        self.length = sound.get_length()
+        self.clock = GameClock()
+        if self.paused:  # Paused while the track was decoding
+            new_channel.pause()
+        else:
+            self.clock.start()
+            self.schedule_track_end()
+
+        # Decodes the track after this one, only the playing and next tracks are kept
+        self.decoded = {track: future}
+        self.upcoming = self.next_track()
+        if self.upcoming is not None:
+            self.decode(self.upcoming)
+
+    # The next track starts fading in before the current one ends
+    def schedule_track_end(self):
+        remaining_ms = (self.length - self.clock.elapsed()) * 1000 - self.CROSSFADE_MS
+        self.end_id = self.timers.after(max(int(remaining_ms), 0), self.on_track_end)
+
+    def on_track_end(self):
+        self.end_id = None
+        self.skip(self.CROSSFADE_MS)
+
+    def cancel_timers(self):
+        for after_id in (self.end_id, self.poll_id):
+            if after_id is not None:
+                self.timers.after_cancel(after_id)
+        self.end_id = None
+        self.poll_id = None
+
+    def pause(self):
+        self.paused = True
+        for channel in self.channels:
+            channel.pause()
+        self.clock.stop()
+        if self.end_id is not None:
+            self.timers.after_cancel(self.end_id)
+            self.end_id = None
+
+    def unpause(self):
+        self.paused = False
+        for channel in self.channels:
+            channel.unpause()
+        self.channels[self.active].set_volume(self.music_volume())
+        print(f"Resuming music with volume: {self.channels[self.active].get_volume()}")
+        if self.current is not None and self.pending is None and self.end_id is None:
+            self.clock.start()
+            self.schedule_track_end()
+
+    # Fades out the music and forgets the decoded tracks
+    def stop(self, fade_ms: int = 0):
+        self.cancel_timers()
+        for channel in self.channels:
+            if fade_ms > 0 and not self.paused:
+                channel.fadeout(fade_ms)
+            else:
+                channel.stop()
+        self.next_track = None
+        self.current = None
+        self.upcoming = None
+        self.pending = None
+        self.paused = False
+        self.decoded.clear()
+        if self.on_track_change is not None:
+            self.on_track_change(None)
+
+    def shutdown(self):
+        for future in self.decoded.values():  # cancel_futures of Executor.shutdown needs Python 3.9
+            future.cancel()
+        self.stop()
+        self.decoder.shutdown(wait=False)
+
+
+# Owns the pygame mixer on its own thread, the Tk thread sends it commands and gets music changes back through after()
+class AudioService(threading.Thread):
+    def __init__(self, root: tk.Tk, music_library: MusicLibrary, volume: int, on_music_change):
+        super(AudioService, self).__init__(name="audio", daemon=True)
+        self.root = root
+        self.music_library = music_library  # Only changed by the audio thread once it is started
+        self.volume = volume
+        self.on_music_change = on_music_change  # Called on the Tk thread with the track that plays next
+        self.commands = queue.Queue()  # Functions run on the audio thread, None stops it
+        self.timers: list = []  # Heap of (due time, timer id, function)
+        self.timer_ids = itertools.count()
+        self.cancelled_timers: set = set()
+        self.closing = False
+        self.started = False  # A thread can only be started once
+        self.available = True  # False once the mixer failed to start, e.g. without an audio device
+
+        # Created on the audio thread
+        self.audio_cache = None
+        self.sound_effects = None
+        self.music_player = None
+
+    # Commands, called from the Tk thread
+
+    # Queues a command, the thread (and the mixer) is only started once a command plays audio
+    def send(self, command, plays_audio: bool = True):
+        if not self.available:  # Commands are dropped without audio
+            return
+        self.commands.put(command)
+        if plays_audio and not self.started and not self.closing:
+            self.started = True
+            self.start()
+
+    def play_effect(self, name: str):
+        self.send(lambda: self.sound_effects.play(name))
+
+    # Starts music for a difficulty, tracks are taken from the library's shuffle bag
+    def play_music(self, difficulty: str):
+        self.send(lambda: self.music_player.start(lambda: self.music_library.next_track(difficulty, self.music_player.current)))
+
+    def skip_music(self):
+        self.send(lambda: self.music_player.skip())
+
+    def pause_music(self):
+        self.send(lambda: self.music_player.pause(), plays_audio=False)
+
+    def unpause_music(self):
+        self.send(lambda: self.music_player.unpause(), plays_audio=False)
+
+    def stop_music(self, fade_ms: int = 0):
+        self.send(lambda: self.music_player.stop(fade_ms), plays_audio=False)
+
+    def set_volume(self, volume: int):
+        self.send(lambda: self.apply_volume(volume), plays_audio=False)
+
+    def hide_music(self, track):
+        self.send(lambda: self.music_library.hide(track), plays_audio=False)
+
+    def unhide_music(self, track):
+        self.send(lambda: self.music_library.unhide(track), plays_audio=False)
+
+    def update_tracks(self, tracks: dict):
+        tracks = {difficulty: list(difficulty_tracks) for difficulty, difficulty_tracks in tracks.items()}  # Copied for the audio thread
+        self.send(lambda: self.music_library.update_tracks(tracks), plays_audio=False)
+
+    # Checks the cached versions of changed audio files again, a changed file is loaded from its source until it is cached
+    def check_audio_cache(self, paths):
+        paths = list(paths)
+        self.send(lambda: self.audio_cache.check(paths), plays_audio=False)
+
+    def set_hidden_music(self, tracks):
+        tracks = list(tracks)  # The list may be changed by the Tk thread
+        self.send(lambda: self.music_library.set_hidden(tracks), plays_audio=False)
+
+    # Stops the music and the thread, waits briefly so the mixer is not cut off mid command
+    def shutdown(self):
+        self.closing = True
+        if self.is_alive():
+            self.commands.put(None)
+            self.join(timeout=1)
+
+    # Timers for the music player, run on the audio thread
+
+    def after(self, ms: int, function):
+        timer_id = next(self.timer_ids)
+        heapq.heappush(self.timers, (time.perf_counter() + ms / 1000, timer_id, function))
+        return timer_id
+
+    def after_cancel(self, timer_id):
+        self.cancelled_timers.add(timer_id)
+
+    # Runs on the audio thread
+
+    def apply_volume(self, volume: int):
+        self.volume = volume
+        self.sound_effects.set_volume(volume)
+        self.music_player.set_volume(volume)
+
+    # Posts a music change to the Tk thread
+    def post_music_change(self, track):
+        if self.closing:
+            return
+        try:
+            self.root.after(0, self.on_music_change, track)
+        except (RuntimeError, tk.TclError):  # Tk is not running or the window is destroyed
+            pass
+
+    def run(self):
+        try:
+            pygame.mixer.init()
+            # Channels 0-3 are for sound effects and 4-5 for music, reserved so pygame never picks them for other sounds
+            pygame.mixer.set_num_channels(8)
+            pygame.mixer.set_reserved(6)
+        except pygame.error as error:
+            print(f"Audio is unavailable: {error}")
+            self.available = False
+            return
+        self.audio_cache = AudioCache()
+        self.sound_effects = SoundBank(self.music_library.assets, channels=range(0, 4), audio_cache=self.audio_cache)
+        self.music_player = MusicPlayer(self, channels=(4, 5), on_track_change=self.post_music_change, audio_cache=self.audio_cache, assets=self.music_library.assets)
+        self.apply_volume(self.volume)
+        for _ in self.sound_effects.preload_task():  # Sound effects are decoded once, before any command
+            pass
+
+        while True:
+            timeout = max(self.timers[0][0] - time.perf_counter(), 0) if self.timers else None
+            try:
+                command = self.commands.get(timeout=timeout)
+            except queue.Empty:
+                command = False  # A timer is due
+            if command is None:
+                break
+            if command:
+                self.run_safely(command)
+
+            # Runs the timers that are due
+            while self.timers and self.timers[0][0] <= time.perf_counter():
+                _, timer_id, function = heapq.heappop(self.timers)
+                if timer_id in self.cancelled_timers:
+                    self.cancelled_timers.discard(timer_id)
+                    continue
+                self.run_safely(function)
+
+        self.music_player.shutdown()
+
+    # Runs a command or timer, an error is printed instead of stopping the audio thread
+    @staticmethod
+    def run_safely(function):
+        try:
+            function()
+        except (pygame.error, OSError, ValueError) as error:
+            print(f"Audio command failed: {error}")
+
+
+# Game timer using monotonic time, the time of finished runs is kept in an accumulator
+class GameClock:
+    def __init__(self):
+        self.accumulated = 0.0  # Seconds of the runs before the current one
+        self.started_at = None  # perf_counter() of the current run, None when stopped
+
+    @property
+    def running(self) -> bool:
+        return self.started_at is not None
+
+    def start(self):
+        if self.started_at is None:
+            self.started_at = time.perf_counter()
+
+    def stop(self):
+        if self.started_at is not None:
+            self.accumulated += time.perf_counter() - self.started_at
+            self.started_at = None
+
+    # Gets the seconds the clock has been running
+    def elapsed(self) -> float:
+        if self.started_at is None:
+            return self.accumulated
+        return self.accumulated + (time.perf_counter() - self.started_at)
+
+    # Gets the milliseconds until the elapsed time reaches the next whole second
+    def ms_until_next_second(self) -> int:
+        elapsed = self.elapsed()
+        return max(math.ceil((math.floor(elapsed) + 1 - elapsed) * 1000), 1)
+
+
+# Matching Tiles rules without any Tk, cards are indexed by row * columns + col
+class MatchingTilesEngine:
+    # Events returned by select()
+    IGNORED = 0  # Card is found or a blank
+    SELECTED = 1
+    DESELECTED = 2
+    MATCH = 3
+    MISMATCH = 4  # Not a mistake, at least one of the cards was not revealed before
+    MISTAKE = 5  # Both cards were revealed before
+
+    BASE_SCORES = {"easy": 50, "normal": 100, "hard": 200}
+    TIME_PENALISE_MULTIPLIER = 0.2
+    MINIMUM_SCORE = -100
+
+    def __init__(self, rows: int, columns: int, deck: list, difficulty: str = "easy"):
+        self.rows = rows
+        self.columns = columns
+        self.difficulty = difficulty
+        self.base_score = self.BASE_SCORES[difficulty]
+
+        # Each different tile in the deck gets a pair id, cards past the end of the deck are blanks (-1)
+        self.tiles = list(dict.fromkeys(deck))
+        pair_ids = {tile: pair_id for pair_id, tile in enumerate(self.tiles)}
+        card_count = rows * columns
+        self.pairs = [pair_ids[tile] for tile in deck[:card_count]]
+        self.pairs.extend([-1] * (card_count - len(self.pairs)))
+
+        self.revealed = bytearray(card_count)
+        self.found = bytearray(1 if pair_id == -1 else 0 for pair_id in self.pairs)  # Blanks are already found
+        self.remaining_pairs = (card_count - sum(self.found)) // 2
+        self.selected = -1  # First selected card, -1 when none is selected
+        self.last_pair = (-1, -1)  # Cards of the last checked pair
+        self.mistakes = 0
+        self.moves = 0
+
+    # Deals a deck from the tiles, each dealt tile is in the deck twice (shuffled)
+    @staticmethod
+    def deal(tiles: list, rows: int, columns: int, rng=random) -> list:
+        deck = rng.sample(tiles, min((rows * columns) // 2, len(tiles)))  # Half the number of cards (round down), only picks those
+        deck.extend(deck)  # Duplicates list, so there is pairs of each
+        rng.shuffle(deck)
+        return deck
+
+    @property
+    def completed(self) -> bool:
+        return self.remaining_pairs == 0
+
+    # Gets the tile of the card, None for blanks
+    def tile(self, index: int):
+        pair_id = self.pairs[index]
+        return None if pair_id == -1 else self.tiles[pair_id]
+
+    # Selects a card, checks the pair when it is the second selected card and returns the event
+    def select(self, index: int) -> int:
+        if self.found[index]:
+            return self.IGNORED
+        first = self.selected
+        if first == -1:
+            self.selected = index
+            return self.SELECTED
+        if first == index:
+            self.selected = -1
+            return self.DESELECTED
+
+        self.selected = -1
+        self.last_pair = (first, index)
+        self.moves += 1
+        revealed = self.revealed
+        if self.pairs[first] == self.pairs[index]:
+            self.found[first] = self.found[index] = 1
+            revealed[first] = revealed[index] = 1
+            self.remaining_pairs -= 1
+            return self.MATCH
+
+        event = self.MISTAKE if revealed[first] and revealed[index] else self.MISMATCH
+        if event == self.MISTAKE:
+            self.mistakes += 1
+        revealed[first] = revealed[index] = 1
+        return event
+
+    # Gets the time penalty, only whole seconds are penalised
+    def time_penalty(self, seconds_taken: float) -> float:
+        return round(math.floor(seconds_taken) * self.TIME_PENALISE_MULTIPLIER, 1)
+
+    # Calculates the score after the time taken
+    def score(self, seconds_taken: float) -> float:
+        score = self.base_score - self.mistakes - math.floor(seconds_taken) * self.TIME_PENALISE_MULTIPLIER
+        return max(round(score, 1), self.MINIMUM_SCORE)  # Prevent float point arithmetic, set minimum score -100.
+
+
+# Records the input of a game into a preallocated ring buffer, each event is packed in place so clicks are not slowed down
+class InputRecorder:
+    MAGIC = b"RCLREC01"
+    EVENT = struct.Struct("<dhb")  # Monotonic timestamp (perf_counter seconds), card index (-1 for none), outcome
+    HEADER_SIZE = struct.Struct("<I")  # Size of the JSON header after the magic, the events follow the header
+    CAPACITY = 4096  # Events kept, the oldest are overwritten once a game has more
+
+    # Outcomes other than the engine's select() events, which are recorded as they are
+    START = -1
+    PAUSE = -2
+    UNPAUSE = -3
+
+    def __init__(self, capacity: int = CAPACITY):
+        self.capacity = capacity
+        self.buffer = bytearray(self.EVENT.size * capacity)
+        self.pack_into = self.EVENT.pack_into
+        self.count = 0  # Events recorded, including overwritten ones
+        self.started = time.perf_counter()
+        self.flushed = False
+
+    def record(self, index: int, outcome: int):
+        self.pack_into(self.buffer, (self.count % self.capacity) * self.EVENT.size, time.perf_counter(), index, outcome)
+        self.count += 1
+
+    @property
+    def dropped(self) -> int:
+        return max(self.count - self.capacity, 0)
+
+    # Gets the recorded events oldest first
+    def events(self) -> bytes:
+        if self.count <= self.capacity:
+            return bytes(self.buffer[:self.count * self.EVENT.size])
+        split = (self.count % self.capacity) * self.EVENT.size
+        return bytes(self.buffer[split:] + self.buffer[:split])
+
+    # Gets the contents of a recording file with the game in the header, the buffer can keep recording afterwards
+    def dump(self, header: dict) -> bytes:
+        events = self.events()
+        header = json.dumps({**header, "started": self.started, "events": len(events) // self.EVENT.size, "dropped": self.dropped}).encode()
+        return self.MAGIC + self.HEADER_SIZE.pack(len(header)) + header + events
+
+    # Writes a recording file, returns its path
+    @staticmethod
+    def write(directory: str, name: str, data: bytes) -> str:
+        os.makedirs(directory, exist_ok=True)
+        path = os.path.join(directory, name)
+        with open(f"{path}.tmp", "wb") as recording_file:
+            recording_file.write(data)
+        os.replace(f"{path}.tmp", path)
+        print(f"Recorded {path}")
+        return path
+
+    # Reads a recording file, returns the header and a list of (timestamp, index, outcome)
+    @classmethod
+    def load(cls, path: str):
+        with open(path, "rb") as recording_file:
+            data = recording_file.read()
+        if data[:len(cls.MAGIC)] != cls.MAGIC:
+            raise ValueError(f"{path} is not a recording")
+        header_size, = cls.HEADER_SIZE.unpack_from(data, len(cls.MAGIC))
+        header_end = len(cls.MAGIC) + cls.HEADER_SIZE.size + header_size
+        header = json.loads(data[len(cls.MAGIC) + cls.HEADER_SIZE.size:header_end])
+        events = data[header_end:]
+        if len(events) != header['events'] * cls.EVENT.size:
+            raise ValueError(f"{path} is incomplete")
+        return header, list(cls.EVENT.iter_unpack(events))
+
+
+# Re-runs a recorded Matching Tiles game against the engine, checks the outcomes and reports how it was played
+class GameReplay:
+    OUTCOME_NAMES = {
+        MatchingTilesEngine.IGNORED: "ignored",
+        MatchingTilesEngine.SELECTED: "selected",
+        MatchingTilesEngine.DESELECTED: "deselected",
+        MatchingTilesEngine.MATCH: "match",
+        MatchingTilesEngine.MISMATCH: "mismatch",
+        MatchingTilesEngine.MISTAKE: "mistake",
+        InputRecorder.START: "start",
+        InputRecorder.PAUSE: "pause",
+        InputRecorder.UNPAUSE: "unpause"
+    }
+
+    def __init__(self, path: str, speed: float = 1.0):
+        self.path = path
+        self.speed = speed  # 2 replays twice as fast, 0 replays without waiting
+
+    # Replays the game, returns the number of outcomes that differ from the recording
+    def run(self) -> int:
+        header, events = InputRecorder.load(self.path)
+        # Blanks are always after the dealt cards, so the deck is the pair ids in board order
+        deck = [pair_id for pair_id in header['pairs'] if pair_id != -1]
+        engine = MatchingTilesEngine(header['rows'], header['columns'], deck, header['difficulty'])
+        print(f"Replaying {header['game']} ({header['difficulty']}, seed {header['seed']}): {len(events)} events")
+        checked = header['dropped'] == 0
+        if not checked:
+            print(f"The first {header['dropped']} events were overwritten, outcomes are not checked")
+
+        differences = 0
+        started = False
+        running_since = None  # Timestamp the game clock last started, None while paused or not started
+        game_time = 0.0
+        last_timestamp = events[0][0] if events else 0.0
+        last_click = None
+        click_gaps = []
+        revisits = 0
+        for timestamp, index, outcome in events:
+            if self.speed > 0:
+                time.sleep(max(timestamp - last_timestamp, 0) / self.speed)
+            last_timestamp = timestamp
+            if running_since is not None:
+                game_time += timestamp - running_since
+                running_since = timestamp
+
+            if outcome == InputRecorder.START or (outcome == InputRecorder.UNPAUSE and started):
+                started = True
+                running_since = timestamp
+                last_click = None
+            elif outcome == InputRecorder.PAUSE:
+                running_since = None
+                last_click = None
+
+            if index == -1:
+                print(f"{game_time:9.3f}s  {self.OUTCOME_NAMES.get(outcome, outcome)}")
+                continue
+
+            if last_click is not None:
+                click_gaps.append(timestamp - last_click)
+            last_click = timestamp
+            if engine.revealed[index] and not engine.found[index]:
+                revisits += 1
+            replayed = engine.select(index)
+            row, col = divmod(index, engine.columns)
+            line = f"{game_time:9.3f}s  card {row},{col}  {self.OUTCOME_NAMES.get(outcome, outcome)}"
+            if checked and replayed != outcome:
+                differences += 1
+                line += f" (replayed as {self.OUTCOME_NAMES.get(replayed, replayed)})"
+            print(line)
+
+        print(f"Moves: {engine.moves}, mistakes: {engine.mistakes}, score: {engine.score(game_time)}, completed: {engine.completed}")
+        if header.get("score") is not None:
+            print(f"Recorded score: {header['score']} in {header['seconds']}s with {header['mistakes']} mistakes")
+        if click_gaps:
+            print(f"Time between clicks: {statistics.mean(click_gaps):.3f}s average, {statistics.median(click_gaps):.3f}s median")
+        print(f"Clicks on cards already seen: {revisits}")
+        if checked:
+            print("Replay matches the recording" if differences == 0 else f"Replay differs from the recording in {differences} outcomes")
+        return differences
+
+
+# Simulated player for the simulation, remembers up to memory revealed cards (None remembers every card)
+class SimulatedPlayer:
+    def __init__(self, rng: random.Random, memory=None):
+        self.rng = rng
+        self.memory = memory
+        self.remembered = collections.OrderedDict()  # Card index -> pair id, oldest first
+
+    # Parses a player model name: "perfect", "random" or "memory:<k>"
+    @staticmethod
+    def parse_memory(model: str):
+        if model == "perfect":
+            return None
+        if model == "random":
+            return 0
+        name, _, memory = model.partition(":")
+        if name != "memory" or not memory.isdigit():
+            raise ValueError(f"Unknown player model \"{model}\", use perfect, random or memory:<k>")
+        return int(memory)
+
+    def remember(self, index, pair_id):
+        if self.memory == 0:
+            return
+        self.remembered[index] = pair_id
+        self.remembered.move_to_end(index)
+        if self.memory is not None and len(self.remembered) > self.memory:
+            self.remembered.popitem(last=False)  # Forgets the oldest card
+
+    # Selects two cards on the engine and returns the event of the pair
+    def play_move(self, engine: MatchingTilesEngine) -> int:
+        found = engine.found
+        unfound = [index for index in range(len(found)) if not found[index]]
+
+        # A known pair is selected straight away
+        seen = {}
+        for index, pair_id in self.remembered.items():
+            if pair_id in seen:
+                return self.select_pair(engine, seen[pair_id], index)
+            seen[pair_id] = index
+
+        unknown = [index for index in unfound if index not in self.remembered] or unfound
+        first = self.rng.choice(unknown)
+        pair_id = engine.pairs[first]
+        second = seen.get(pair_id)
+        if second is None or second == first:
+            others = [index for index in unknown if index != first] or [index for index in unfound if index != first]
+            second = self.rng.choice(others)
+        return self.select_pair(engine, first, second)
+
+    def select_pair(self, engine: MatchingTilesEngine, first, second) -> int:
+        engine.select(first)
+        event = engine.select(second)
+        if event == MatchingTilesEngine.MATCH:
+            self.remembered.pop(first, None)
+            self.remembered.pop(second, None)
+        else:
+            self.remember(first, engine.pairs[first])
+            self.remember(second, engine.pairs[second])
+        return event
+
+
+# Runs simulated Matching Tiles games across processes, reports scores and the drift of the account score
+class MatchingTilesSimulation:
+    def __init__(self, board_sizes: dict, players: list, difficulties: list, games: int = 1000,
+                 games_per_player: int = 50, seconds_per_move: float = 2.0, seed: int = 0, processes=None):
+        self.board_sizes = board_sizes
+        self.players = players
+        self.difficulties = difficulties
+        self.games = games
+        self.games_per_player = games_per_player
+        self.seconds_per_move = seconds_per_move
+        self.seed = seed
+        self.processes = processes
+
+    # Jobs are one simulated player playing games in a row, so the account score drifts as it would for a user
+    def make_jobs(self) -> list:
+        jobs = []
+        players_needed = max(math.ceil(self.games / self.games_per_player), 1)
+        for model in self.players:
+            for difficulty in self.difficulties:
+                rows, columns = self.board_sizes[difficulty]
+                for player in range(players_needed):
+                    games = min(self.games_per_player, self.games - player * self.games_per_player)
+                    seed = f"{self.seed}:{model}:{difficulty}:{player}"
+                    jobs.append((model, difficulty, rows, columns, games, self.seconds_per_move, seed))
+        return jobs
+
+    # Plays the games of one job, runs in a worker process
+    @staticmethod
+    def run_job(job) -> dict:
+        model, difficulty, rows, columns, games, seconds_per_move, seed = job
+        rng = random.Random(seed)
+        tiles = list(range((rows * columns) // 2))  # The engine only needs tiles to be different
+        overall_score = 0
+        scores, mistakes, moves, changes = [], [], [], []
+        for _ in range(games):
+            engine = MatchingTilesEngine(rows, columns, MatchingTilesEngine.deal(tiles, rows, columns, rng), difficulty)
+            player = SimulatedPlayer(rng, SimulatedPlayer.parse_memory(model))
+            while not engine.completed:
+                player.play_move(engine)
+            score = engine.score(round(engine.moves * seconds_per_move))
+            overall_change = RecollectApp.overall_score_change(overall_score, score, difficulty)
+            overall_score = round(overall_score + overall_change, 1)
+            scores.append(score)
+            mistakes.append(engine.mistakes)
+            moves.append(engine.moves)
+            changes.append(overall_change)
+        return {
+            "model": model, "difficulty": difficulty, "scores": scores, "mistakes": mistakes,
+            "moves": moves, "overall_score": overall_score, "last_change": changes[-1] if changes else 0
+        }
+
+    def run(self):
+        jobs = self.make_jobs()
+        start_time = time.perf_counter()
+        with multiprocessing.get_context("spawn").Pool(self.processes) as pool:
+            results = pool.map(self.run_job, jobs, chunksize=max(len(jobs) // ((self.processes or os.cpu_count() or 1) * 4), 1))
+        elapsed = time.perf_counter() - start_time
+        self.report(results, elapsed)
+        return results
+
+    @staticmethod
+    def describe(values: list) -> str:
+        if len(values) < 2:
+            return f"mean {statistics.fmean(values):.1f}" if values else "no games"
+        deciles = statistics.quantiles(values, n=10)
+        return (
+            f"mean {statistics.fmean(values):.1f}, stdev {statistics.stdev(values):.1f}, min {min(values)}, "
+            f"p10 {deciles[0]:.1f}, median {statistics.median(values):.1f}, p90 {deciles[-1]:.1f}, max {max(values)}"
+        )
+
+    def report(self, results: list, elapsed: float):
+        total_games = sum(len(result['scores']) for result in results)
+        print(f"Simulated {total_games} games in {elapsed:.2f}s ({total_games / max(elapsed, 1e-9):.0f} games/sec)")
+        for model in self.players:
+            for difficulty in self.difficulties:
+                group = [result for result in results if result['model'] == model and result['difficulty'] == difficulty]
+                overall_scores = [result['overall_score'] for result in group]
+                print(f"\n{model} on {difficulty} ({sum(len(result['scores']) for result in group)} games)")
+                print(f"  Score: {self.describe([score for result in group for score in result['scores']])}")
+                print(f"  Mistakes: {self.describe([count for result in group for count in result['mistakes']])}")
+                print(f"  Moves: {self.describe([count for result in group for count in result['moves']])}")
+                print(f"  Account score after each player's games (up to {self.games_per_player}): {self.describe(overall_scores)}")
+                print(f"  Last account score change: {self.describe([result['last_change'] for result in group])}")
+
+
+# Replays the game history of every account to recompute overall scores, e.g. after changing the scoring constants
+# Accounts are replayed in lockstep with NumPy if it is installed (one at a time otherwise), in chunks over worker processes
+class RatingEngine:
+    CHUNK_SIZE = 2000  # Accounts per worker job
+
+    def __init__(self, data_file: str = "data.json", divisors: dict = None, loss_curve: float = None, gain_curve: float = None, processes=None):
+        self.data_file = data_file
+        self.divisors = divisors or dict(RecollectApp.DIFFICULTY_SCORE_DIVISORS)
+        self.loss_curve = RecollectApp.SCORE_LOSS_CURVE if loss_curve is None else loss_curve
+        self.gain_curve = RecollectApp.SCORE_GAIN_CURVE if gain_curve is None else gain_curve
+        self.processes = processes
+
+    # Gets (username, starting rating, [(score, difficulty)...]) of each account with a history, games of all types in the order played
+    def histories(self, users: dict) -> list:
+        histories = []
+        for username, user_data in users.items():
+            games = [entry for game_data in user_data.get("game_data", {}).values() for entry in game_data.get("history", [])]
+            if not games:
+                continue
+            games.sort(key=lambda entry: entry['time'])  # Stable, games saved in the same second stay in order
+            unknown = {entry['difficulty'] for entry in games} - set(self.divisors)
+            if unknown:
+                raise ValueError(f"No divisor for difficulty {', '.join(sorted(unknown))} (account \"{username}\")")
+            histories.append((username, user_data.get("rating_start", 0), [(entry['score'], entry['difficulty']) for entry in games]))
+        return histories
+
+    # Replays a chunk of accounts, runs in a worker process
+    @staticmethod
+    def replay_job(job) -> list:
+        chunk, divisors, loss_curve, gain_curve = job
+        try:
+            import numpy
+        except ImportError:  # Optional, each account is replayed like the app does
+            numpy = None
+
+        if numpy is None:
+            ratings = []
+            for _, rating, games in chunk:
+                for score, difficulty in games:
+                    rating = round(rating + RecollectApp.overall_score_change(rating, score, difficulty, divisors, loss_curve, gain_curve), 1)
+                ratings.append(rating)
+            return ratings
+
+        # Every account takes its nth game at the same step, shorter histories are padded with NaN and keep their rating
+        relative_scores = numpy.full((len(chunk), max(len(games) for _, _, games in chunk)), numpy.nan)
+        for row, (_, _, games) in enumerate(chunk):
+            relative_scores[row, :len(games)] = [score / divisors[difficulty] for score, difficulty in games]
+        ratings = numpy.array([rating for _, rating, _ in chunk], dtype=float)
+        for column in relative_scores.T:
+            difference = column - ratings
+            change = RatingEngine.round_tenths(numpy, numpy.where(difference < 0, loss_curve * difference, gain_curve * difference))
+            ratings = numpy.where(numpy.isnan(column), ratings, RatingEngine.round_tenths(numpy, ratings + change))
+        return ratings.tolist()
+
+    # Rounds to one decimal place exactly like round(value, 1)
+    # numpy.round scales by 10 first, which can move a value across a tie, so values close to a tie are rounded by round()
+    @staticmethod
+    def round_tenths(numpy, values):
+        rounded = numpy.round(values, 1)
+        scaled = values * 10
+        for index in numpy.flatnonzero(numpy.abs(scaled - numpy.floor(scaled) - 0.5) < 1e-6):
+            rounded[index] = round(float(values[index]), 1)
+        return rounded
+
+    # Recomputes every rating and reports the change, the data file is only written if it is not a dry run
+    def run(self, dry_run: bool = False):
+        with open(self.data_file, "r") as data_file:
+            data = json.load(data_file)
+        users = data.get("users", {})
+        start_time = time.perf_counter()
+        histories = sorted(self.histories(users), key=lambda history: len(history[2]))  # Chunks of similar lengths pad less
+        jobs = [
+            (histories[start:start + self.CHUNK_SIZE], self.divisors, self.loss_curve, self.gain_curve)
+            for start in range(0, len(histories), self.CHUNK_SIZE)
+        ]
+        if len(jobs) > 1:
+            with multiprocessing.get_context("spawn").Pool(self.processes) as pool:
+                results = pool.map(self.replay_job, jobs)
+        else:
+            results = [self.replay_job(job) for job in jobs]
+        ratings = {history[0]: rating for history, rating in zip(histories, itertools.chain.from_iterable(results))}
+        elapsed = time.perf_counter() - start_time
+
+        self.report(users, ratings, elapsed)
+        self.check_defaults(users, ratings)
+        if dry_run:
+            print("Dry run, the data file was not changed")
+            return ratings
+
+        for username, rating in ratings.items():
+            users[username]['overall_score'] = rating
+        with open(f"{self.data_file}.tmp", "w") as data_file:
+            json.dump(data, data_file, indent=2)
+        if os.path.exists(self.data_file):
+            os.replace(self.data_file, f"{self.data_file}.bak")  # Kept in case the new constants are not wanted
+        os.replace(f"{self.data_file}.tmp", self.data_file)
+        print(f"Wrote {len(ratings)} ratings to {self.data_file}, the previous file is {self.data_file}.bak")
+        return ratings
+
+    # With the app's own constants, a replay must give every account the rating the app stored
+    def check_defaults(self, users: dict, ratings: dict):
+        if (self.divisors, self.loss_curve, self.gain_curve) != (RecollectApp.DIFFICULTY_SCORE_DIVISORS, RecollectApp.SCORE_LOSS_CURVE, RecollectApp.SCORE_GAIN_CURVE):
+            return
+        different = [username for username, rating in ratings.items() if rating != users[username].get("overall_score", 0)]
+        if not different:
+            print("  The default constants reproduce every stored overall score")
+            return
+        print(
+            f"  {len(different)} accounts do not get their stored overall score back with the default constants, "
+            f"their history may be incomplete: {', '.join(different[:5])}{', ...' if len(different) > 5 else ''}"
+        )
+
+    def report(self, users: dict, ratings: dict, elapsed: float):
+        print(
+            f"Replayed {len(ratings)} accounts in {elapsed:.2f}s "
+            f"(divisors {self.divisors}, loss curve {self.loss_curve}, gain curve {self.gain_curve})"
+        )
+        if len(ratings) < len(users):
+            print(f"  {len(users) - len(ratings)} accounts have no game history and are unchanged")
+        if not ratings:
+            return
+        old = [users[username].get("overall_score", 0) for username in ratings]
+        new = list(ratings.values())
+        changes = [round(rating - previous, 1) for rating, previous in zip(new, old)]
+        print(f"  Before: {MatchingTilesSimulation.describe(old)}")
+        print(f"  After:  {MatchingTilesSimulation.describe(new)}")
+        print(f"  Change: {MatchingTilesSimulation.describe(changes)}")
+        largest = sorted(zip(ratings, old, new), key=lambda account: abs(account[2] - account[1]), reverse=True)[:5]
+        print("  Largest changes: " + ", ".join(f"{username} {previous} -> {rating}" for username, previous, rating in largest))
+
+
+# Aggregates of each user's results per game and difficulty, stored in user_data['statistics'][game][difficulty]
+# Updated with every result (running mean and variance by Welford's method), so the statistics screen never reads the history
+class GameStatistics:
+    METRICS = ("score", "seconds", "mistakes")
+    HISTOGRAM_BUCKETS = 10
+    HISTOGRAM_WIDTH = 5  # Buckets of the score relative to easy mode (0-50 on every difficulty), the last bucket has higher scores
+
+    @staticmethod
+    def add_value(metric: dict, value):
+        metric['count'] += 1
+        delta = value - metric['mean']
+        metric['mean'] += delta / metric['count']
+        metric['m2'] += delta * (value - metric['mean'])
+        metric['min'] = value if metric['min'] is None else min(metric['min'], value)
+        metric['max'] = value if metric['max'] is None else max(metric['max'], value)
+
+    @staticmethod
+    def stdev(metric: dict) -> float:
+        return math.sqrt(metric['m2'] / (metric['count'] - 1)) if metric['count'] > 1 else 0.0
+
+    # Adds a result (a history entry) to the statistics of its game and difficulty
+    @classmethod
+    def add_result(cls, user_data: dict, game: str, result: dict):
+        difficulty = result['difficulty']
+        statistics = user_data.setdefault("statistics", {}).setdefault(game, {}).setdefault(difficulty, {
+            "games": 0,
+            **{metric: {"count": 0, "mean": 0.0, "m2": 0.0, "min": None, "max": None} for metric in cls.METRICS},
+            "histogram": [0] * cls.HISTOGRAM_BUCKETS,
+            "last_day": None, "day_streak": 0, "best_day_streak": 0,  # Days played in a row
+            "perfect_streak": 0, "best_perfect_streak": 0  # Games without mistakes in a row
+        })
+        statistics['games'] += 1
+        for metric in cls.METRICS:
+            if result.get(metric) is not None:
+                cls.add_value(statistics[metric], result[metric])
+
+        relative_score = result['score'] / RecollectApp.DIFFICULTY_SCORE_DIVISORS.get(difficulty, 1)
+        statistics['histogram'][min(max(int(relative_score // cls.HISTOGRAM_WIDTH), 0), cls.HISTOGRAM_BUCKETS - 1)] += 1
+
+        day = datetime.date.fromtimestamp(result['time']).toordinal()
+        if statistics['last_day'] != day:
+            statistics['day_streak'] = statistics['day_streak'] + 1 if statistics['last_day'] == day - 1 else 1
+            statistics['last_day'] = day
+        statistics['best_day_streak'] = max(statistics['best_day_streak'], statistics['day_streak'])
+        if result.get("mistakes") is not None:
+            statistics['perfect_streak'] = statistics['perfect_streak'] + 1 if result['mistakes'] == 0 else 0
+            statistics['best_perfect_streak'] = max(statistics['best_perfect_streak'], statistics['perfect_streak'])
+
+    # Counts the statistics of an account from its game history, once for accounts made before statistics were kept
+    @classmethod
+    def rebuild(cls, user_data: dict):
+        user_data['statistics'] = {}
+        for game, game_data in user_data.get("game_data", {}).items():
+            for result in game_data.get("history", []):
+                cls.add_result(user_data, game, result)
+
+
+# Times the phases of startup until the first screen is drawn and idle, run with --profile-startup
+class StartupProfile:
+    def __init__(self, start_time: float):
+        self.start_time = start_time
+        self.last_time = start_time
+        self.phases: list = []  # (phase, seconds, seconds since start)
+        self.background_phases: list = []  # (phase, seconds since start) of work done alongside the phases
+
+    def add(self, phase: str, seconds: float):
+        self.phases.append((phase, seconds, self.last_time + seconds - self.start_time))
+        self.last_time += seconds
+
+    def mark(self, phase: str):
+        self.add(phase, time.perf_counter() - self.last_time)
+
+    def mark_background(self, phase: str):
+        self.background_phases.append((phase, time.perf_counter() - self.start_time))
+
+    # Marks when the first frame is drawn, the backgrounds are drawn and prefetching is done, then closes the app
+    def watch(self, app: RecollectApp):
+        app.root.wait_visibility()
+        app.root.update_idletasks()
+        self.mark("first frame")
+        self.wait_for(app, TaskScheduler.VISIBLE_REDRAW, "backgrounds drawn", lambda: self.wait_for(app, TaskScheduler.PREFETCH, "next screens prefetched", lambda: self.finish(app)))
+
+    def wait_for(self, app: RecollectApp, priority: int, phase: str, then):
+        if not app.scheduler.is_idle(priority):
+            app.root.after(1, lambda: self.wait_for(app, priority, phase, then))
+            return
+        app.root.update_idletasks()
+        self.mark(phase)
+        then()
+
+    def finish(self, app: RecollectApp):
+        self.report()
+        app.on_close()
+
+    def report(self):
+        print(f"\n{'Startup phase':<32} {'ms':>8} {'total ms':>10}")
+        for phase, seconds, total in self.phases:
+            print(f"{phase:<32} {seconds * 1000:>8.1f} {total * 1000:>10.1f}")
+        for phase, total in self.background_phases:
+            print(f"{phase + ' (background)':<32} {'':>8} {total * 1000:>10.1f}")
+
+
+# Drives the real app with generated events and records how long each step takes, run with --benchmark-ui
+class UIBenchmark:
+    DIFFICULTY_KEYS = {"easy": "e", "normal": "n", "hard": "h"}
+    RESIZE_GEOMETRIES = ("1000x750", "750x563")
+
+    def __init__(self, app: RecollectApp, iterations: int = 5, difficulties=("easy", "normal", "hard"), output: str = "benchmark_ui.json"):
+        self.app = app
+        self.root = app.root
+        self.iterations = iterations
+        self.difficulties = difficulties
+        self.output = output
+        self.timings = collections.defaultdict(list)  # Step -> seconds of each run
+        self.script = self.run_script()
+        self.condition = None  # Function the script is waiting on
+        self.condition_time = 0  # Time the condition became True
+
+        self.game = None  # Matching Tiles screen being played
+        self.finish_start_time = None
+        self.summary_shown = False
+        self.original_methods = {}
+
+    # Replaces methods of the game with ones recording times, restored once the benchmark finishes
+    def patch_game(self):
+        benchmark = self
+        create_grid = Games.MatchingTiles.create_grid
+        on_finish_game = Games.MatchingTiles.on_finish_game
+        summary_task = Games.MatchingTiles.summary_task
+        self.original_methods = {"create_grid": create_grid, "on_finish_game": on_finish_game, "summary_task": summary_task}
+
+        def timed_create_grid(game, rows, columns):
+            benchmark.game = game
+            start_time = time.perf_counter()
+            engine = create_grid(game, rows, columns)
+            benchmark.timings['create_grid'].append(time.perf_counter() - start_time)
+            return engine
+
+        def timed_on_finish_game(game):
+            benchmark.finish_start_time = time.perf_counter()
+            on_finish_game(game)
+
+        def timed_summary_task(game, *args):
+            yield from summary_task(game, *args)
+            benchmark.summary_shown = True
+
+        Games.MatchingTiles.create_grid = timed_create_grid
+        Games.MatchingTiles.on_finish_game = timed_on_finish_game
+        Games.MatchingTiles.summary_task = timed_summary_task
+
+    def restore_game(self):
+        for name, method in self.original_methods.items():
+            setattr(Games.MatchingTiles, name, method)
+
+    def start(self):
+        # Scores of the benchmark games are saved to a benchmark user
+        self.app.username = "benchmark"
+        if self.app.get_user_data(self.app.username) is None:
+            self.app.add_new_user_data(self.app.username, "benchmark")
+        self.patch_game()
+        self.root.after_idle(self.advance)
+
+    # Runs the script until it waits, a yielded number waits that many ms, a yielded function waits until it returns True
+    def advance(self):
+        if self.condition is not None:
+            if not self.condition():
+                self.root.after(1, self.advance)
+                return
+            self.condition_time = time.perf_counter()
+            self.condition = None
+        try:
+            wait = next(self.script)
+        except StopIteration:
+            self.finish()
+            return
+        if callable(wait):
+            self.condition = wait
+            self.root.after_idle(self.advance)
+        else:
+            self.root.after(wait, self.advance)
+
+    # Screen is drawn and no input or redraw work is waiting
+    def settled(self) -> bool:
+        if not self.app.scheduler.is_idle(TaskScheduler.VISIBLE_REDRAW):
+            return False
+        self.root.update_idletasks()
+        return True
+
+    def press_key(self, key):
+        self.root.event_generate("<KeyPress>", keysym=key)
+        self.root.event_generate("<KeyRelease>", keysym=key)
+
+    def click_card(self, index):
+        board = self.game.game_canvas
+        x, y = board.card_position(index)
+        x, y = x + board.card_size // 2, y + board.card_size // 2
+        board.event_generate("<ButtonPress-1>", x=x, y=y)
+        board.event_generate("<ButtonRelease-1>", x=x, y=y)
+
+    # Waits for the screen to change then settle, returns the time it took
+    def wait_for_new_screen(self, old_screen, start_time):
+        yield lambda: self.app.current_screen is not old_screen and self.settled()
+        return self.condition_time - start_time
+
+    def run_script(self):
+        self.root.wait_visibility()
+        for iteration in range(self.iterations):
+            difficulty = self.difficulties[iteration % len(self.difficulties)]
+            print(f"Benchmark iteration {iteration + 1}/{self.iterations} ({difficulty})")
+            self.app.show_screen(Screens.Homepage(self.root, self.app).get())
+            yield self.settled
+            yield 200  # Keys closer than the debounce are ignored
+
+            # Homepage to game selection
+            start_time = time.perf_counter()
+            old_screen = self.app.current_screen
+            self.press_key("s")
+            self.timings['homepage_to_game_selection'].append((yield from self.wait_for_new_screen(old_screen, start_time)))
+
+            self.press_key("1")  # Matching Tiles
+            yield self.settled
+
+            # Game selection to the game screen, create_grid is timed while the screen is built
+            start_time = time.perf_counter()
+            old_screen = self.app.current_screen
+            self.press_key(self.DIFFICULTY_KEYS[difficulty])
+            self.timings['game_selection_to_game'].append((yield from self.wait_for_new_screen(old_screen, start_time)))
+
+            game = self.game
+            game.on_click_start()
+            yield self.settled
+
+            # Resize to settled, the board is fitted and the backgrounds redrawn
+            for geometry in self.RESIZE_GEOMETRIES:
+                width, height = (int(size) for size in geometry.split("x"))
+                start_time = time.perf_counter()
+                self.root.geometry(geometry)
+                yield lambda: self.root.winfo_width() == width and self.root.winfo_height() == height and self.settled()
+                self.timings['resize_to_settled'].append(self.condition_time - start_time)
+
+            # Clicks every pair, the second card of each pair is timed until both faces are drawn
+            cards = {}
+            for index, pair_id in enumerate(game.engine.pairs):
+                if pair_id != -1:
+                    cards.setdefault(pair_id, []).append(index)
+            self.finish_start_time = None
+            self.summary_shown = False
+            for first, second in cards.values():
+                start_time = time.perf_counter()
+                self.click_card(first)
+                yield self.settled
+                self.timings['click_to_selected'].append(self.condition_time - start_time)
+
+                start_time = time.perf_counter()
+                self.click_card(second)
+                yield lambda: game.game_canvas.image_items[first] is not None and game.game_canvas.image_items[second] is not None and self.settled()
+                self.timings['click_to_face_shown'].append(self.condition_time - start_time)
+
+            # The game finishes once the last pair is hidden, then the summary is shown over a few frames
+            yield lambda: self.summary_shown and self.settled()
+            self.timings['finish_to_summary'].append(self.condition_time - self.finish_start_time)
+            self.game = None
+
+    # Nearest rank percentiles of the timings in milliseconds
+    @staticmethod
+    def describe(samples: list) -> dict:
+        ordered = sorted(sample * 1000 for sample in samples)
+
+        def percentile(percent):
+            return round(ordered[max(math.ceil(percent / 100 * len(ordered)) - 1, 0)], 3)
+
+        return {
+            "count": len(ordered),
+            "mean": round(statistics.fmean(ordered), 3),
+            "min": round(ordered[0], 3),
+            "p50": percentile(50),
+            "p90": percentile(90),
+            "p95": percentile(95),
+            "p99": percentile(99),
+            "max": round(ordered[-1], 3),
+            "samples": [round(sample, 3) for sample in ordered]
+        }
+
+    def finish(self):
+        self.restore_game()
+        results = {
+            "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "iterations": self.iterations,
+            "difficulties": list(self.difficulties),
+            "display": os.environ.get("DISPLAY"),
+            "unit": "ms",
+            "steps": {step: self.describe(samples) for step, samples in self.timings.items()}
+        }
+        with open(self.output, "w") as output_file:
+            json.dump(results, output_file, indent=2)
+        for step, stats in results['steps'].items():
+            print(f"{step}: p50 {stats['p50']}ms, p95 {stats['p95']}ms, max {stats['max']}ms ({stats['count']} runs)")
+        print(f"Benchmark results written to {self.output}")
+        self.app.on_close()
+
+    # Starts Xvfb when there is no display, returns the process so it can be stopped
+    @staticmethod
+    def start_virtual_display(display: int = 99):
+        if os.environ.get("DISPLAY") or os.name == "nt":
+            return None
+        process = subprocess.Popen(["Xvfb", f":{display}", "-screen", "0", "1280x1024x24", "-nolisten", "tcp"], stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        socket_path = f"/tmp/.X11-unix/X{display}"
+        for _ in range(100):  # Waits up to 5s for the display to be ready
+            if os.path.exists(socket_path) or process.poll() is not None:
+                break
+            time.sleep(0.05)
+        if process.poll() is not None:
+            raise OSError(f"Xvfb exited with code {process.returncode}")
+        os.environ["DISPLAY"] = f":{display}"
+        return process
+
+
 class Games:
     class MatchingTiles(BaseScreen):
         def __init__(self, root: tk.Tk, app: RecollectApp, difficulty: str):
@@ -1633,10 +4541,10 @@ class Games:
 
             self.game = "Matching Tiles"
             self.difficulty = difficulty
+            self.app.last_difficulty = difficulty
             print(f"Started Matching Tiles game with difficulty {difficulty}")
-            self.time_penalise_multiplier = 0.2
-
-            self.app.music_playing = None
+            self.deal_seed = None  # Seed of the dealt board, saved with the result
+            self.music_started = False
 
             self.canvas.config(bg=self.app.theme_data['accent'])
 
@@ -1655,7 +4563,7 @@ class Games:
             pause_button = RoundedButton(
                 top_bar_canvas, font=("", 0, ""),
                 width=50, height=50, radius=0, text_padding=0,
-                image=ImageTk.PhotoImage(Image.open("assets/icons/pause.png").convert("RGBA").resize((35, 35))),
+                image=self.app.prefetcher.get_photo_image("assets/icons/pause.png", (35, 35)),
                 button_background=self.app.theme_data['btn_bg'], button_foreground="#000000",
                 button_hover_background=self.app.theme_data['btn_hvr'], button_hover_foreground="#000000",
                 button_press_background=self.app.theme_data['btn_prs'], button_press_foreground="#000000",
@@ -1680,289 +4588,329 @@ class Games:
             )
             self.start_button.pack(anchor=tk.CENTER, pady=(50, 0))
 
-            rows, columns = 4, 4
-            if self.difficulty == "hard":
-                rows, columns = 5, 6
-            elif self.difficulty == "normal":
-                columns = 5
-            self.grid = [[{} for _ in range(columns)] for _ in range(rows)]
-
-            self.game_canvas = tk.Canvas(self.canvas, borderwidth=0, highlightthickness=0, bg="white")
-            self.create_grid(rows, columns)
-
-            self.base_score = 50
-            if self.difficulty == "hard":
-                self.base_score = 200
-            elif self.difficulty == "normal":
-                self.base_score = 100
-            self.selected_grids = []
-            self.mistakes = 0
+            rows, columns = self.app.BOARD_SIZES[self.difficulty]
+
+            # All cards are drawn on one canvas
+            self.game_canvas = TileBoard(
+                self.canvas, rows=rows, columns=columns,
+                card_size=80, gap=5, radius=29, bg="white",
+                card_background=self.app.theme_data['btn_bg'],
+                card_hover_background=self.app.theme_data['btn_hvr'],
+                card_press_background=self.app.theme_data['btn_prs'],
+                outline_colour=self.app.theme_data['outline'], outline_width=1,
+                command=self.on_click_card
+            )
+            self.fit_board()
+            self.engine = self.create_grid(rows, columns)
+
             self.game_started = False
 
-            self.time_elapsed = []
-            self.last_start_time = 0
-            self.schedule_loop_id = None  # Loop handles time updates and music end event
+            # Clicks and pauses are recorded for every game, but only written with --record
+            self.recorder = InputRecorder()
+            self.canvas.bind("<Destroy>", lambda e: self.flush_recording(), add="+")  # Games left unfinished are written too
 
-            self.finish_init()
+            self.clock = GameClock()
+            self.clock_tick_id = None  # Time and score labels are updated when each whole second passes
+            self.time_text = None
+            self.score_text = None
 
-        def on_keyboard_press(self, key):
-            if key == "escape":
-                self.root.unbind("<KeyRelease>")
-                self.on_pause()
+            self.keymap = {
+                "escape": self.on_pause
+            }
 
-        # Selects the photos for the grid and creates it on the canvas
-        def create_grid(self, rows, columns):
+            self.finish_init()
+
+        # The game is paused or finished next, then game selection is shown
+        def prefetch_next_screen(self):
+            self.app.prefetcher.prefetch_pause_menu()
+            self.app.prefetcher.prefetch_game_selection()
+
+        # Selects the photos for the grid, creates the game engine and disables blank cards
+        @tracer.trace()
+        def create_grid(self, rows, columns) -> MatchingTilesEngine:
+            # Use the deck prefetched while choosing the difficulty if there is one, unless a board is reproduced from a seed
+            if self.app.deal_seed is not None:
+                self.deal_seed, list_of_photos = self.deal_deck(self.app.tiles.categories(), self.difficulty, rows, columns, self.app.deal_seed)
+            else:
+                deck = self.app.prefetcher.take_deck(self.difficulty, rows, columns)
+                if deck is None:
+                    deck = self.deal_deck(self.app.tiles.categories(), self.difficulty, rows, columns)
+                self.deal_seed, list_of_photos = deck
+            print(f"Selected categories: {sorted({os.path.basename(os.path.dirname(path)) for path in list_of_photos})} (seed {self.deal_seed})")  # Only for the deck played, prefetched decks are not printed
+
+            engine = MatchingTilesEngine(rows, columns, list_of_photos, self.difficulty)
+            for index, pair_id in enumerate(engine.pairs):
+                if pair_id == -1:  # In case there is not enough images for squares
+                    # No image, no callback (disable card), and already found by the engine
+                    self.game_canvas.set_card_enabled(index, False)
+                    self.change_card_bg(index, "#6f727b", "#6f727b", "#6f727b")
+
+            # Decode the dealt images before they are revealed
+            self.app.scheduler.add(self.decode_tiles_task(engine.tiles), TaskScheduler.INPUT_FEEDBACK, owner=self)
+            return engine
+
+        # Decodes the tile image of each dealt photo, one each step
+        def decode_tiles_task(self, tiles):
+            for path in tiles:
+                self.get_tile_image(path)
+                yield
+
+        # Selects the photos for a board from a seed (random if not given), each photo is in the list twice (shuffled)
+        # Returns the seed and the deck, the same seed and categories always deal the same board
+        @staticmethod
+        def deal_deck(categories: dict, difficulty, rows, columns, seed: int = None):
+            if seed is None:
+                seed = random.getrandbits(32)
+            rng = random.Random(seed)
+            selected_folder = sorted(categories)
+            if difficulty in {"normal", "hard"}:
+                selected_folder = [rng.choice(selected_folder)]  # If normal or hard, only select one category
+
+            # Samples positions in the selected categories as if they were one list, then reads only those tiles of each category
+            ends = list(itertools.accumulate(len(categories[folder]) for folder in selected_folder))
+            positions = rng.sample(range(ends[-1]), min((rows * columns) // 2, ends[-1]))
+            category_positions = collections.defaultdict(list)
+            for position in positions:
+                index = bisect.bisect_right(ends, position)
+                category_positions[index].append(position - (ends[index - 1] if index > 0 else 0))
             list_of_photos = []
-            selected_folder = [
-                folder
-                for folder in os.listdir("assets/matching_tiles")
-                if os.path.isdir(f"assets/matching_tiles/{folder}")
-            ]
-            if self.difficulty in {"normal", "hard"}:
-                selected_folder = [random.choice(selected_folder)]  # If normal or hard, only select one category
-            print(f"Selected categories: {selected_folder}")
-
-            for folder in selected_folder:
-                # Add each item with path to list_of_photos
-                list_of_photos.extend([f"assets/matching_tiles/{folder}/{filename}" for filename in os.listdir(f"assets/matching_tiles/{folder}")])
-
-            # Checks if file has ".png"
-            list_of_photos = [file for file in list_of_photos if ".png" in file]
-
-            random.shuffle(list_of_photos)  # Shuffles all photos
-            list_of_photos = list_of_photos[:(rows * columns) // 2]  # Cuts list to number of squares divided by 2 (round down)
-            list_of_photos.extend(list_of_photos)  # Duplicates list, so there is pairs of each
-            random.shuffle(list_of_photos)  # Shuffles all photos
-
-            for row in range(len(self.grid)):
-                for col in range(len(self.grid[row])):
-                    card_button = RoundedButton(
-                        self.game_canvas, font=("", 0, ""),
-                        width=80, height=80, radius=29, text_padding=0,
-                        button_background=self.app.theme_data['btn_bg'], button_foreground="#000000",
-                        button_hover_background=self.app.theme_data['btn_hvr'], button_hover_foreground="#000000",
-                        button_press_background=self.app.theme_data['btn_prs'], button_press_foreground="#000000",
-                        outline_colour=self.app.theme_data['outline'], outline_width=1,
-                        command=lambda r=row, c=col: self.on_click_card(r, c)
-                    )
-                    card_button.grid(row=row, column=col, padx=(5, (5 if col == columns - 1 else 0)), pady=(5, (5 if row == rows - 1 else 0)))
-                    self.grid[row][col]['button'] = card_button
-                    self.grid[row][col]['revealed'] = False
-                    self.grid[row][col]['found'] = False
-                    try:
-                        self.grid[row][col]['image'] = list_of_photos.pop(0)
-                    except IndexError:  # In case there is not enough images for squares
-                        # No image, no callback (disable button), and made already found
-                        self.grid[row][col]['image'] = None
-                        self.grid[row][col]['button'].command = None
-                        self.grid[row][col]['found'] = True
-                        self.change_grid_button_bg(row, col, "#6f727b", "#6f727b", "#6f727b")
-
-        def loop_handler(self):
-            self.update_time()
-            self.check_music_event()
+            for index, offsets in category_positions.items():
+                list_of_photos.extend(categories[selected_folder[index]].tiles_at(offsets))
 
-            if self.schedule_loop_id is not None:
-                self.game_canvas.after_cancel(self.schedule_loop_id)
-            self.schedule_loop_id = self.game_canvas.after(100, self.loop_handler)  # Loops after 100ms or 0.1s
+            return seed, MatchingTilesEngine.deal(list_of_photos, rows, columns, rng)
 
-        def play_music(self):
-            # Add each item with path to list_of_photos
-            list_of_music = [f"assets/music/{self.difficulty}/{filename}" for filename in os.listdir(f"assets/music/{self.difficulty}")]
-            # Checks if file has ".mp3" or ".wav"
-            list_of_music = [file for file in list_of_music if ".mp3" in file or ".wav" in file]
-            print(f"List of music: {list_of_music}")
-
-            if not list_of_music:  # List of music is empty
-                print("No music to play, the list is empty")
-                self.app.music_playing = None
-            elif set(list_of_music).issubset(self.app.hidden_music):  # List of music is all hidden
-                print("No music to play, all hidden")
-                self.app.music_playing = None
-            elif visible_music := [music for music in list_of_music if music not in self.app.hidden_music]:  # Ensures visible music list is not None (assigns variable and checks at once)
-                print(f"List of available music: {visible_music}")
-                with contextlib.suppress(ValueError):
-                    visible_music.remove(self.app.music_playing)  # Prevents looping of the same music
-                if visible_music:  # If the only music is not current playing, otherwise it will loop
-                    self.app.music_playing = random.choice(visible_music)
-            else:
-                print("No music to play, all hidden")
-                self.app.music_playing = None
+        # Fits the board into the space below the top bar
+        def fit_board(self, _=None):
+            if not self.game_canvas.winfo_exists():  # Board is destroyed when the game finishes
+                return
+            self.game_canvas.fit(self.root.winfo_width() - 20, self.root.winfo_height() - 130)
 
-            if self.app.music_playing is not None:
-                pygame.mixer.music.load(self.app.music_playing)
-                pygame.mixer.music.set_volume(((self.app.volume.get() / 100) * 2) / 20)  # Double percentage then divide by 20 since it is too loud
-                print(f"Playing music \"{self.app.music_playing}\" with volume: {pygame.mixer.music.get_volume()}")
-                pygame.mixer.music.play(fade_ms=3000)  # Fade in in 3s
+        # Gets the tile image at the current card size, decoding it if it is not cached
+        def get_tile_image(self, path):
+            size = max(self.game_canvas.card_size - 10, 1)
+            return self.app.prefetcher.get_photo_image(path, (size, size), contain=True)
 
-        def check_music_event(self):
-            for event in pygame.event.get():
-                if event.type == self.app.MUSIC_END_EVENT:
-                    print("Detected music ended, playing next music")
-                    self.play_music()
+        # Updates the labels and schedules the next update at the next whole second
+        def on_clock_tick(self):
+            self.clock_tick_id = None
+            self.update_time()
+            self.clock_tick_id = self.game_canvas.after(self.clock.ms_until_next_second(), self.on_clock_tick)
+
+        # Starts the clock and its label updates
+        def start_clock(self):
+            self.clock.start()
+            self.on_clock_tick()
+
+        # Stops the clock and cancels its scheduled label updates
+        def stop_clock(self):
+            self.clock.stop()
+            if self.clock_tick_id is not None:
+                self.game_canvas.after_cancel(self.clock_tick_id)
+            self.clock_tick_id = None
+
+        # Starts the music for the difficulty, or skips to the next track once it has started
+        def play_music(self):
+            if not self.music_started:
+                self.music_started = True
+                self.app.audio.play_music(self.difficulty)
+            else:  # Skipped from the pause menu
+                self.app.audio.skip_music()
 
         # Stops timer and goes to pause menu
         def on_pause(self):
+            self.recorder.record(-1, InputRecorder.PAUSE)
             if self.game_started is True:
-                self.time_elapsed.append(time.time() - self.last_start_time)
-                if self.schedule_loop_id is not None:
-                    self.game_canvas.after_cancel(self.schedule_loop_id)
+                self.stop_clock()
 
             print("Music paused")
-            pygame.mixer.music.pause()
+            self.app.audio.pause_music()
 
             self.app.show_overlaying_screen(Screens.PauseMenu(self.root, self.app, self.game, self.difficulty, self).get())
 
         # Continues the timer
         def on_unpause(self):
-            pygame.mixer.music.set_volume(((self.app.volume.get() / 100) * 2) / 20)  # Double percentage then divide by 20 since it is too loud
-            print(f"Resuming music with volume: {pygame.mixer.music.get_volume()}")
-            pygame.mixer.music.unpause()
+            self.recorder.record(-1, InputRecorder.UNPAUSE)
+            self.app.audio.unpause_music()
 
             if self.game_started is True:
-                self.last_start_time = time.time()
-                self.loop_handler()  # Starts loop for time update and music end event
+                self.start_clock()
 
         # Starts the game and timer
         def on_click_start(self):
+            self.recorder.record(-1, InputRecorder.START)
             self.game_started = True
             self.heading.destroy()
             self.start_button.destroy()
             self.game_canvas.pack(anchor="center", pady=(30, 0), expand=True)
+            self.canvas.bind("<Configure>", self.fit_board, add="+")  # Resizes cards with the window
 
             self.play_music()
 
-            self.last_start_time = time.time()
-            self.loop_handler()  # Starts loop for time update and music end event
+            self.start_clock()
 
-        # Loops and called from self.loop_handler
+        # Called from self.on_clock_tick when a whole second passes
         def update_time(self):
-            seconds_taken = sum(self.time_elapsed) + (time.time() - self.last_start_time)
-            if seconds_taken < 3600:
-                time_taken = time.strftime("%M:%S", time.gmtime(seconds_taken))
-            else:
-                time_taken = time.strftime("%H:%M:%S", time.gmtime(seconds_taken))
-            self.time_label.config(text=f"Time Elapsed: {time_taken}")
+            minutes, seconds = divmod(math.floor(self.clock.elapsed()), 60)
+            hours, minutes = divmod(minutes, 60)
+            time_taken = f"{minutes:02}:{seconds:02}" if hours == 0 else f"{hours:02}:{minutes:02}:{seconds:02}"
+            text = f"Time Elapsed: {time_taken}"
+            if text != self.time_text:  # Labels are only reconfigured when their text changes
+                self.time_text = text
+                self.time_label.config(text=text)
 
             self.update_score()  # Score may be affected by time elapsed, so it needs to be updated
 
         # Recalculate score and change label at top bar
         def update_score(self):
-            score = self.base_score
-            score -= self.mistakes
-            seconds_taken = sum(self.time_elapsed) + (time.time() - self.last_start_time)
-            score -= math.floor(seconds_taken) * self.time_penalise_multiplier
-            score = max(round(score, 1), -100)  # Prevent float point arithmetic, set minimum score -100.
-            self.score_label.config(text=f"Score: {score}")
+            score = self.engine.score(self.clock.elapsed())
+            text = f"Score: {score}"
+            if text != self.score_text:
+                self.score_text = text
+                self.score_label.config(text=text)
             return score
 
         # Selects the clicked card and check the selected card if 2 are selected
         def on_click_card(self, row, col):
-            grid_num = (row, col)
-            if grid_num in self.selected_grids:
-                self.selected_grids.remove(grid_num)
-                self.change_grid_button_bg(row, col, self.app.theme_data['btn_bg'], self.app.theme_data['btn_hvr'], self.app.theme_data['btn_prs'])
-                return
-
-            self.selected_grids.append(grid_num)
-            self.change_grid_button_bg(row, col, self.app.theme_data['btn_prs'], self.app.theme_data['btn_prs'], self.app.theme_data['btn_hvr'])  # Makes button appear selected
-            if len(self.selected_grids) == 2:
-                self.check_selected_cards()
-
-        # Change the background of buttons for hover and press events
-        def change_grid_button_bg(self, row, col, bg, hover_bg, press_bg):
-            self.grid[row][col]['button'].button_background = bg
-            self.grid[row][col]['button'].button_hover_background = hover_bg
-            self.grid[row][col]['button'].button_press_background = press_bg
-            self.grid[row][col]['button'].generate_button()
-
-        # Shows the cards, checks if the selected cards match, and schedules the change back event
-        def check_selected_cards(self):
-            row, col = self.selected_grids[0]
-            row2, col2 = self.selected_grids[1]
-            self.selected_grids.clear()
-
-            self.grid[row][col]['button'].image = ImageTk.PhotoImage(ImageOps.contain(Image.open(self.grid[row][col]['image']).convert("RGBA"), (70, 70)))
-            self.grid[row][col]['button'].generate_button()
-            self.grid[row2][col2]['button'].image = ImageTk.PhotoImage(ImageOps.contain(Image.open(self.grid[row2][col2]['image']).convert("RGBA"), (70, 70)))
-            self.grid[row2][col2]['button'].generate_button()
-
-            correct = self.grid[row][col]['image'] == self.grid[row2][col2]['image']
+            index = row * self.engine.columns + col
+            event = self.engine.select(index)
+            self.recorder.record(index, event)
+            if event == MatchingTilesEngine.SELECTED:
+                self.change_card_bg(index, self.app.theme_data['btn_prs'], self.app.theme_data['btn_prs'], self.app.theme_data['btn_hvr'])  # Makes button appear selected
+            elif event == MatchingTilesEngine.DESELECTED:
+                self.change_card_bg(index, self.app.theme_data['btn_bg'], self.app.theme_data['btn_hvr'], self.app.theme_data['btn_prs'])
+            elif event != MatchingTilesEngine.IGNORED:
+                self.check_selected_cards(event)
+
+        # Change the background of cards for hover and press events
+        def change_card_bg(self, index, bg, hover_bg, press_bg):
+            self.game_canvas.set_card_colours(index, bg, hover_bg, press_bg)
+
+        # Shows the checked cards, colours them by the engine's event and schedules the change back event
+        @tracer.trace()
+        def check_selected_cards(self, event):
+            first, second = self.engine.last_pair
+            self.game_canvas.show_image(first, self.get_tile_image(self.engine.tile(first)))
+            self.game_canvas.show_image(second, self.get_tile_image(self.engine.tile(second)))
+
+            correct = event == MatchingTilesEngine.MATCH
 
             # Correct
             if correct:
-                self.grid[row][col]['found'] = True
-                self.grid[row2][col2]['found'] = True
                 # Removes click option
-                self.grid[row][col]['button'].command = None
-                self.grid[row2][col2]['button'].command = None
+                self.game_canvas.set_card_enabled(first, False)
+                self.game_canvas.set_card_enabled(second, False)
                 # Makes all options of button background green
-                self.change_grid_button_bg(row, col, "#61a252", "#61a252", "#61a252")
-                self.change_grid_button_bg(row2, col2, "#61a252", "#61a252", "#61a252")
+                self.change_card_bg(first, "#61a252", "#61a252", "#61a252")
+                self.change_card_bg(second, "#61a252", "#61a252", "#61a252")
 
-                sound = pygame.mixer.Sound("assets/sound_effects/correct.mp3")
-                sound.set_volume((self.app.volume.get() / 100) * 2)  # Make volume percentage doubled
-                sound.play()
+                self.app.audio.play_effect("correct")
 
             # Incorrect
             else:
                 # Makes background red
-                self.change_grid_button_bg(row, col, "#ff7f7f", "#ff7f7f", "#ff7f7f")
-                self.change_grid_button_bg(row2, col2, "#ff7f7f", "#ff7f7f", "#ff7f7f")
+                self.change_card_bg(first, "#ff7f7f", "#ff7f7f", "#ff7f7f")
+                self.change_card_bg(second, "#ff7f7f", "#ff7f7f", "#ff7f7f")
 
-                if self.grid[row][col]['revealed'] and self.grid[row2][col2]['revealed']:
-                    self.mistakes += 1
-                    self.mistakes_label.config(text=f"Mistakes: {self.mistakes}")
+                if event == MatchingTilesEngine.MISTAKE:
+                    self.mistakes_label.config(text=f"Mistakes: {self.engine.mistakes}")
                     self.update_score()
 
-                    sound = pygame.mixer.Sound("assets/sound_effects/wrong.mp3")
-                    sound.set_volume((self.app.volume.get() / 100) * 2)  # Make volume percentage doubled
-                    sound.play()
-
-            self.grid[row][col]['revealed'] = True
-            self.grid[row2][col2]['revealed'] = True
+                    self.app.audio.play_effect("wrong")
 
-            self.game_canvas.after(750, lambda: self.hide_selected_cards(correct, (row, col), (row2, col2)))
+            self.game_canvas.after(750, lambda: self.hide_selected_cards(correct, first, second))
 
         # Hides the selected cards, should be scheduled
-        def hide_selected_cards(self, correct, grid1, grid2):
-            row, col = grid1
-            row2, col2 = grid2
-
-            self.grid[row][col]['button'].image = None
-            self.grid[row2][col2]['button'].image = None
+        def hide_selected_cards(self, correct, first, second):
+            if not self.game_started:  # Board is destroyed once the game finishes
+                return
+            self.game_canvas.hide_image(first)
+            self.game_canvas.hide_image(second)
             if correct is False:
-                self.change_grid_button_bg(row, col, self.app.theme_data['btn_bg'], self.app.theme_data['btn_hvr'], self.app.theme_data['btn_prs'])
-                self.change_grid_button_bg(row2, col2, self.app.theme_data['btn_bg'], self.app.theme_data['btn_hvr'], self.app.theme_data['btn_prs'])
-
-            completed = True
-            for grid_row in self.grid:
-                for grid_data in grid_row:
-                    if grid_data['found'] is False:
-                        completed = False
-                        break
-                if not completed:
-                    break
+                self.change_card_bg(first, self.app.theme_data['btn_bg'], self.app.theme_data['btn_hvr'], self.app.theme_data['btn_prs'])
+                self.change_card_bg(second, self.app.theme_data['btn_bg'], self.app.theme_data['btn_hvr'], self.app.theme_data['btn_prs'])
 
-            if completed:
+            if self.engine.completed:
                 self.on_finish_game()
 
         # Destroy the game canvas and shows the summary
         def on_finish_game(self):
             self.game_started = False
-            self.time_elapsed.append(time.time() - self.last_start_time)
-            if self.schedule_loop_id is not None:
-                self.game_canvas.after_cancel(self.schedule_loop_id)
+            self.stop_clock()
             self.game_canvas.destroy()
 
             self.score_label.destroy()
             self.mistakes_label.destroy()
             self.time_label.destroy()
 
-            pygame.mixer.music.fadeout(3000)  # Fade out in 3s
-            self.app.music_playing = None
+            self.app.audio.stop_music(3000)  # Fade out in 3s
             print("Music stopping")
 
+            seconds_taken = round(self.clock.elapsed())
+            score_difference = self.engine.time_penalty(seconds_taken)
+            score = self.engine.score(seconds_taken)
+
+            # Change account data scores, the data file is written later by the scheduler
+            account_scores = None
+            user_data = self.app.get_user_data(self.app.username)
+            if user_data is not None:
+                game_data = self.app.get_game_data(self.app.username, self.game)
+                if f"record_score_{self.difficulty}" not in list(game_data.keys()):
+                    game_data[f'record_score_{self.difficulty}'] = score
+                    new_record = True
+                else:
+                    new_record = score > game_data[f'record_score_{self.difficulty}']
+                    game_data[f'record_score_{self.difficulty}'] = max(score, game_data[f'record_score_{self.difficulty}'])
+                # Each result is kept with the seed of its board, so the board can be dealt again
+                result = {
+                    "time": round(time.time()),
+                    "difficulty": self.difficulty,
+                    "seed": self.deal_seed,
+                    "score": score,
+                    "seconds": seconds_taken,
+                    "mistakes": self.engine.mistakes
+                }
+                game_data.setdefault("history", []).append(result)
+                account_scores = (new_record, *self.app.change_game_user_data(self.app.username, self.game, game_data, self.difficulty, score, result))
+
+            self.flush_recording(score, seconds_taken)
+
+            self.set_keymap({})  # Game cannot be paused once finished
+            self.app.scheduler.add(self.summary_task(score, seconds_taken, score_difference, account_scores), TaskScheduler.VISIBLE_REDRAW, owner=self)
+
+        # Writes the recording of the game with the seed and board, once per game
+        def flush_recording(self, score=None, seconds_taken=None):
+            if self.recorder.flushed or self.app.recording_directory is None:
+                return
+            if score is None and not self.game_started:  # Destroyed before the game was started
+                return
+            self.recorder.flushed = True
+            data = self.recorder.dump({
+                "game": self.game,
+                "difficulty": self.difficulty,
+                "seed": self.deal_seed,
+                "rows": self.engine.rows,
+                "columns": self.engine.columns,
+                "pairs": self.engine.pairs,
+                "tiles": self.engine.tiles,
+                "completed": self.engine.completed,
+                "score": score,
+                "seconds": seconds_taken,
+                "mistakes": self.engine.mistakes
+            })
+            name = f"{time.strftime('%Y%m%d-%H%M%S')}-{self.difficulty}-{self.deal_seed}.rec"
+            if score is None:  # Screen is being destroyed, the scheduler may not run again
+                InputRecorder.write(self.app.recording_directory, name, data)
+            else:
+                self.app.scheduler.add(self.write_recording_task(self.app.recording_directory, name, data), TaskScheduler.PERSISTENCE)
+
+        # Not owned by the screen, so the recording is still written if the screen is destroyed first
+        @staticmethod
+        def write_recording_task(directory, name, data):
+            yield
+            InputRecorder.write(directory, name, data)
+
+        # Shows the summary of the game, one row each step
+        def summary_task(self, score, seconds_taken, score_difference, account_scores):
             summary_canvas = tk.Canvas(self.canvas, borderwidth=0, highlightthickness=0, bg="white")
             summary_canvas.pack(anchor="center", expand=True)
 
@@ -1971,43 +4919,32 @@ class Games:
 
             tk.Label(summary_canvas, text="Game Completed", font=("Poppins Bold", 15, "bold"), bg="white").pack(anchor=tk.CENTER, pady=(10, 10))
 
-            score = self.base_score
             score_canvas = tk.Canvas(summary_canvas, borderwidth=0, highlightthickness=0, bg="white")
             score_canvas.pack(expand=True)
 
             tk.Label(score_canvas, text="Base Score", font=("Poppins Regular", 13), bg="white").grid(row=0, column=0, sticky="W", padx=(5, 30), pady=(5, 0))
-            tk.Label(score_canvas, text=score, font=("Poppins Regular", 13), bg="white").grid(row=0, column=1, sticky="W", padx=(0, 5), pady=(5, 0))
+            tk.Label(score_canvas, text=self.engine.base_score, font=("Poppins Regular", 13), bg="white").grid(row=0, column=1, sticky="W", padx=(0, 5), pady=(5, 0))
+            yield
 
-            score -= self.mistakes
-            tk.Label(score_canvas, text=f"Mistakes: {self.mistakes}", font=("Poppins Regular", 13), bg="white").grid(row=1, column=0, sticky="W", padx=(5, 30))
-            tk.Label(score_canvas, text=f"-{self.mistakes}", font=("Poppins Regular", 13), fg="red", bg="white").grid(row=1, column=1, sticky="W", padx=(0, 5))
+            tk.Label(score_canvas, text=f"Mistakes: {self.engine.mistakes}", font=("Poppins Regular", 13), bg="white").grid(row=1, column=0, sticky="W", padx=(5, 30))
+            tk.Label(score_canvas, text=f"-{self.engine.mistakes}", font=("Poppins Regular", 13), fg="red", bg="white").grid(row=1, column=1, sticky="W", padx=(0, 5))
+            yield
 
-            seconds_taken = round(sum(self.time_elapsed))
             if seconds_taken < 3600:
                 time_taken = time.strftime("%M:%S", time.gmtime(seconds_taken))
             else:
                 time_taken = time.strftime("%H:%M:%S", time.gmtime(seconds_taken))
-            score_difference = round(math.floor(seconds_taken) * self.time_penalise_multiplier, 1)
-            score -= score_difference
-            score = max(round(score, 1), -100)  # Prevent float point arithmetic, set minimum score -100.
             tk.Label(score_canvas, text=f"Time taken: {time_taken}", font=("Poppins Regular", 13), bg="white").grid(row=2, column=0, sticky="W", padx=(5, 30))
             tk.Label(score_canvas, text=f"-{score_difference} {'(minimum -100 score)' if score == -100 else ''}", font=underline_font, fg="red", bg="white").grid(row=2, column=1, sticky="W", padx=(0, 5))
+            yield
 
-            # Change account data scores
-            user_data = self.app.get_user_data(self.app.username)
-            if user_data is None:
+            if account_scores is None:  # Not signed in
                 return
-            game_data = self.app.get_game_data(self.app.username, self.game)
-            if f"record_score_{self.difficulty}" not in list(game_data.keys()):
-                game_data[f'record_score_{self.difficulty}'] = score
-                new_record = True
-            else:
-                new_record = score > game_data[f'record_score_{self.difficulty}']
-                game_data[f'record_score_{self.difficulty}'] = max(score, game_data[f'record_score_{self.difficulty}'])
-            overall_change, original_overall_score, new_overall_score = self.app.change_game_user_data(self.app.username, self.game, game_data, self.difficulty, score)
+            new_record, overall_change, original_overall_score, new_overall_score = account_scores
 
             tk.Label(score_canvas, text="Game Score", font=("Poppins Regular", 13), bg="white").grid(row=3, column=0, sticky="W", padx=(5, 30))
             tk.Label(score_canvas, text=f"{score}{' (New Record!)' if new_record else ''}", font=("Poppins Regular", 13), bg="white").grid(row=3, column=1, sticky="W", padx=(0, 5))
+            yield
 
             tk.Label(score_canvas, text="Account Score", font=("Poppins Regular", 13), bg="white").grid(row=4, column=0, sticky="W", padx=(5, 30), pady=(15, 0))
             tk.Label(score_canvas, text=original_overall_score, font=("Poppins Regular", 13), bg="white").grid(row=4, column=1, sticky="W", padx=(0, 5), pady=(15, 0))
@@ -2017,6 +4954,7 @@ class Games:
 
             tk.Label(score_canvas, text="New Account Score", font=("Poppins Bold", 13, "bold"), bg="white").grid(row=6, column=0, sticky="W", padx=(5, 30), pady=(5, 0))
             tk.Label(score_canvas, text=new_overall_score, font=("Poppins Bold", 13, "bold"), bg="white").grid(row=6, column=1, sticky="W", padx=(0, 5), pady=(5, 0))
+            yield
 
             tk.Canvas(summary_canvas, borderwidth=0, highlightthickness=0, bg="black", height=1).pack(fill="x")
 
@@ -2090,33 +5028,39 @@ class RoundedButton(tk.Canvas):
 
     # Generates a rounded rectangle using polygon points
     def round_rectangle(self, x1, y1, x2, y2, radius=25, update=False, **kwargs):  # if update is False a new rounded rectangle's id will be returned else updates existing rounded rect.
-        # Adapted from https://stackoverflow.com/a/44100075/15993687
-        points = [x1 + radius, y1,
-                  x1 + radius, y1,
-                  x2 - radius, y1,
-                  x2 - radius, y1,
-                  x2, y1,
-                  x2, y1 + radius,
-                  x2, y1 + radius,
-                  x2, y2 - radius,
-                  x2, y2 - radius,
-                  x2, y2,
-                  x2 - radius, y2,
-                  x2 - radius, y2,
-                  x1 + radius, y2,
-                  x1 + radius, y2,
-                  x1, y2,
-                  x1, y2 - radius,
-                  x1, y2 - radius,
-                  x1, y1 + radius,
-                  x1, y1 + radius,
-                  x1, y1]
+        points = self.round_rectangle_points(x1, y1, x2, y2, radius)
         if not update:
             return self.create_polygon(points, **kwargs, smooth=True)
         else:
             self.coords(self.button_obj, points)
 
+    # Gets the polygon points of a rounded rectangle, drawn with smooth=True
+    @staticmethod
+    def round_rectangle_points(x1, y1, x2, y2, radius=25):
+        # Adapted from https://stackoverflow.com/a/44100075/15993687
+        return [x1 + radius, y1,
+                x1 + radius, y1,
+                x2 - radius, y1,
+                x2 - radius, y1,
+                x2, y1,
+                x2, y1 + radius,
+                x2, y1 + radius,
+                x2, y2 - radius,
+                x2, y2 - radius,
+                x2, y2,
+                x2 - radius, y2,
+                x2 - radius, y2,
+                x1 + radius, y2,
+                x1 + radius, y2,
+                x1, y2,
+                x1, y2 - radius,
+                x1, y2 - radius,
+                x1, y1 + radius,
+                x1, y1 + radius,
+                x1, y1]
+
     # Generates the text/images on a button
+    @tracer.trace()
     def generate_button(self):
         self.delete("button")  # Deletes existing button to regenerate
 
@@ -2193,17 +5137,439 @@ class RoundedButton(tk.Canvas):
             self.itemconfig(self.text_obj, fill=self.button_foreground)
 
 
+# A board of cards drawn as items on one canvas, the clicked card is found from the row and column size
+class TileBoard(tk.Canvas):
+    MAX_SIZE = 12  # Maximum number of rows and columns
+
+    def __init__(self, parent=None, rows: int = 4, columns: int = 4,
+                 card_size: int = 80, gap: int = 5, radius: int = 29,
+                 card_background="#ffffff", card_hover_background="#ffffff", card_press_background="#ffffff",
+                 outline_colour: str = "", outline_width: int = 1,
+                 command=None,
+                 *args, **kwargs):
+        if not (0 < rows <= self.MAX_SIZE and 0 < columns <= self.MAX_SIZE):
+            raise ValueError(f"Board size must be from 1x1 to {self.MAX_SIZE}x{self.MAX_SIZE}, got {rows}x{columns}")
+        super(TileBoard, self).__init__(parent, bd=0, highlightthickness=0, *args, **kwargs)
+        self.rows = rows
+        self.columns = columns
+        self.max_card_size = card_size  # Cards are never bigger than this, but may shrink to fit
+        self.card_size = card_size
+        self.gap = gap
+        self.max_radius = radius
+        self.outline_colour = outline_colour
+        self.outline_width = outline_width
+        self.command = command  # Called with (row, col) when an enabled card is clicked
+
+        # Card state, indexed by row * columns + col
+        cards = rows * columns
+        self.colours = [(card_background, card_hover_background, card_press_background)] * cards
+        self.enabled = [True] * cards
+        self.card_items: list = [None] * cards
+        self.image_items: list = [None] * cards
+        self.images: list = [None] * cards  # Keeps shown images referenced
+
+        self.hovered_card = None
+        self.pressed_card = None
+
+        self.draw()
+
+        self.bind("<Motion>", self.on_motion)
+        self.bind("<Leave>", self.on_leave)
+        self.bind("<ButtonPress-1>", self.on_press)
+        self.bind("<ButtonRelease-1>", self.on_release)
+
+    # Distance between the start of each card
+    @property
+    def pitch(self):
+        return self.card_size + self.gap
+
+    # Gets the top left coordinates of a card
+    def card_position(self, index):
+        row, col = divmod(index, self.columns)
+        return self.gap + col * self.pitch, self.gap + row * self.pitch
+
+    # Gets the index of the card at coordinates, None if not on a card
+    def card_at(self, x, y):
+        col, x_offset = divmod(int(x) - self.gap, self.pitch)
+        row, y_offset = divmod(int(y) - self.gap, self.pitch)
+        if 0 <= row < self.rows and 0 <= col < self.columns and x_offset < self.card_size and y_offset < self.card_size:
+            return row * self.columns + col
+        return None
+
+    # Draws every card, should only be called once
+    def draw(self):
+        self.config(width=self.gap + self.columns * self.pitch, height=self.gap + self.rows * self.pitch)
+        radius = self.max_radius * self.card_size / self.max_card_size
+        for index in range(self.rows * self.columns):
+            x, y = self.card_position(index)
+            self.card_items[index] = self.create_polygon(
+                RoundedButton.round_rectangle_points(x, y, x + self.card_size, y + self.card_size, radius),
+                smooth=True, fill=self.colours[index][0], outline=self.outline_colour, width=self.outline_width
+            )
+
+    # Shrinks (or grows up to the max card size) the cards to fit in a width and height
+    def fit(self, width, height):
+        card_size = min(self.max_card_size, (width - self.gap) // self.columns - self.gap, (height - self.gap) // self.rows - self.gap)
+        card_size = max(card_size, 16)  # Cards should still be clickable
+        if card_size == self.card_size:
+            return False
+
+        self.card_size = card_size
+        self.config(width=self.gap + self.columns * self.pitch, height=self.gap + self.rows * self.pitch)
+        radius = self.max_radius * self.card_size / self.max_card_size
+        for index in range(self.rows * self.columns):  # Move existing items instead of redrawing
+            x, y = self.card_position(index)
+            self.coords(self.card_items[index], RoundedButton.round_rectangle_points(x, y, x + self.card_size, y + self.card_size, radius))
+            if self.image_items[index] is not None:
+                self.coords(self.image_items[index], x + self.card_size / 2, y + self.card_size / 2)
+        return True
+
+    # Updates the fill of a card to show if it is hovered or pressed
+    def update_card(self, index):
+        background, hover_background, press_background = self.colours[index]
+        if index == self.pressed_card and index == self.hovered_card:
+            fill = press_background
+        elif index == self.hovered_card:
+            fill = hover_background
+        else:
+            fill = background
+        self.itemconfig(self.card_items[index], fill=fill)
+
+    # Change the background of a card for normal, hover and press states
+    def set_card_colours(self, index, background, hover_background, press_background):
+        self.colours[index] = (background, hover_background, press_background)
+        self.update_card(index)
+
+    # Enables or disables clicking on a card
+    def set_card_enabled(self, index, enabled: bool):
+        self.enabled[index] = enabled
+
+    # Shows an image in the middle of a card
+    def show_image(self, index, image):
+        self.images[index] = image
+        x, y = self.card_position(index)
+        if self.image_items[index] is None:
+            self.image_items[index] = self.create_image(x + self.card_size / 2, y + self.card_size / 2, image=image)
+        else:
+            self.itemconfig(self.image_items[index], image=image)
+
+    # Removes the image on a card
+    def hide_image(self, index):
+        if self.image_items[index] is not None:
+            self.delete(self.image_items[index])
+        self.image_items[index] = None
+        self.images[index] = None
+
+    # Changes the hovered card when the mouse moves to another card
+    def on_motion(self, event):
+        index = self.card_at(event.x, event.y)
+        if index == self.hovered_card:
+            return
+        last_hovered_card, self.hovered_card = self.hovered_card, index
+        if last_hovered_card is not None:
+            self.update_card(last_hovered_card)
+        if index is not None:
+            self.update_card(index)
+
+    def on_leave(self, _=None):
+        last_hovered_card, self.hovered_card = self.hovered_card, None
+        if last_hovered_card is not None:
+            self.update_card(last_hovered_card)
+
+    def on_press(self, event):
+        self.pressed_card = self.hovered_card = self.card_at(event.x, event.y)
+        if self.pressed_card is not None:
+            self.update_card(self.pressed_card)
+
+    # Clicks the card if the mouse is released on the same card it was pressed on
+    def on_release(self, event):
+        pressed_card, self.pressed_card = self.pressed_card, None
+        if pressed_card is None:
+            return
+        self.update_card(pressed_card)
+        if self.card_at(event.x, event.y) == pressed_card and self.enabled[pressed_card] and self.command is not None:
+            self.command(*divmod(pressed_card, self.columns))
+
+
+# A scrollable list that only creates widgets for the rows in view (plus overscan) and recycles them when scrolling
+class VirtualList(tk.Frame):
+    def __init__(self, parent=None, row_height: int = 50, row_width: int = 300,
+                 create_row=None, update_row=None, items: list = None, overscan: int = 2,
+                 bg: str = "#ffffff",
+                 *args, **kwargs):
+        super(VirtualList, self).__init__(parent, bd=0, borderwidth=0, highlightthickness=0, bg=bg, *args, **kwargs)
+        self.row_height = row_height
+        self.row_width = row_width
+        self.create_row = create_row  # Called with the parent canvas, returns a new row widget
+        self.update_row = update_row  # Called with (row widget, item, index) to show an item on a row
+        self.items = list(items) if items is not None else []
+        self.overscan = overscan  # Number of extra rows kept above and below the viewport
+
+        self.list_canvas = tk.Canvas(self, bg=bg, width=row_width, bd=0, borderwidth=0, highlightthickness=0, yscrollincrement=max(row_height // 2, 1))
+        self.list_canvas.pack(anchor=tk.CENTER, side=tk.LEFT, fill=tk.Y, expand=True)
+
+        scrollbar = tk.Scrollbar(self, orient=tk.VERTICAL, command=self.yview)
+        scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        self.list_canvas.configure(yscrollcommand=scrollbar.set)
+
+        self.rows: dict = {}  # Item index -> (row widget, canvas window id) for the rows being shown
+        self.spare_rows: list = []  # Rows that scrolled out of view, reused for the next rows shown
+        self.refreshing = False
+        self.refresh_pending = False
+
+        self.bind_mouse_wheel(self.list_canvas)
+        self.list_canvas.bind("<Configure>", self.refresh, add="+")
+        self.update_scrollregion()
+
+    # Binds mouse wheel scrolling on a widget (Windows/macOS and X11)
+    def bind_mouse_wheel(self, widget):
+        widget.bind("<MouseWheel>", self.on_mouse_wheel, add="+")
+        widget.bind("<Button-4>", self.on_mouse_wheel, add="+")
+        widget.bind("<Button-5>", self.on_mouse_wheel, add="+")
+
+    # Scrolls the list from a mouse wheel event
+    def on_mouse_wheel(self, event):
+        if event.num == 4:
+            step = -1
+        elif event.num == 5:
+            step = 1
+        elif abs(event.delta) >= 120:  # Windows gives multiples of 120
+            step = -1 * int(event.delta / 120)
+        else:  # macOS gives small deltas
+            step = -1 if event.delta > 0 else 1
+        self.list_canvas.yview_scroll(step, "units")
+        self.refresh()
+
+    # Scrollbar command, scrolls the canvas then shows the rows now in view
+    def yview(self, *args):
+        self.list_canvas.yview(*args)
+        self.refresh()
+
+    # Makes the scrollable area the height of every row, even though only a few rows exist
+    def update_scrollregion(self):
+        self.list_canvas.configure(scrollregion=(0, 0, self.row_width, len(self.items) * self.row_height))
+
+    # Gets the first and last item index that should have a row
+    def visible_range(self):
+        top = self.list_canvas.canvasy(0)
+        height = max(self.list_canvas.winfo_height(), self.row_height)
+        first = max(int(top // self.row_height) - self.overscan, 0)
+        last = min(int((top + height) // self.row_height) + self.overscan, len(self.items) - 1)
+        return first, last
+
+    # Shows an item using a spare row, or a new row if there are no spare rows
+    def show_row(self, index):
+        x, y = self.row_width / 2, index * self.row_height + self.row_height / 2
+        if self.spare_rows:
+            widget, window = self.spare_rows.pop()
+            self.list_canvas.coords(window, x, y)
+        else:
+            widget = self.create_row(self.list_canvas)
+            window = self.list_canvas.create_window(x, y, window=widget, anchor="center")
+            self.bind_mouse_wheel(widget)
+        self.rows[index] = (widget, window)
+        self.update_row(widget, self.items[index], index)
+
+    # Recycles rows that left the viewport and shows the rows that entered it
+    def refresh(self, _=None):
+        if self.refreshing:  # Updating a row may process events (e.g. RoundedButton.generate_button), so refresh once it is done
+            self.refresh_pending = True
+            return
+        self.refreshing = True
+        try:
+            first, last = self.visible_range()
+            for index in [index for index in self.rows if index < first or index > last]:
+                self.spare_rows.append(self.rows.pop(index))
+            for index in range(first, last + 1):
+                if index not in self.rows:
+                    self.show_row(index)
+            for _, window in self.spare_rows:  # Move spare rows outside the scrollable area
+                self.list_canvas.coords(window, self.row_width / 2, -self.row_height)
+        finally:
+            self.refreshing = False
+
+        if self.refresh_pending:
+            self.refresh_pending = False
+            self.after_idle(self.refresh)
+
+    # Replaces all items in the list
+    def set_items(self, items: list):
+        self.items = list(items)
+        self.spare_rows.extend(self.rows.values())
+        self.rows.clear()
+        self.update_scrollregion()
+        self.refresh()
+
+    # Re-shows a single item if it has a row
+    def update_item(self, index):
+        if index in self.rows:
+            self.update_row(self.rows[index][0], self.items[index], index)
+
+    # Removes an item, only moving the rows below up instead of regenerating them
+    def remove(self, index):
+        del self.items[index]
+        removed_row = self.rows.pop(index, None)
+
+        rows = {}
+        for row_index, (widget, window) in self.rows.items():
+            if row_index > index:
+                self.list_canvas.move(window, 0, -self.row_height)
+                row_index -= 1
+            rows[row_index] = (widget, window)
+        self.rows = rows
+        if removed_row is not None:
+            self.spare_rows.append(removed_row)
+
+        self.update_scrollregion()
+        self.refresh()  # Only the row that scrolled into view is updated
+
+
 if __name__ == "__main__":
-    # Adds support for custom fonts
-    pyglet.options["win32_gdi_font"] = True
-    pyglet.font.add_file("assets/fonts/Poppins-Bold.ttf")
-    pyglet.font.add_file("assets/fonts/Poppins-Regular.ttf")
+    parser = argparse.ArgumentParser(description="Recollect")
+    parser.add_argument("--simulate", type=int, metavar="GAMES", help="simulate games of Matching Tiles without a display and report the scores")
+    parser.add_argument("--players", default="perfect,memory:4,random", help="player models to simulate: perfect, random or memory:<k> (default: %(default)s)")
+    parser.add_argument("--difficulties", default=",".join(RecollectApp.BOARD_SIZES), help="difficulties to simulate or benchmark (default: %(default)s)")
+    parser.add_argument("--games-per-player", type=int, default=50, help="games each simulated player plays in a row (default: %(default)s)")
+    parser.add_argument("--seconds-per-move", type=float, default=2.0, help="time a simulated player takes for each pair (default: %(default)s)")
+    parser.add_argument("--seed", type=int, default=0, help="seed of the simulated deals and players (default: %(default)s)")
+    parser.add_argument("--processes", type=int, help="number of worker processes (default: number of cores)")
+    parser.add_argument("--benchmark-ui", metavar="OUTPUT", nargs="?", const="benchmark_ui.json", help="time screen builds and card clicks of the real app and write the results as JSON (default: %(const)s)")
+    parser.add_argument("--iterations", type=int, default=6, help="games played by the UI benchmark (default: %(default)s)")
+    parser.add_argument("--profile-startup", action="store_true", help="print how long each phase of startup takes, then close")
+    parser.add_argument("--trace", metavar="OUTPUT", nargs="?", const="trace.json", help="record spans of hot paths and export them as a Chrome trace on F12 and on close (default: %(const)s)")
+    parser.add_argument("--recompute-ratings", action="store_true", help="replay the game history of every account to recompute overall scores with the scoring constants below")
+    parser.add_argument("--dry-run", action="store_true", help="with --recompute-ratings, only report how the ratings would change")
+    parser.add_argument("--score-divisors", default=",".join(f"{difficulty}={divisor}" for difficulty, divisor in RecollectApp.DIFFICULTY_SCORE_DIVISORS.items()), help="score divisor of each difficulty for --recompute-ratings (default: %(default)s)")
+    parser.add_argument("--score-loss-curve", type=float, default=RecollectApp.SCORE_LOSS_CURVE, help="share of a worse score taken from the rating (default: %(default)s)")
+    parser.add_argument("--score-gain-curve", type=float, default=RecollectApp.SCORE_GAIN_CURVE, help="share of a better score added to the rating (default: %(default)s)")
+    parser.add_argument("--record", metavar="DIRECTORY", nargs="?", const="recordings", help="record the clicks and pauses of each Matching Tiles game into a file in this directory (default: %(const)s)")
+    parser.add_argument("--replay", metavar="RECORDING", help="replay a recorded game against the game rules and report how it was played")
+    parser.add_argument("--replay-speed", type=float, default=1.0, help="speed of --replay, 0 replays without waiting (default: %(default)s)")
+    parser.add_argument("--deal-seed", type=int, help="deal every Matching Tiles board from this seed, e.g. a seed from the game history")
+    parser.add_argument("--index-tiles", metavar="PACK", nargs="+", help="write the index of tile packs (directories or zip files of tiles), then rebuild the asset manifest")
+    parser.add_argument("--build-manifest", action="store_true", help="scan the assets with their sizes, dimensions and hashes into the asset manifest")
+    parser.add_argument("--build-bundle", metavar="OUTPUT", nargs="?", const="assets.bundle", help="pack the assets into one memory-mapped bundle file, used instead of the assets directory when present (default: %(const)s)")
+    parser.add_argument("--build-audio-cache", metavar="FORMAT", nargs="?", const="wav", choices=AudioCache.FORMATS, help="transcode the music and sound effects into the audio cache as wav or ogg (default: %(const)s), ogg needs ffmpeg")
+    args = parser.parse_args()
+    difficulties = args.difficulties.split(",")
+    for difficulty in difficulties:
+        if difficulty not in RecollectApp.BOARD_SIZES:
+            parser.error(f"Unknown difficulty \"{difficulty}\"")
+
+    if args.index_tiles is not None:
+        try:
+            for pack_path in args.index_tiles:
+                TilePack.build_index(pack_path)
+        except (OSError, ValueError, zipfile.BadZipFile) as error:
+            parser.exit(1, f"Could not index the tile pack: {error}\n")
+        args.build_manifest = True  # Indexed packs are listed differently in the manifest
+
+    if args.build_manifest:
+        try:
+            AssetManifest().build()
+        except OSError as error:
+            parser.exit(1, f"Could not build the asset manifest: {error}\n")
+        raise SystemExit
+
+    if args.recompute_ratings:
+        try:
+            divisors = {difficulty: float(divisor) for difficulty, divisor in (pair.split("=") for pair in args.score_divisors.split(","))}
+        except ValueError:
+            parser.error("--score-divisors must be like easy=1,normal=2,hard=4")
+        try:
+            RatingEngine(
+                divisors=divisors, loss_curve=args.score_loss_curve, gain_curve=args.score_gain_curve, processes=args.processes
+            ).run(dry_run=args.dry_run)
+        except (OSError, ValueError, KeyError) as error:
+            parser.exit(1, f"Could not recompute the ratings: {error}\n")
+        raise SystemExit
+
+    if args.replay is not None:
+        try:
+            differences = GameReplay(args.replay, speed=args.replay_speed).run()
+        except (OSError, ValueError, KeyError, struct.error) as error:
+            parser.exit(1, f"Could not replay the recording: {error}\n")
+        raise SystemExit(1 if differences else 0)
+
+    if args.build_bundle is not None:
+        try:
+            AssetBundle.build(args.build_bundle, AssetManifest(bundle_file=None))
+        except OSError as error:
+            parser.exit(1, f"Could not build the asset bundle: {error}\n")
+        raise SystemExit
+
+    if args.build_audio_cache is not None:
+        try:
+            AudioCache().build(args.build_audio_cache, processes=args.processes)
+        except (OSError, pygame.error, subprocess.CalledProcessError) as error:
+            parser.exit(1, f"Could not build the audio cache: {error}\n")
+        raise SystemExit
+
+    if args.simulate is not None:
+        players = args.players.split(",")
+        try:
+            for model in players:
+                SimulatedPlayer.parse_memory(model)
+        except ValueError as error:
+            parser.error(str(error))
+        MatchingTilesSimulation(
+            RecollectApp.BOARD_SIZES, players, difficulties, games=args.simulate,
+            games_per_player=max(args.games_per_player, 1), seconds_per_move=args.seconds_per_move,
+            seed=args.seed, processes=args.processes
+        ).run()
+        raise SystemExit
+
+    if args.trace is not None:
+        tracer.enable(args.trace)
+
+    profile = None
+    if args.profile_startup:
+        profile = StartupProfile(time.perf_counter() - sum(IMPORT_TIMES.values()))
+        for module, seconds in IMPORT_TIMES.items():
+            profile.add(f"import {module}", seconds)
+        profile.mark("parse arguments")
+
+    # Fonts are registered in the background, the first screen is shown in fallback fonts until they are ready
+    font_thread = threading.Thread(target=RecollectApp.register_fonts, name="fonts", daemon=True)
+    font_thread.start()
 
     # Prevents blurring of the window
-    windll.shcore.SetProcessDpiAwareness(1)
+    if windll is not None:
+        windll.shcore.SetProcessDpiAwareness(1)
+
+    if args.benchmark_ui is not None:
+        # Runs under Xvfb without a display, with a separate data file and no sound device needed
+        try:
+            virtual_display = UIBenchmark.start_virtual_display()
+        except OSError as error:
+            parser.error(f"Could not start Xvfb: {error}")
+        os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+        benchmark_data_file = f"benchmark_data_{os.getpid()}.json"
+        try:
+            root = tk.Tk()
+            font_thread.join()
+            app = RecollectApp(root, data_file=benchmark_data_file)
+            UIBenchmark(app, iterations=max(args.iterations, 1), difficulties=difficulties, output=args.benchmark_ui).start()
+            root.mainloop()
+        finally:
+            with contextlib.suppress(FileNotFoundError):
+                os.remove(benchmark_data_file)
+            if virtual_display is not None:
+                virtual_display.terminate()
+        raise SystemExit
 
     # Create the root window
     root = tk.Tk()
+    if profile is not None:
+        profile.mark("create window")
 
     # Start the app
-    RecollectApp(root)
+    app = RecollectApp(root, profile=profile)
+    app.watch_fonts(font_thread, profile)
+    app.deal_seed = args.deal_seed
+    app.recording_directory = args.record
+    if profile is not None:
+        root.after_idle(lambda: profile.watch(app))
+
+    # Main window loop
+    root.mainloop()